@@ -1,12 +1,27 @@
-import yaml
-import streamlit as st
-from study_agents import StudyAgents
+import asyncio
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from config import get_config
+from study_agents import StudyAgents, ROLE_TEMPERATURES
+from context_builder import get_context_builder
+from ingest_jobs import get_ingestion_queue, make_job_id
+from pdf_stream import stream_sha256
+from progress import COMPLETE, ERROR, ProgressCallback, emit
+from providers import provider_metrics
+from question_bank import get_question_bank
+from quiz import QuizQuestion, dedupe_questions, parse_questions, plan_shards, quiz_markdown, split_focus_areas
+from quiz_prefetch import get_quiz_prefetcher, quiz_difficulty, roadmap_modules
 from rag_helper import RAGHelper
-from typing import Optional, Dict, Any
+from semantic_cache import get_semantic_cache
+from tenants import get_tenant_collections
+from response_cache import ResponseCache, get_response_cache, normalize_prompt
+from telemetry import get_telemetry
+from typing import Optional, Dict, Any, BinaryIO, Callable, Generator, Iterator, List, Tuple
 
 class StudyAssistantHandler:
     def __init__(self, topic, subject_category, knowledge_level, learning_goal, 
-                 time_available, learning_style, model_name="gpt-4o", provider="openai"):
+                 time_available, learning_style, model_name="gpt-4o", provider="openai", tenant_id=None):
         """
         Initialize the study assistant handler.
         
@@ -18,7 +33,9 @@ class StudyAssistantHandler:
             time_available (str): How much time the student has
             learning_style (str): Student's preferred learning style
             model_name (str): The model to use
-            provider (str): The AI provider ("openai" or "groq")
+            provider (str): The AI provider ("openai", "groq" or the offline "fake")
+            tenant_id (str): User or session id whose private document collection is used;
+                None shares a single collection across all handlers
         """
         self.topic = topic
         self.subject_category = subject_category
@@ -32,25 +49,33 @@ class StudyAssistantHandler:
             topic, subject_category, knowledge_level, learning_goal,
             time_available, learning_style, model_name, provider
         )
-        self.config = self._load_config()
-        self.rag_helper = None
+        self.tenant_id = tenant_id
+        self._rag_helper: Optional[RAGHelper] = None
+        self._rag_initialized = False
+        self.last_stream_metrics: Dict[str, Any] = {}
+        self.last_context_stats: Dict[str, Any] = {}
+        self.response_cache = get_response_cache()
+        self.telemetry = get_telemetry()
+    
+    @property
+    def config(self):
+        return self._load_config()
     
     def _load_config(self):
         """
-        Load the complete configuration from the YAML file.
+        Get the shared configuration snapshot.
         
         Returns:
-            dict: A dictionary of configuration data
+            ConfigSnapshot: The pre-compiled configuration, reloaded when prompts.yaml changes
         """
-        with open("prompts.yaml", "r") as file:
-            return yaml.safe_load(file)
+        return get_config()
     
     def _format_prompt(self, prompt_template, **kwargs):
         """
         Format a prompt template with variables.
         
         Args:
-            prompt_template (str): The prompt template to format
+            prompt_template (PromptTemplate): The prompt template to format
             **kwargs: The variables to insert into the template
             
         Returns:
@@ -58,104 +83,684 @@ class StudyAssistantHandler:
         """
         return prompt_template.format(**kwargs)
     
-    def analyze_student(self):
+    def _analysis_prompt(self) -> str:
         """
-        Analyze the student's learning needs and create a profile.
+        Build the student analysis prompt.
         
         Returns:
-            dict: Analysis results
+            str: The formatted prompt
         """
-        results = {}
+        return self._format_prompt(
+            self.config.prompt("student_analysis"),
+            topic=self.topic,
+            subject_category=self.subject_category,
+            knowledge_level=self.knowledge_level,
+            learning_goal=self.learning_goal,
+            time_available=self.time_available,
+            learning_style=self.learning_style
+        )
+    
+    def _run_analysis(self, use_cache: bool = True) -> str:
+        """
+        Run the student analyzer agent.
         
-        with st.status("Analyzing your learning needs...", expanded=True) as status:
-            status.update(label="Creating student profile...", state="running")
+        Args:
+            use_cache (bool): Whether a cached analysis may be returned
             
-            analyzer = self.agents.student_analyzer_agent()
-            analysis_prompt = self._format_prompt(
-                self.config["prompts"]["student_analysis"]["base"],
-                topic=self.topic,
-                subject_category=self.subject_category,
-                knowledge_level=self.knowledge_level,
-                learning_goal=self.learning_goal,
-                time_available=self.time_available,
-                learning_style=self.learning_style
-            )
+        Returns:
+            str: The student analysis
+        """
+        return self._run_agent("student_analysis", "student_analyzer", self._analysis_prompt(), use_cache)
+    
+    def _roadmap_prompt(self, student_analysis: str) -> str:
+        """
+        Build the roadmap creation prompt.
+        
+        Args:
+            student_analysis (str): The student analysis
             
-            analysis_resp = analyzer.run(analysis_prompt, stream=False)
-            analysis_result = analysis_resp.content
-            results["analysis"] = analysis_result
-            st.session_state.student_analysis = analysis_result
+        Returns:
+            str: The formatted prompt
+        """
+        return self._format_prompt(
+            self.config.prompt("roadmap_creation"),
+            student_analysis=student_analysis,
+            topic=self.topic,
+            learning_goal=self.learning_goal,
+            time_available=self.time_available,
+            knowledge_level=self.knowledge_level
+        )
+    
+    def _quiz_prompt(self, difficulty_level: str, focus_areas: str, num_questions: int) -> str:
+        """
+        Build the quiz generation prompt.
+        
+        Args:
+            difficulty_level (str): The difficulty level of the quiz
+            focus_areas (str): Specific areas to focus on
+            num_questions (int): Number of questions to generate
+            
+        Returns:
+            str: The formatted prompt
+        """
+        return self._format_prompt(
+            self.config.prompt("quiz_generation"),
+            topic=self.topic,
+            difficulty_level=difficulty_level,
+            focus_areas=focus_areas,
+            num_questions=num_questions
+        )
+    
+    def _structured_quiz_prompt(self, difficulty_level: str, focus_area: str, num_questions: int,
+                                part: Tuple[int, int], existing: List[QuizQuestion]) -> str:
+        """
+        Build the prompt of one batch of a structured quiz.
+        
+        Args:
+            difficulty_level (str): The difficulty level of the quiz
+            focus_area (str): The focus area of this batch
+            num_questions (int): Number of questions in this batch
+            part (Tuple[int, int]): This batch's number and the number of batches on its focus area
+            existing (List[QuizQuestion]): Questions the quiz already has, which must not be repeated
             
-            status.update(label="Analysis complete!", state="complete")
+        Returns:
+            str: The formatted prompt
+        """
+        notes = []
+        if part[1] > 1:
+            notes.append(f"This is part {part[0]} of {part[1]} on this focus area; "
+                         f"cover different aspects of it than the other parts would.")
+        if existing:
+            notes.append("Do not repeat these questions, which the quiz already has:\n"
+                         + "\n".join(f"- {question.stem}" for question in existing))
+        return self._format_prompt(
+            self.config.prompt("quiz_generation", "structured"),
+            topic=self.topic,
+            difficulty_level=difficulty_level,
+            focus_area=focus_area,
+            num_questions=num_questions,
+            notes="\n\n".join(notes) + "\n" if notes else ""
+        )
+    
+    def _quiz_batches(self, difficulty_level: str, missing: Dict[str, int], shard_size: int,
+                      existing: List[QuizQuestion]) -> List[Tuple[str, str]]:
+        """
+        Plan one round of parallel structured quiz batches.
         
-        return results
+        Args:
+            difficulty_level (str): The difficulty level of the quiz
+            missing (Dict[str, int]): Questions still needed per focus area
+            shard_size (int): Most questions asked of one batch
+            existing (List[QuizQuestion]): Questions the quiz already has
+            
+        Returns:
+            List[Tuple[str, str]]: (focus area, prompt) per batch
+        """
+        batches = []
+        for area, count in missing.items():
+            if count <= 0:
+                continue
+            shards = plan_shards(count, [area], shard_size)
+            batches += [
+                (area, self._structured_quiz_prompt(difficulty_level, area, size, (part, len(shards)), existing))
+                for part, (_, size) in enumerate(shards, start=1)
+            ]
+        return batches
     
-    def create_roadmap(self, student_analysis: str):
+    def _merge_quiz_batches(self, questions: List[QuizQuestion], batches: List[Tuple[str, str]],
+                            responses: List[Any], difficulty_level: str, targets: Dict[str, int],
+                            threshold: float) -> Tuple[List[QuizQuestion], Optional[BaseException]]:
         """
-        Create a personalized learning roadmap based on student analysis.
+        Add the questions of a round of batches to the quiz.
         
         Args:
-            student_analysis (str): The student analysis from analyze_student()
+            questions (List[QuizQuestion]): Questions the quiz already has
+            batches (List[Tuple[str, str]]): The round's (focus area, prompt) batches
+            responses (List[Any]): Response content, or the exception raised, per batch
+            difficulty_level (str): Difficulty of questions that have none
+            targets (Dict[str, int]): Questions wanted per focus area
+            threshold (float): Stem similarity at which a question counts as a duplicate
             
         Returns:
-            dict: Roadmap results
+            tuple: (the questions, grouped by focus area, the last batch error or None)
         """
-        results = {}
+        error = None
+        questions = list(questions)
+        for (area, _), response in zip(batches, responses):
+            if isinstance(response, BaseException):
+                print(f"Quiz batch on {area} failed: {response}")
+                error = response
+                continue
+            for question in parse_questions(response, difficulty_level, area):
+                # Batches are accounted by the area they were asked for, whatever the model labels
+                question.focus_area = area
+                questions.append(question)
+        merged = []
+        kept = Counter()
+        for question in dedupe_questions(questions, threshold):
+            if kept[question.focus_area] < targets[question.focus_area]:
+                kept[question.focus_area] += 1
+                merged.append(question)
+        order = list(targets)
+        merged.sort(key=lambda question: order.index(question.focus_area))
+        return merged, error
+    
+    def _quiz_rounds(self, difficulty_level: str, targets: Dict[str, int], shard_size: int, threshold: float,
+                     top_up_rounds: int, questions: List[QuizQuestion]
+                     ) -> Generator[List[Tuple[str, str]], List[Any], Tuple[List[QuizQuestion], int, Optional[BaseException]]]:
+        """
+        Plan the rounds of a structured quiz and merge their results, leaving the model calls to the caller.
+        
+        Yields each round's (focus area, prompt) batches and is sent back the
+        response content, or the exception raised, per batch; a round only
+        asks for the questions still missing after the previous ones.
         
-        with st.status("Creating your personalized learning roadmap...", expanded=True) as status:
-            status.update(label="Designing learning path...", state="running")
+        Args:
+            difficulty_level (str): The difficulty level of the quiz
+            targets (Dict[str, int]): Questions wanted per focus area
+            shard_size (int): Most questions asked of one batch
+            threshold (float): Stem similarity at which a question counts as a duplicate
+            top_up_rounds (int): Rounds after the first
+            questions (List[QuizQuestion]): Questions the quiz starts with, e.g. from the question bank
             
-            roadmap_creator = self.agents.roadmap_creator_agent()
-            roadmap_prompt = self._format_prompt(
-                self.config["prompts"]["roadmap_creation"]["base"],
-                student_analysis=student_analysis,
-                topic=self.topic,
-                learning_goal=self.learning_goal,
-                time_available=self.time_available,
-                knowledge_level=self.knowledge_level
+        Returns:
+            tuple: (the merged questions, model calls made, the last batch error or None)
+        """
+        error = None
+        calls = 0
+        for _ in range(1 + top_up_rounds):
+            have = Counter(question.focus_area for question in questions)
+            batches = self._quiz_batches(
+                difficulty_level, {area: target - have[area] for area, target in targets.items()},
+                shard_size, questions
+            )
+            if not batches:
+                break
+            calls += len(batches)
+            responses = yield batches
+            questions, error = self._merge_quiz_batches(
+                questions, batches, responses, difficulty_level, targets, threshold
             )
+        return questions, calls, error
+    
+    def _quiz_plan(self, focus_areas: str, num_questions: int,
+                   shard_size: Optional[int]) -> Tuple[Dict[str, int], int, float, int]:
+        """
+        Work out how a structured quiz is split.
+        
+        Returns:
+            tuple: (questions per focus area, shard size, duplicate threshold, top-up rounds)
+        """
+        settings = self.config.setting("quiz")
+        shard_size = shard_size or settings.get("shard_size", 5)
+        targets: Dict[str, int] = {}
+        for area, count in plan_shards(num_questions, split_focus_areas(focus_areas), shard_size):
+            targets[area] = targets.get(area, 0) + count
+        return targets, shard_size, settings.get("duplicate_threshold", 0.8), settings.get("top_up_rounds", 1)
+    
+    def _bank_draw(self, difficulty_level: str, targets: Dict[str, int]) -> List[Tuple[int, QuizQuestion]]:
+        """
+        Find the questions of a quiz that the question bank already holds.
+        
+        Args:
+            difficulty_level (str): The difficulty level of the quiz
+            targets (Dict[str, int]): Questions wanted per focus area
             
-            roadmap_resp = roadmap_creator.run(roadmap_prompt, stream=False)
-            roadmap_result = roadmap_resp.content
-            results["roadmap"] = roadmap_result
-            st.session_state.learning_roadmap = roadmap_result
+        Returns:
+            List[Tuple[int, QuizQuestion]]: (bank id, question) pairs found, none if the bank is disabled
+        """
+        bank = get_question_bank()
+        if bank is None:
+            return []
+        questions = []
+        for area, target in targets.items():
+            questions += bank.draw(self.topic, difficulty_level, area, target, self.tenant_id)
+        return questions
+    
+    def _bank_store(self, difficulty_level: str, questions: List[QuizQuestion],
+                    drawn: List[Tuple[int, QuizQuestion]]):
+        """
+        Record the bank questions a quiz ended up using and add its freshly generated ones to the bank.
+        
+        Called once the quiz is merged, so drawn questions dropped as duplicates are not marked as served.
+        
+        Args:
+            difficulty_level (str): The difficulty level of the quiz
+            questions (List[QuizQuestion]): The quiz's questions
+            drawn (List[Tuple[int, QuizQuestion]]): The questions drawn from the bank by _bank_draw()
+        """
+        bank = get_question_bank()
+        if bank is None:
+            return
+        used = {id(question) for question in questions}
+        bank.mark_served([row_id for row_id, question in drawn if id(question) in used], self.tenant_id)
+        drawn_ids = {id(question) for _, question in drawn}
+        generated = [question for question in questions if id(question) not in drawn_ids]
+        if generated:
+            bank.add(self.topic, difficulty_level, generated, self.tenant_id)
+    
+    @staticmethod
+    def _quiz_result(questions: List[QuizQuestion], drawn: List[Tuple[int, QuizQuestion]], calls: int,
+                     error: Optional[BaseException]) -> Dict[str, Any]:
+        """
+        Package the merged questions, or raise the batch error if no question could be served.
+        """
+        if not questions and error is not None:
+            raise error
+        drawn_ids = {id(question) for _, question in drawn}
+        return {"questions": [question.as_dict() for question in questions],
+                "quiz": quiz_markdown(questions), "model_calls": calls,
+                "from_bank": sum(id(question) in drawn_ids for question in questions), "prefetched": False}
+    
+    def _prefetch_key(self, difficulty_level: str, focus_areas: str) -> Tuple:
+        """
+        Build the key a prefetched quiz is kept under: the student, model, topic, difficulty and focus areas.
+        """
+        return (
+            self.tenant_id or self.agents.profile_hash(), self.provider, self.model_name,
+            normalize_prompt(self.topic), difficulty_level.casefold(),
+            tuple(normalize_prompt(area) for area in split_focus_areas(focus_areas))
+        )
+    
+    def _take_prefetched(self, difficulty_level: str, focus_areas: str,
+                         num_questions: int) -> "Optional[Future[Dict[str, Any]]]":
+        """
+        Claim the quiz prefetched for a request, finished or still being generated.
+        
+        Returns:
+            Optional[Future]: The quiz's future, or None if nothing was prefetched for it
+        """
+        prefetcher = get_quiz_prefetcher()
+        if prefetcher is None:
+            return None
+        return prefetcher.take(self._prefetch_key(difficulty_level, focus_areas), num_questions)
+    
+    def _prefetched_quiz(self, difficulty_level: str, prefetched: Tuple, num_questions: int) -> Dict[str, Any]:
+        """
+        Cut a prefetched quiz down to the number of questions asked for and record it in the question bank.
+        
+        Only now that the quiz is taken are the bank questions it kept marked as
+        served and its kept generated questions added to the bank.
+        
+        Args:
+            difficulty_level (str): The difficulty level of the quiz
+            prefetched (Tuple): The (questions, drawn, model calls, error) from _assemble_quiz()
+            num_questions (int): Number of questions asked for
+        """
+        questions, drawn, calls, error = prefetched
+        questions = questions[:num_questions]
+        self._bank_store(difficulty_level, questions, drawn)
+        return dict(self._quiz_result(questions, drawn, calls, error), prefetched=True)
+    
+    def _wait_prefetched(self, difficulty_level: str, focus_areas: str,
+                         num_questions: int) -> Optional[Dict[str, Any]]:
+        """
+        Get the quiz prefetched for a request, waiting for it if it is still being generated.
+        
+        Returns:
+            Optional[Dict[str, Any]]: The quiz, or None if nothing was prefetched or the prefetch failed
+        """
+        future = self._take_prefetched(difficulty_level, focus_areas, num_questions)
+        if future is None:
+            return None
+        try:
+            prefetched = future.result()
+        except Exception:
+            # The prefetcher already reported the failure; the quiz is generated now
+            return None
+        return self._prefetched_quiz(difficulty_level, prefetched, num_questions)
+    
+    def _tutoring_prompt(self, student_question: str, context: str) -> str:
+        """
+        Build the tutoring prompt.
+        
+        Args:
+            student_question (str): The student's question
+            context (str): Additional context
             
-            status.update(label="Roadmap created!", state="complete")
+        Returns:
+            str: The formatted prompt
+        """
+        return self._format_prompt(
+            self.config.prompt("tutoring"),
+            student_question=student_question,
+            context=context,
+            knowledge_level=self.knowledge_level
+        )
+    
+    def _rag_prompt(self, question: str, k: int) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Retrieve context for a question and build the RAG prompt.
         
-        return results
+        Args:
+            question (str): The question to ask
+            k (int): Number of relevant chunks to retrieve
+            
+        Returns:
+            tuple: (prompt, None) on success, or (None, message to show the student)
+        """
+        if not self.rag_helper:
+            return None, "No documents have been uploaded yet. Please upload study materials first."
+        
+        # Retrieve relevant context
+        relevant_chunks = self.rag_helper.query_chunks(question, k=k)
+        
+        if not relevant_chunks:
+            return None, "I couldn't find relevant information in your uploaded documents. Please try rephrasing your question or upload more materials."
+        
+        # Merge overlapping chunks, drop near-duplicates and pack the rest into the token budget
+        with self.telemetry.span("context_build"):
+            context = get_context_builder().build(relevant_chunks)
+        self.last_context_stats = context.as_dict()
+        
+        rag_prompt = self._format_prompt(
+            self.config.prompt("rag_query"),
+            question=question,
+            context=context.text
+        )
+        return rag_prompt, None
     
-    def find_resources(self):
+    def _cache_key(self, prompt_type: str, role: str, prompt: str) -> str:
         """
-        Find and recommend learning resources for the topic.
+        Build the response cache key for an agent call.
         
+        Args:
+            prompt_type (str): The prompt type
+            role (str): The agent role
+            prompt (str): The user prompt
+            
         Returns:
-            dict: Resource recommendations
+            str: The cache key
+        """
+        return ResponseCache.make_key(
+            prompt_type, self.provider, self.model_name, ROLE_TEMPERATURES[role],
+            f"{role}:{self.agents.profile_hash()}", prompt
+        )
+    
+    def _run_agent(self, prompt_type: str, role: str, prompt: str, use_cache: bool = True) -> str:
         """
-        results = {}
+        Run an agent, serving and storing the response through the response cache.
         
-        with st.status("Finding learning resources...", expanded=True) as status:
-            status.update(label="Searching for resources...", state="running")
+        Args:
+            prompt_type (str): The prompt type, which selects the cache TTL
+            role (str): The agent role to lease
+            prompt (str): The prompt to send
+            use_cache (bool): Set to False to bypass cached responses (the fresh response is still stored)
             
-            resource_finder = self.agents.resource_finder_agent()
-            resource_prompt = self._format_prompt(
-                self.config["prompts"]["resource_finding"]["base"],
-                topic=self.topic,
-                learning_goal=self.learning_goal,
-                knowledge_level=self.knowledge_level,
-                learning_style=self.learning_style
-            )
+        Returns:
+            str: The response content
+        """
+        with self.telemetry.span("agent_stage", prompt_type=prompt_type):
+            key = self._cache_key(prompt_type, role, prompt)
+            if use_cache:
+                cached = self.response_cache.get(prompt_type, key)
+                if cached is not None:
+                    return cached
+            else:
+                self.response_cache.record_bypass()
+            
+            content = self.agents.run(role, prompt)
+            self.response_cache.put(prompt_type, key, content)
+            return content
+    
+    async def _arun_agent(self, prompt_type: str, role: str, prompt: str, use_cache: bool = True) -> str:
+        """
+        Async counterpart of _run_agent: the model call awaits instead of blocking a thread.
+        
+        Args:
+            prompt_type (str): The prompt type, which selects the cache TTL
+            role (str): The agent role to lease
+            prompt (str): The prompt to send
+            use_cache (bool): Set to False to bypass cached responses (the fresh response is still stored)
             
-            resource_resp = resource_finder.run(resource_prompt, stream=False)
-            resource_result = resource_resp.content
-            results["resources"] = resource_result
-            st.session_state.learning_resources = resource_result
+        Returns:
+            str: The response content
+        """
+        with self.telemetry.span("agent_stage", prompt_type=prompt_type):
+            key = self._cache_key(prompt_type, role, prompt)
+            # The response cache may be SQLite-backed, so it is used off the event loop
+            if use_cache:
+                cached = await asyncio.to_thread(self.response_cache.get, prompt_type, key)
+                if cached is not None:
+                    return cached
+            else:
+                await asyncio.to_thread(self.response_cache.record_bypass)
+            
+            content = await self.agents.arun(role, prompt)
+            await asyncio.to_thread(self.response_cache.put, prompt_type, key, content)
+            return content
+    
+    def _stream_agent(self, prompt_type: str, role: str, prompt: str, use_cache: bool = True) -> Iterator[str]:
+        """
+        Run an agent in streaming mode, yielding content chunks as they arrive.
+        
+        A cached response is yielded as a single chunk. Timing for the run is stored
+        in last_stream_metrics once the stream is exhausted.
+        
+        Args:
+            prompt_type (str): The prompt type, recorded in the metrics and used for caching
+            role (str): The agent role to lease
+            prompt (str): The prompt to send
+            use_cache (bool): Set to False to bypass cached responses (the fresh response is still stored)
+            
+        Yields:
+            str: Content chunks
+        """
+        started = time.perf_counter()
+        key = self._cache_key(prompt_type, role, prompt)
+        if use_cache:
+            cached = self.response_cache.get(prompt_type, key)
+            if cached is not None:
+                self.last_stream_metrics = {
+                    "stage": prompt_type,
+                    "time_to_first_token": time.perf_counter() - started,
+                    "total_time": time.perf_counter() - started,
+                    "chunks": 1,
+                    "cached": True,
+                }
+                yield cached
+                return
+        else:
+            self.response_cache.record_bypass()
+        
+        first_token = None
+        parts = []
+        labels = self.agents.model_labels(role)
+        with self.agents.lease(role) as agent, self.telemetry.span("model_call", **labels):
+            for chunk in agent.run(prompt, stream=True):
+                if not chunk.content:
+                    continue
+                if first_token is None:
+                    first_token = time.perf_counter() - started
+                    self.telemetry.observe("time_to_first_token", first_token, **labels)
+                parts.append(chunk.content)
+                yield chunk.content
+            run_response = getattr(agent, "run_response", None)
+        self.telemetry.record_tokens(run_response.metrics if run_response else None, **labels)
+        self.response_cache.put(prompt_type, key, "".join(parts))
+        self.last_stream_metrics = {
+            "stage": prompt_type,
+            "time_to_first_token": first_token,
+            "total_time": time.perf_counter() - started,
+            "chunks": len(parts),
+            "cached": False,
+        }
+    
+    def _run_roadmap(self, student_analysis: str, use_cache: bool = True) -> str:
+        """
+        Run the roadmap creator agent.
+        
+        Args:
+            student_analysis (str): The student analysis
+            use_cache (bool): Whether a cached roadmap may be returned
             
-            status.update(label="Resources found!", state="complete")
+        Returns:
+            str: The learning roadmap
+        """
+        return self._run_agent(
+            "roadmap_creation", "roadmap_creator", self._roadmap_prompt(student_analysis), use_cache
+        )
+    
+    def _resources_prompt(self) -> str:
+        """
+        Build the resource finding prompt.
         
+        Returns:
+            str: The formatted prompt
+        """
+        return self._format_prompt(
+            self.config.prompt("resource_finding"),
+            topic=self.topic,
+            learning_goal=self.learning_goal,
+            knowledge_level=self.knowledge_level,
+            learning_style=self.learning_style
+        )
+    
+    def _run_resources(self, use_cache: bool = True) -> str:
+        """
+        Run the resource finder agent.
+        
+        Args:
+            use_cache (bool): Whether cached recommendations may be returned
+            
+        Returns:
+            str: The resource recommendations
+        """
+        return self._run_agent("resource_finding", "resource_finder", self._resources_prompt(), use_cache)
+    
+    def _run_stage(self, stage: str, labels: Tuple[str, str], run: Callable[[], Any],
+                   progress: Optional[ProgressCallback]) -> Any:
+        """
+        Run one stage, reporting its start, completion or failure.
+        
+        Args:
+            stage (str): The stage name used in the events
+            labels (Tuple[str, str]): Labels shown while running and once complete
+            run (Callable): Produces the stage's result
+            progress (ProgressCallback): Optional receiver of progress events
+            
+        Returns:
+            Any: The stage's result
+        """
+        emit(progress, stage, labels[0])
+        started = time.perf_counter()
+        try:
+            with self.telemetry.span("handler", method=stage):
+                result = run()
+        except Exception as e:
+            emit(progress, stage, f"{stage.title()} failed", ERROR, message=str(e))
+            raise
+        emit(progress, stage, labels[1], COMPLETE, elapsed=time.perf_counter() - started)
+        return result
+    
+    def analyze_student(self, use_cache: bool = True, progress: Optional[ProgressCallback] = None):
+        """
+        Analyze the student's learning needs and create a profile.
+        
+        Args:
+            use_cache (bool): Whether a cached analysis may be returned
+            progress (ProgressCallback): Optional receiver of progress events
+            
+        Returns:
+            dict: Analysis results
+        """
+        analysis = self._run_stage(
+            "analysis", ("Creating student profile...", "Analysis complete!"),
+            lambda: self._run_analysis(use_cache), progress
+        )
+        return {"analysis": analysis}
+    
+    def create_roadmap(self, student_analysis: str, use_cache: bool = True,
+                       progress: Optional[ProgressCallback] = None):
+        """
+        Create a personalized learning roadmap based on student analysis.
+        
+        Args:
+            student_analysis (str): The student analysis from analyze_student()
+            use_cache (bool): Whether a cached roadmap may be returned
+            progress (ProgressCallback): Optional receiver of progress events
+            
+        Returns:
+            dict: Roadmap results
+        """
+        roadmap = self._run_stage(
+            "roadmap", ("Designing learning path...", "Roadmap created!"),
+            lambda: self._run_roadmap(student_analysis, use_cache), progress
+        )
+        return {"roadmap": roadmap}
+    
+    def find_resources(self, use_cache: bool = True, progress: Optional[ProgressCallback] = None):
+        """
+        Find and recommend learning resources for the topic.
+        
+        Args:
+            use_cache (bool): Whether cached recommendations may be returned
+            progress (ProgressCallback): Optional receiver of progress events
+            
+        Returns:
+            dict: Resource recommendations
+        """
+        resources = self._run_stage(
+            "resources", ("Searching for resources...", "Resources found!"),
+            lambda: self._run_resources(use_cache), progress
+        )
+        return {"resources": resources}
+    
+    def create_learning_plan(self, progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """
+        Run analysis, roadmap and resource finding as a dependency graph.
+        
+        Resource finding only needs the student profile, so it runs alongside the
+        analysis -> roadmap chain and the total latency is that of the longest path.
+        Stages run on worker threads, but progress events are sent from the calling
+        thread as stages finish, so the callback may update a UI directly.
+        
+        Args:
+            progress (ProgressCallback): Optional receiver of progress events
+            
+        Returns:
+            dict: "analysis", "roadmap" and "resources" results plus per-stage "timings" in seconds
+        """
+        stages = {
+            "analysis": ((), self._run_analysis),
+            "roadmap": (("analysis",), self._run_roadmap),
+            "resources": ((), self._run_resources),
+        }
+        timings: Dict[str, float] = {}
+        
+        def run_stage(name, dependencies, fn):
+            inputs = [futures[dependency].result() for dependency in dependencies]
+            started = time.perf_counter()
+            result = fn(*inputs)
+            timings[name] = time.perf_counter() - started
+            return result
+        
+        started = time.perf_counter()
+        futures = {}
+        emit(progress, "plan", "Analyzing needs, designing roadmap and finding resources...")
+        # One worker per stage so a stage waiting on its dependencies never starves another
+        with ThreadPoolExecutor(max_workers=len(stages), thread_name_prefix="plan") as executor:
+            for name, (dependencies, fn) in stages.items():
+                futures[name] = executor.submit(run_stage, name, dependencies, fn)
+            names = {future: name for name, future in futures.items()}
+            for future in as_completed(futures.values()):
+                name = names[future]
+                if future.exception() is not None:
+                    emit(progress, name, f"{name.title()} failed", ERROR, message=str(future.exception()))
+                    raise future.exception()
+                emit(progress, name, f"{name.title()} ready", COMPLETE,
+                     message=f"{name.title()}: {timings[name]:.1f}s", elapsed=timings[name])
+            results = {name: future.result() for name, future in futures.items()}
+        timings["total"] = time.perf_counter() - started
+        self.telemetry.observe("handler", timings["total"], method="learning_plan")
+        emit(progress, "plan", "Learning plan ready!", COMPLETE, elapsed=timings["total"])
+        
+        results["timings"] = timings
         return results
     
     def generate_quiz(self, difficulty_level: str = "intermediate", 
-                     focus_areas: str = "general", num_questions: int = 10):
+                     focus_areas: str = "general", num_questions: int = 10,
+                     progress: Optional[ProgressCallback] = None):
         """
         Generate a quiz to test understanding.
         
@@ -163,31 +768,141 @@ class StudyAssistantHandler:
             difficulty_level (str): The difficulty level of the quiz
             focus_areas (str): Specific areas to focus on
             num_questions (int): Number of questions to generate
+            progress (ProgressCallback): Optional receiver of progress events
             
         Returns:
-            dict: Quiz content
+            dict: Quiz content under "quiz"; a quiz prefetched by prefetch_quizzes() is
+                returned first, and when the question bank is enabled the quiz is assembled
+                from it as by generate_structured_quiz(), with the same keys
         """
-        results = {}
+        if get_question_bank() is not None:
+            # Only the questions the bank lacks are generated
+            return self.generate_structured_quiz(difficulty_level, focus_areas, num_questions, progress=progress)
+        quiz_prompt = self._quiz_prompt(difficulty_level, focus_areas, num_questions)
         
-        with st.status("Generating quiz...", expanded=True) as status:
-            status.update(label="Creating questions...", state="running")
-            
-            quiz_generator = self.agents.quiz_generator_agent()
-            quiz_prompt = self._format_prompt(
-                self.config["prompts"]["quiz_generation"]["base"],
-                topic=self.topic,
-                difficulty_level=difficulty_level,
-                focus_areas=focus_areas,
-                num_questions=num_questions
-            )
+        def run():
+            prefetched = self._wait_prefetched(difficulty_level, focus_areas, num_questions)
+            return prefetched or {"quiz": self._run_agent("quiz_generation", "quiz_generator", quiz_prompt)}
+        
+        return self._run_stage("quiz", ("Creating questions...", "Quiz ready!"), run, progress)
+    
+    def _assemble_quiz(self, difficulty_level: str, focus_areas: str, num_questions: int,
+                       shard_size: Optional[int]) -> Tuple[List[QuizQuestion], List[Tuple[int, QuizQuestion]],
+                                                           int, Optional[BaseException]]:
+        """
+        Run the rounds of parallel batches of a structured quiz on a thread pool, recording nothing in the bank.
+        
+        Returns:
+            Tuple: The merged questions, the (bank id, question) pairs drawn from the
+                bank, the model calls made and the last batch error
+        """
+        targets, shard_size, threshold, top_up_rounds = self._quiz_plan(focus_areas, num_questions, shard_size)
+        drawn = self._bank_draw(difficulty_level, targets)
+        rounds = self._quiz_rounds(difficulty_level, targets, shard_size, threshold, top_up_rounds,
+                                   [question for _, question in drawn])
+        try:
+            batches = next(rounds)
+            while True:
+                with ThreadPoolExecutor(max_workers=len(batches)) as executor:
+                    futures = [
+                        executor.submit(self._run_agent, "quiz_generation", "quiz_generator", prompt)
+                        for _, prompt in batches
+                    ]
+                    responses = []
+                    for future in futures:
+                        try:
+                            responses.append(future.result())
+                        except Exception as e:
+                            responses.append(e)
+                batches = rounds.send(responses)
+        except StopIteration as done:
+            questions, calls, error = done.value
+        return questions, drawn, calls, error
+    
+    def _structured_quiz(self, difficulty_level: str, focus_areas: str, num_questions: int,
+                         shard_size: Optional[int]) -> Dict[str, Any]:
+        """
+        Generate a structured quiz and record it in the question bank.
+        
+        Returns:
+            dict: The quiz, as returned by generate_structured_quiz()
+        """
+        questions, drawn, calls, error = self._assemble_quiz(difficulty_level, focus_areas, num_questions,
+                                                             shard_size)
+        self._bank_store(difficulty_level, questions, drawn)
+        return self._quiz_result(questions, drawn, calls, error)
+    
+    def generate_structured_quiz(self, difficulty_level: str = "intermediate", focus_areas: str = "general",
+                                 num_questions: int = 10, shard_size: Optional[int] = None,
+                                 progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """
+        Generate a quiz of structured multiple-choice questions.
+        
+        The questions are split by focus area into batches of at most
+        shard_size, generated by parallel model calls and merged with
+        duplicates removed, so a long quiz takes about as long as one batch.
+        Questions lost to failed batches or duplicates are asked for again in
+        up to settings.quiz.top_up_rounds more rounds. With the question bank
+        enabled, questions it holds for the topic, difficulty and focus areas
+        that this student has not seen are used first, only the shortfall is
+        generated, and the generated questions are added to the bank.
+        
+        Args:
+            difficulty_level (str): The difficulty level of the quiz
+            focus_areas (str): Focus areas separated by commas
+            num_questions (int): Number of questions to generate
+            shard_size (int): Most questions per model call; None reads settings.quiz.shard_size
+            progress (ProgressCallback): Optional receiver of progress events
             
-            quiz_resp = quiz_generator.run(quiz_prompt, stream=False)
-            quiz_result = quiz_resp.content
-            results["quiz"] = quiz_result
+        Returns:
+            dict: "questions" (stem, options, answer letter, explanation, difficulty and
+                focus_area each), the quiz rendered as markdown under "quiz", "model_calls",
+                "from_bank" (questions taken from the question bank) and "prefetched"
+                (whether it was generated ahead by prefetch_quizzes())
+        """
+        return self._run_stage(
+            "quiz", ("Creating questions...", "Quiz ready!"),
+            lambda: (self._wait_prefetched(difficulty_level, focus_areas, num_questions)
+                     or self._structured_quiz(difficulty_level, focus_areas, num_questions, shard_size)),
+            progress
+        )
+    
+    def prefetch_quizzes(self, roadmap: str) -> List[str]:
+        """
+        Start generating quizzes for the first modules of a roadmap in the background.
+        
+        Each quiz is a structured quiz on one module, at the difficulty that
+        suits the student's knowledge level, with settings.quiz_prefetch.num_questions
+        questions. A later request for that quiz (or fewer of its questions)
+        from this student gets it without waiting for the model; the
+        prefetcher's stats record how many prefetched quizzes were used.
+        
+        Args:
+            roadmap (str): The learning roadmap from create_roadmap()
             
-            status.update(label="Quiz ready!", state="complete")
+        Returns:
+            List[str]: The modules whose quizzes were scheduled
+        """
+        prefetcher = get_quiz_prefetcher()
+        if prefetcher is None:
+            return []
+        settings = self.config.setting("quiz_prefetch")
+        difficulty_level = quiz_difficulty(self.knowledge_level)
+        num_questions = settings.get("num_questions", 10)
         
-        return results
+        def generate(module):
+            # Nothing is recorded in the question bank until the quiz is taken
+            with self.telemetry.span("handler", method="quiz_prefetch"):
+                questions, drawn, calls, error = self._assemble_quiz(difficulty_level, module, num_questions, None)
+            if not questions and error is not None:
+                raise error
+            return questions, drawn, calls, error
+        
+        return [
+            module for module in roadmap_modules(roadmap, settings.get("modules", 2))
+            if prefetcher.submit(self._prefetch_key(difficulty_level, module), num_questions,
+                                 lambda module=module: generate(module))
+        ]
     
     def get_tutoring(self, student_question: str, context: str = ""):
         """
@@ -200,25 +915,241 @@ class StudyAssistantHandler:
         Returns:
             str: Tutoring response
         """
-        tutor = self.agents.tutor_agent()
-        tutor_prompt = self._format_prompt(
-            self.config["prompts"]["tutoring"]["base"],
-            student_question=student_question,
-            context=context,
-            knowledge_level=self.knowledge_level
+        tutor_prompt = self._tutoring_prompt(student_question, context)
+        
+        return self._run_agent("tutoring", "tutor", tutor_prompt)
+    
+    def stream_roadmap(self, student_analysis: str, use_cache: bool = True) -> Iterator[str]:
+        """
+        Stream a personalized learning roadmap as it is generated.
+        
+        Args:
+            student_analysis (str): The student analysis from analyze_student()
+            use_cache (bool): Whether a cached roadmap may be returned
+            
+        Yields:
+            str: Roadmap content chunks
+        """
+        yield from self._stream_agent(
+            "roadmap_creation", "roadmap_creator", self._roadmap_prompt(student_analysis), use_cache
         )
+    
+    def stream_quiz(self, difficulty_level: str = "intermediate", 
+                    focus_areas: str = "general", num_questions: int = 10) -> Iterator[str]:
+        """
+        Stream a quiz as it is generated.
+        
+        Args:
+            difficulty_level (str): The difficulty level of the quiz
+            focus_areas (str): Specific areas to focus on
+            num_questions (int): Number of questions to generate
+            
+        Yields:
+            str: Quiz content chunks; a prefetched quiz, or with the question bank enabled
+                the quiz assembled from it, comes as one chunk
+        """
+        started = time.perf_counter()
+        quiz = self._wait_prefetched(difficulty_level, focus_areas, num_questions)
+        if quiz is None and get_question_bank() is not None:
+            # Only the questions the bank lacks are generated
+            quiz = self._structured_quiz(difficulty_level, focus_areas, num_questions, None)
+        if quiz is not None:
+            self.last_stream_metrics = {
+                "stage": "quiz_generation",
+                "time_to_first_token": time.perf_counter() - started,
+                "total_time": time.perf_counter() - started,
+                "chunks": 1,
+                "cached": quiz["prefetched"] or quiz["from_bank"] == len(quiz["questions"]),
+            }
+            yield quiz["quiz"]
+            return
+        quiz_prompt = self._quiz_prompt(difficulty_level, focus_areas, num_questions)
+        yield from self._stream_agent("quiz_generation", "quiz_generator", quiz_prompt)
+    
+    def stream_tutoring(self, student_question: str, context: str = "") -> Iterator[str]:
+        """
+        Stream tutoring help on a specific question.
         
-        tutor_resp = tutor.run(tutor_prompt, stream=False)
-        return tutor_resp.content
+        Args:
+            student_question (str): The student's question
+            context (str): Additional context
+            
+        Yields:
+            str: Tutoring response chunks
+        """
+        yield from self._stream_agent("tutoring", "tutor", self._tutoring_prompt(student_question, context))
+    
+    async def arun_analysis(self, use_cache: bool = True) -> str:
+        """
+        Analyze the student's learning needs without blocking the event loop.
+        
+        Args:
+            use_cache (bool): Whether a cached analysis may be returned
+            
+        Returns:
+            str: The student analysis
+        """
+        return await self._arun_agent("student_analysis", "student_analyzer", self._analysis_prompt(), use_cache)
+    
+    async def arun_roadmap(self, student_analysis: str, use_cache: bool = True) -> str:
+        """
+        Create a learning roadmap without blocking the event loop.
+        
+        Args:
+            student_analysis (str): The student analysis
+            use_cache (bool): Whether a cached roadmap may be returned
+            
+        Returns:
+            str: The learning roadmap
+        """
+        return await self._arun_agent(
+            "roadmap_creation", "roadmap_creator", self._roadmap_prompt(student_analysis), use_cache
+        )
+    
+    async def arun_resources(self, use_cache: bool = True) -> str:
+        """
+        Find learning resources without blocking the event loop.
+        
+        Args:
+            use_cache (bool): Whether cached recommendations may be returned
+            
+        Returns:
+            str: The resource recommendations
+        """
+        return await self._arun_agent("resource_finding", "resource_finder", self._resources_prompt(), use_cache)
+    
+    async def arun_learning_plan(self, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Run analysis, roadmap and resource finding without blocking the event loop.
+        
+        Like create_learning_plan(), resource finding runs alongside the
+        analysis -> roadmap chain.
+        
+        Args:
+            use_cache (bool): Whether cached results may be returned
+            
+        Returns:
+            dict: "analysis", "roadmap" and "resources" results plus per-stage "timings" in seconds
+        """
+        timings: Dict[str, float] = {}
+        
+        async def timed(name, stage):
+            started = time.perf_counter()
+            result = await stage
+            timings[name] = time.perf_counter() - started
+            return result
+        
+        async def analysis_and_roadmap():
+            analysis = await timed("analysis", self.arun_analysis(use_cache))
+            return analysis, await timed("roadmap", self.arun_roadmap(analysis, use_cache))
+        
+        started = time.perf_counter()
+        (analysis, roadmap), resources = await asyncio.gather(
+            analysis_and_roadmap(), timed("resources", self.arun_resources(use_cache))
+        )
+        timings["total"] = time.perf_counter() - started
+        self.telemetry.observe("handler", timings["total"], method="learning_plan")
+        return {"analysis": analysis, "roadmap": roadmap, "resources": resources, "timings": timings}
+    
+    async def arun_quiz(self, difficulty_level: str = "intermediate",
+                        focus_areas: str = "general", num_questions: int = 10) -> str:
+        """
+        Generate a quiz without blocking the event loop.
+        
+        Args:
+            difficulty_level (str): The difficulty level of the quiz
+            focus_areas (str): Specific areas to focus on
+            num_questions (int): Number of questions to generate
+            
+        Returns:
+            str: Quiz content; with the question bank enabled, the markdown of the quiz
+                arun_structured_quiz() assembles from it
+        """
+        if get_question_bank() is not None:
+            # Only the questions the bank lacks are generated
+            return (await self.arun_structured_quiz(difficulty_level, focus_areas, num_questions))["quiz"]
+        quiz_prompt = self._quiz_prompt(difficulty_level, focus_areas, num_questions)
+        return await self._arun_agent("quiz_generation", "quiz_generator", quiz_prompt)
+    
+    async def arun_structured_quiz(self, difficulty_level: str = "intermediate", focus_areas: str = "general",
+                                   num_questions: int = 10, shard_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Generate a structured quiz without blocking the event loop; see generate_structured_quiz().
+        
+        Args:
+            difficulty_level (str): The difficulty level of the quiz
+            focus_areas (str): Focus areas separated by commas
+            num_questions (int): Number of questions to generate
+            shard_size (int): Most questions per model call; None reads settings.quiz.shard_size
+            
+        Returns:
+            dict: "questions", "quiz" (markdown), "model_calls", "from_bank" and "prefetched"
+        """
+        future = self._take_prefetched(difficulty_level, focus_areas, num_questions)
+        if future is not None:
+            try:
+                prefetched = await asyncio.wrap_future(future)
+            except Exception:
+                # The prefetcher already reported the failure; the quiz is generated now
+                prefetched = None
+            if prefetched is not None:
+                return await asyncio.to_thread(self._prefetched_quiz, difficulty_level, prefetched, num_questions)
+        with self.telemetry.span("handler", method="quiz"):
+            targets, shard_size, threshold, top_up_rounds = self._quiz_plan(focus_areas, num_questions, shard_size)
+            drawn = await asyncio.to_thread(self._bank_draw, difficulty_level, targets)
+            rounds = self._quiz_rounds(difficulty_level, targets, shard_size, threshold, top_up_rounds,
+                                       [question for _, question in drawn])
+            try:
+                batches = next(rounds)
+                while True:
+                    responses = await asyncio.gather(
+                        *(self._arun_agent("quiz_generation", "quiz_generator", prompt) for _, prompt in batches),
+                        return_exceptions=True
+                    )
+                    batches = rounds.send(list(responses))
+            except StopIteration as done:
+                questions, calls, error = done.value
+            await asyncio.to_thread(self._bank_store, difficulty_level, questions, drawn)
+            return self._quiz_result(questions, drawn, calls, error)
+    
+    async def arun_tutoring(self, student_question: str, context: str = "") -> str:
+        """
+        Get tutoring help on a question without blocking the event loop.
+        
+        Args:
+            student_question (str): The student's question
+            context (str): Additional context
+            
+        Returns:
+            str: Tutoring response
+        """
+        return await self._arun_agent("tutoring", "tutor", self._tutoring_prompt(student_question, context))
+    
+    @property
+    def rag_helper(self) -> Optional[RAGHelper]:
+        """
+        The RAG helper of this handler's tenant, or None before initialize_rag().
+        
+        Tenant helpers are looked up on every access, which keeps the tenant's collection
+        marked as in use and transparently recreates it after an idle eviction.
+        """
+        if not self._rag_initialized:
+            return None
+        if self.tenant_id is None:
+            return self._rag_helper
+        return get_tenant_collections().get(self.tenant_id)
     
     def initialize_rag(self, collection_name: str = "study_materials"):
         """
         Initialize RAG helper for document-based learning.
         
         Args:
-            collection_name (str): Name for the document collection
+            collection_name (str): Name for the document collection when the handler has no tenant;
+                tenant collections are named from settings.tenants.base_collection
         """
-        self.rag_helper = RAGHelper(collection_name=collection_name)
+        if self.tenant_id is None:
+            self._rag_helper = RAGHelper(collection_name=collection_name)
+        self._rag_initialized = True
     
     def add_document_to_rag(self, file_path: str, file_type: str = "pdf") -> bool:
         """
@@ -240,6 +1171,137 @@ class StudyAssistantHandler:
             return self.rag_helper.load_text(file_path)
         return False
     
+    def add_documents_to_rag(self, files: List[Tuple[str, str]]) -> Dict[str, bool]:
+        """
+        Add several documents to the RAG knowledge base, ingesting them in parallel.
+        
+        Args:
+            files (List[Tuple[str, str]]): (file_path, file_type) pairs, file_type being "pdf" or "text"
+            
+        Returns:
+            Dict[str, bool]: Success status per file path
+        """
+        if not self.rag_helper:
+            self.initialize_rag()
+        
+        return self.rag_helper.load_files(files)
+    
+    def add_document_streams_to_rag(self, files: List[Tuple[str, BinaryIO, str]]) -> Dict[str, bool]:
+        """
+        Add uploaded documents to the RAG knowledge base straight from memory, ingesting them in parallel.
+        
+        PDFs are read page by page and chunks are embedded in rolling batches, so no
+        temp file is written and the full text of a document is never held at once.
+        
+        Args:
+            files (List[Tuple[str, BinaryIO, str]]): (name, seekable binary stream, file_type) triples,
+                file_type being "pdf" or "text"
+                
+        Returns:
+            Dict[str, bool]: Success status per name
+        """
+        if not self.rag_helper:
+            self.initialize_rag()
+        
+        return self.rag_helper.load_streams(files)
+    
+    def submit_documents(self, files: List[Tuple[str, BinaryIO, str]]) -> List[str]:
+        """
+        Queue uploaded documents for ingestion on background workers and return immediately.
+        
+        Job ids are derived from the collection, name and content, so submitting the same
+        upload again (e.g. on a rerun) returns the existing job instead of ingesting twice.
+        
+        Args:
+            files (List[Tuple[str, BinaryIO, str]]): (name, seekable binary stream, file_type) triples,
+                file_type being "pdf" or "text"; streams must stay alive until their job finishes
+                
+        Returns:
+            List[str]: One job id per file, in order
+        """
+        if not self.rag_helper:
+            self.initialize_rag()
+        
+        helper = self.rag_helper
+        queue = get_ingestion_queue()
+        job_ids = []
+        for name, stream, file_type in files:
+            file_hash = stream_sha256(stream)
+            
+            def work(progress, name=name, stream=stream, file_type=file_type, file_hash=file_hash):
+                return helper.ingest_stream(name, stream, file_type, file_hash, progress)
+            
+            job = queue.submit(make_job_id(helper.collection_name, name, file_hash),
+                               helper.collection_name, name, work)
+            job_ids.append(job.job_id)
+        return job_ids
+    
+    def get_ingestion_jobs(self, job_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get the status of background ingestion jobs.
+        
+        Args:
+            job_ids (List[str]): Ids returned by submit_documents()
+            
+        Returns:
+            List[Dict[str, Any]]: Per known job: status (queued, running, done, failed or cancelled),
+                pages parsed, chunks embedded, chunks reused and any error
+        """
+        queue = get_ingestion_queue()
+        jobs = [queue.get(job_id) for job_id in job_ids]
+        return [job.as_dict() for job in jobs if job is not None]
+    
+    def cancel_ingestion(self, job_id: str) -> bool:
+        """
+        Cancel a background ingestion job; chunks it already wrote are removed.
+        
+        Args:
+            job_id (str): Id returned by submit_documents()
+            
+        Returns:
+            bool: True if the job was still queued or running
+        """
+        return get_ingestion_queue().cancel(job_id)
+    
+    def get_ingest_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Get throughput of the most recent document ingestion.
+        
+        Returns:
+            Optional[Dict[str, Any]]: Files, chunks, batches, elapsed seconds and chunks/sec
+        """
+        if not self.rag_helper or not self.rag_helper.last_ingest_stats:
+            return None
+        return self.rag_helper.last_ingest_stats.as_dict()
+    
+    def _semantic_answer(self, question: str, k: int) -> Tuple[Optional[str], Callable[[str], None]]:
+        """
+        Look up an answer to a similar earlier question about the same documents.
+        
+        Args:
+            question (str): The question to ask
+            k (int): Number of relevant chunks to retrieve
+            
+        Returns:
+            tuple: (cached answer or None, function that stores a fresh answer for this question)
+        """
+        cache = get_semantic_cache()
+        helper = self.rag_helper
+        if cache is None or not helper or not helper.get_document_count():
+            return None, lambda answer: None
+        
+        # Answers are only reused for the same documents, model and tutor persona
+        collection = (helper.persist_directory, helper.collection_name)
+        version = helper.collection_version
+        scope = (collection, version, self.provider, self.model_name, self.agents.profile_hash(), k)
+        embedding = helper.embed_query(question)
+        
+        def remember(answer: str):
+            cache.put(scope, embedding, answer,
+                      supersedes=lambda other: other[0] == collection and other[1] != version)
+        
+        return cache.get(scope, embedding), remember
+    
     def query_documents(self, question: str, k: int = 4):
         """
         Query the uploaded documents using RAG.
@@ -251,28 +1313,80 @@ class StudyAssistantHandler:
         Returns:
             str: Answer based on documents
         """
-        if not self.rag_helper:
-            return "No documents have been uploaded yet. Please upload study materials first."
-        
-        # Retrieve relevant context
-        relevant_docs = self.rag_helper.query(question, k=k)
+        with self.telemetry.span("handler", method="query_documents"):
+            cached, remember = self._semantic_answer(question, k)
+            if cached is not None:
+                return cached
+            
+            rag_prompt, fallback = self._rag_prompt(question, k)
+            if rag_prompt is None:
+                return fallback
+            
+            # Use RAG tutor agent
+            answer = self._run_agent("rag_query", "rag_tutor", rag_prompt)
+            remember(answer)
+            return answer
+    
+    async def aquery_documents(self, question: str, k: int = 4) -> str:
+        """
+        Query the uploaded documents using RAG without blocking the event loop.
         
-        if not relevant_docs:
-            return "I couldn't find relevant information in your uploaded documents. Please try rephrasing your question or upload more materials."
+        Retrieval and the semantic cache lookup run on a worker thread; the model call is awaited.
         
-        # Combine context
-        context = "\n\n".join(relevant_docs)
+        Args:
+            question (str): The question to ask
+            k (int): Number of relevant chunks to retrieve
+            
+        Returns:
+            str: Answer based on documents
+        """
+        with self.telemetry.span("handler", method="query_documents"):
+            cached, remember = await asyncio.to_thread(self._semantic_answer, question, k)
+            if cached is not None:
+                return cached
+            
+            rag_prompt, fallback = await asyncio.to_thread(self._rag_prompt, question, k)
+            if rag_prompt is None:
+                return fallback
+            
+            answer = await self._arun_agent("rag_query", "rag_tutor", rag_prompt)
+            remember(answer)
+            return answer
+    
+    def stream_documents(self, question: str, k: int = 4) -> Iterator[str]:
+        """
+        Stream an answer from the uploaded documents using RAG.
         
-        # Use RAG tutor agent
-        rag_tutor = self.agents.rag_tutor_agent()
-        rag_prompt = self._format_prompt(
-            self.config["prompts"]["rag_query"]["base"],
-            question=question,
-            context=context
-        )
+        Args:
+            question (str): The question to ask
+            k (int): Number of relevant chunks to retrieve
+            
+        Yields:
+            str: Answer content chunks
+        """
+        started = time.perf_counter()
+        cached, remember = self._semantic_answer(question, k)
+        if cached is not None:
+            self.last_context_stats = {}
+            self.last_stream_metrics = {
+                "stage": "rag_query",
+                "time_to_first_token": time.perf_counter() - started,
+                "total_time": time.perf_counter() - started,
+                "chunks": 1,
+                "cached": True,
+            }
+            yield cached
+            return
         
-        rag_resp = rag_tutor.run(rag_prompt, stream=False)
-        return rag_resp.content
+        rag_prompt, fallback = self._rag_prompt(question, k)
+        if rag_prompt is None:
+            yield fallback
+            return
+        parts = []
+        for part in self._stream_agent("rag_query", "rag_tutor", rag_prompt):
+            parts.append(part)
+            yield part
+        remember("".join(parts))
     
     def get_document_count(self) -> int:
         """
@@ -285,6 +1399,67 @@ class StudyAssistantHandler:
             return 0
         return self.rag_helper.get_document_count()
     
+    def get_document_quota(self) -> Optional[int]:
+        """
+        Get the maximum number of chunks this handler's collection may hold.
+        
+        Returns:
+            Optional[int]: The chunk quota, or None if unlimited
+        """
+        if not self.rag_helper:
+            return None
+        return self.rag_helper.max_chunks
+    
+    def get_semantic_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Get hit/miss counters of the semantic answer cache.
+        
+        Returns:
+            Optional[Dict[str, Any]]: Hits, misses, stores, evictions, entries and hit rate, or None if disabled
+        """
+        cache = get_semantic_cache()
+        return cache.stats() if cache else None
+    
+    def get_question_bank_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Get counters of the quiz question bank.
+        
+        Returns:
+            Optional[Dict[str, Any]]: Questions served, shortfall, stored, duplicates, questions held
+                and hit rate, or None if disabled
+        """
+        bank = get_question_bank()
+        return bank.stats() if bank else None
+    
+    def get_quiz_prefetch_stats(self) -> Optional[Dict[str, Any]]:
+        """
+        Get counters of background quiz prefetching.
+        
+        Returns:
+            Optional[Dict[str, Any]]: Quizzes scheduled, skipped, pending, completed, failed and used,
+                misses and usage rate, or None if disabled
+        """
+        prefetcher = get_quiz_prefetcher()
+        return prefetcher.stats() if prefetcher else None
+    
+    def get_provider_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get queue depth and retry counters of the model providers.
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: In-flight, queued, request, retry, rate-limited and failure counts per provider
+        """
+        return provider_metrics()
+    
+    def get_telemetry(self) -> Dict[str, Any]:
+        """
+        Get the recorded spans and counters of this process.
+        
+        Returns:
+            Dict[str, Any]: Span timings and counters (see Telemetry.snapshot())
+        """
+        return self.telemetry.snapshot()
+    
     def clear_documents(self) -> bool:
         """
         Clear all documents from the RAG knowledge base.
@@ -292,6 +1467,9 @@ class StudyAssistantHandler:
         Returns:
             bool: Success status
         """
-        if not self.rag_helper:
+        helper = self.rag_helper
+        if not helper:
             return False
-        return self.rag_helper.clear_database()
+        # Stop pending uploads and let the same files be ingested again later
+        get_ingestion_queue().forget(helper.collection_name)
+        return helper.clear_database()
@@ -0,0 +1,97 @@
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional
+
+
+class AgentPool:
+    """
+    Keyed pool of reusable agent instances with LRU eviction.
+    
+    Each key holds a small free-list of idle agents. An agent is checked out
+    for the duration of one run, so concurrent callers never share an
+    instance, and returned to the free-list afterwards.
+    """
+    
+    def __init__(self, max_keys: int = 256, max_idle_per_key: int = 4):
+        """
+        Initialize the pool.
+        
+        Args:
+            max_keys (int): Maximum number of distinct keys kept before the least recently used is evicted
+            max_idle_per_key (int): Maximum idle agents retained per key
+        """
+        self.max_keys = max_keys
+        self.max_idle_per_key = max_idle_per_key
+        self._idle: "OrderedDict[Hashable, List[Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def _checkout(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                self._idle.move_to_end(key)
+                self.hits += 1
+                return idle.pop()
+            self.misses += 1
+            return None
+    
+    def _checkin(self, key: Hashable, agent: Any):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            self._idle.move_to_end(key)
+            if len(idle) < self.max_idle_per_key:
+                idle.append(agent)
+            while len(self._idle) > self.max_keys:
+                self._idle.popitem(last=False)
+                self.evictions += 1
+    
+    @contextmanager
+    def acquire(self, key: Hashable, factory: Callable[[], Any],
+                reset: Optional[Callable[[Any], None]] = None) -> Iterator[Any]:
+        """
+        Check out an agent for a key, building one with the factory on a miss.
+        
+        Args:
+            key (Hashable): The pool key identifying interchangeable agents
+            factory (Callable): Builds a new agent when no idle one is available
+            reset (Callable): Optional hook that clears per-run state before the agent is reused
+            
+        Yields:
+            Any: The checked-out agent
+        """
+        agent = self._checkout(key)
+        if agent is None:
+            agent = factory()
+        # An exception raised by the caller propagates out of the yield, so an
+        # agent left mid-run is dropped rather than returned to the pool
+        yield agent
+        if reset is not None:
+            reset(agent)
+        self._checkin(key, agent)
+    
+    def clear(self):
+        """
+        Drop every idle agent.
+        """
+        with self._lock:
+            self._idle.clear()
+    
+    def stats(self) -> Dict[str, int]:
+        """
+        Get pool counters.
+        
+        Returns:
+            Dict[str, int]: Hits, misses, evictions and current key/idle counts
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "keys": len(self._idle),
+                "idle": sum(len(idle) for idle in self._idle.values()),
+            }
@@ -0,0 +1,295 @@
+import asyncio
+import io
+from typing import Any, Dict, List, Optional
+
+import httpx
+from dotenv import load_dotenv
+from fastapi import FastAPI, File, Header, HTTPException, Query, UploadFile
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, Field, field_validator
+
+from agent_handler import StudyAssistantHandler
+from config import ConfigManager, get_config, option_key
+from ingest_jobs import IngestionJob, get_ingestion_queue
+from providers import known_providers
+from telemetry import get_telemetry
+from tenants import get_tenant_collections
+
+# Load environment variables
+load_dotenv()
+
+# Uploads are read this much at a time, so the size limit is enforced while reading
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+app = FastAPI(
+    title="Study Assistant API",
+    description="Headless access to the study assistant's agents and document Q&A",
+)
+
+
+def _option(value: str, options: List[str], kind: str) -> str:
+    key = option_key(value, options)
+    if key is None:
+        raise ValueError(f"Unknown {kind} {value!r}; expected one of {', '.join(options)}")
+    return key
+
+
+class StudentProfile(BaseModel):
+    topic: str
+    # Matched to the prompts.yaml keys, so "Reading/Writing" becomes "reading_writing"
+    subject_category: str = "programming"
+    knowledge_level: str = "beginner"
+    learning_goal: str = ""
+    time_available: str = "1-2 hours per week"
+    learning_style: str = "visual"
+    model_name: str = "gpt-4o"
+    provider: str = "openai"
+    
+    @field_validator("subject_category")
+    @classmethod
+    def _subject_category(cls, value: str) -> str:
+        return _option(value, ConfigManager().get_all_subject_categories(), "subject category")
+    
+    @field_validator("knowledge_level")
+    @classmethod
+    def _knowledge_level(cls, value: str) -> str:
+        return _option(value, ConfigManager().get_all_knowledge_levels(), "knowledge level")
+    
+    @field_validator("learning_style")
+    @classmethod
+    def _learning_style(cls, value: str) -> str:
+        return _option(value, ConfigManager().get_all_learning_styles(), "learning style")
+    
+    @field_validator("provider")
+    @classmethod
+    def _provider(cls, value: str) -> str:
+        return _option(value, known_providers(), "provider")
+
+
+class StageRequest(BaseModel):
+    profile: StudentProfile
+    use_cache: bool = True
+
+
+class RoadmapRequest(StageRequest):
+    # Runs the analysis first when omitted
+    student_analysis: Optional[str] = None
+
+
+class QuizRequest(BaseModel):
+    profile: StudentProfile
+    difficulty_level: str = "intermediate"
+    focus_areas: str = "general"
+    num_questions: int = Field(10, ge=1, le=50)
+    # JSON questions generated in parallel batches by focus area, instead of one markdown quiz
+    structured: bool = False
+
+
+class TutorRequest(BaseModel):
+    profile: StudentProfile
+    question: str
+    context: str = ""
+
+
+class DocumentQuery(BaseModel):
+    profile: StudentProfile
+    question: str
+    k: int = Field(4, ge=1, le=20)
+
+
+def _handler(profile: StudentProfile, tenant_id: Optional[str] = None) -> StudyAssistantHandler:
+    """
+    Build a handler for one request. Agents, caches and tenant collections are
+    process-wide, so this is cheap.
+    """
+    return StudyAssistantHandler(
+        topic=profile.topic,
+        subject_category=profile.subject_category,
+        knowledge_level=profile.knowledge_level,
+        learning_goal=profile.learning_goal,
+        time_available=profile.time_available,
+        learning_style=profile.learning_style,
+        model_name=profile.model_name,
+        provider=profile.provider,
+        tenant_id=tenant_id,
+    )
+
+
+def _require_tenant(tenant_id: Optional[str]) -> str:
+    if not tenant_id:
+        raise HTTPException(status_code=400, detail="The X-Tenant-ID header is required for document endpoints")
+    return tenant_id
+
+
+def _document_handler(tenant_id: Optional[str], profile: Optional[StudentProfile] = None) -> StudyAssistantHandler:
+    """
+    Build a handler bound to a tenant's document collection.
+    
+    Opening the collection can touch Chroma, so async endpoints call this through asyncio.to_thread.
+    """
+    handler = _handler(profile or StudentProfile(topic=""), _require_tenant(tenant_id))
+    handler.initialize_rag()
+    return handler
+
+
+@app.exception_handler(httpx.HTTPError)
+async def provider_error(request, exc: httpx.HTTPError):
+    # The provider gateway already retried; report the upstream failure as such
+    return JSONResponse(status_code=502, content={"detail": f"Model provider error: {exc}"})
+
+
+@app.get("/health")
+async def health() -> Dict[str, str]:
+    return {"status": "ok"}
+
+
+@app.post("/analyze")
+async def analyze(request: StageRequest) -> Dict[str, str]:
+    analysis = await _handler(request.profile).arun_analysis(request.use_cache)
+    return {"analysis": analysis}
+
+
+@app.post("/roadmap")
+async def roadmap(request: RoadmapRequest) -> Dict[str, str]:
+    handler = _handler(request.profile)
+    analysis = request.student_analysis or await handler.arun_analysis(request.use_cache)
+    return {"analysis": analysis, "roadmap": await handler.arun_roadmap(analysis, request.use_cache)}
+
+
+@app.post("/resources")
+async def resources(request: StageRequest) -> Dict[str, str]:
+    return {"resources": await _handler(request.profile).arun_resources(request.use_cache)}
+
+
+@app.post("/plan")
+async def plan(request: StageRequest) -> Dict[str, Any]:
+    # Resource finding only needs the profile, so it runs alongside the analysis -> roadmap chain
+    return await _handler(request.profile).arun_learning_plan(request.use_cache)
+
+
+@app.post("/quiz")
+async def quiz(request: QuizRequest, x_tenant_id: Optional[str] = Header(None)) -> Dict[str, Any]:
+    # The tenant id identifies the student to the question bank, which does not serve them a question twice
+    handler = _handler(request.profile, x_tenant_id)
+    if request.structured:
+        return await handler.arun_structured_quiz(request.difficulty_level, request.focus_areas, request.num_questions)
+    return {"quiz": await handler.arun_quiz(request.difficulty_level, request.focus_areas, request.num_questions)}
+
+
+@app.post("/tutor")
+async def tutor(request: TutorRequest) -> Dict[str, str]:
+    return {"answer": await _handler(request.profile).arun_tutoring(request.question, request.context)}
+
+
+@app.post("/rag/documents")
+async def upload_documents(files: List[UploadFile] = File(...),
+                           x_tenant_id: Optional[str] = Header(None)) -> Dict[str, Any]:
+    """
+    Queue documents for background ingestion into the tenant's collection.
+    
+    Poll GET /rag/jobs with the returned ids for progress.
+    """
+    handler = await asyncio.to_thread(_document_handler, x_tenant_id)
+    max_bytes = get_config().setting("api").get("max_upload_mb", 50) * 1024 * 1024
+    uploads = []
+    for upload in files:
+        too_large = HTTPException(status_code=413, detail=f"{upload.filename} is larger than {max_bytes} bytes")
+        if upload.size is not None and upload.size > max_bytes:
+            raise too_large
+        # Held in memory like Streamlit uploads, never written to disk; read in chunks so an
+        # oversized file is rejected once the limit is passed rather than after reading it whole
+        content = io.BytesIO()
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            if content.tell() + len(chunk) > max_bytes:
+                raise too_large
+            content.write(chunk)
+        content.seek(0)
+        file_type = "pdf" if (upload.filename or "").lower().endswith(".pdf") else "text"
+        uploads.append((upload.filename, content, file_type))
+    # Hashing large uploads is CPU work, keep it off the event loop
+    job_ids = await asyncio.to_thread(handler.submit_documents, uploads)
+    return {"job_ids": job_ids}
+
+
+def _tenant_jobs(tenant_id: Optional[str], job_ids: List[str]) -> List[Optional[IngestionJob]]:
+    """
+    Get ingestion jobs, None for those that are unknown or write to another tenant's collection.
+    
+    Looking up the tenant's collections can touch Chroma, so async endpoints call this through asyncio.to_thread.
+    """
+    collection = get_tenant_collections().collection_name(_require_tenant(tenant_id))
+    jobs = [get_ingestion_queue().get(job_id) for job_id in job_ids]
+    # RAGHelper appends the embedding namespace to the tenant's collection name
+    return [
+        job if job is not None and (job.collection == collection or job.collection.startswith(f"{collection}_"))
+        else None
+        for job in jobs
+    ]
+
+
+@app.get("/rag/jobs")
+async def ingestion_jobs(ids: List[str] = Query(...), x_tenant_id: Optional[str] = Header(None)) -> Dict[str, Any]:
+    # Jobs of other tenants are left out like unknown ids
+    jobs = await asyncio.to_thread(_tenant_jobs, x_tenant_id, ids)
+    return {"jobs": [job.as_dict() for job in jobs if job is not None]}
+
+
+@app.delete("/rag/jobs/{job_id}")
+async def cancel_ingestion_job(job_id: str, x_tenant_id: Optional[str] = Header(None)) -> Dict[str, bool]:
+    if (await asyncio.to_thread(_tenant_jobs, x_tenant_id, [job_id]))[0] is None:
+        raise HTTPException(status_code=404, detail=f"No ingestion job {job_id}")
+    return {"cancelled": get_ingestion_queue().cancel(job_id)}
+
+
+@app.post("/rag/query")
+async def query_documents(request: DocumentQuery, x_tenant_id: Optional[str] = Header(None)) -> Dict[str, Any]:
+    handler = await asyncio.to_thread(_document_handler, x_tenant_id, request.profile)
+    answer = await handler.aquery_documents(request.question, request.k)
+    return {"answer": answer, "context": handler.last_context_stats}
+
+
+@app.get("/rag/documents")
+async def document_count(x_tenant_id: Optional[str] = Header(None)) -> Dict[str, Any]:
+    handler = await asyncio.to_thread(_document_handler, x_tenant_id)
+    count = await asyncio.to_thread(handler.get_document_count)
+    return {"chunks": count, "quota": await asyncio.to_thread(handler.get_document_quota)}
+
+
+@app.delete("/rag/documents")
+async def clear_documents(x_tenant_id: Optional[str] = Header(None)) -> Dict[str, bool]:
+    handler = await asyncio.to_thread(_document_handler, x_tenant_id)
+    return {"cleared": await asyncio.to_thread(handler.clear_documents)}
+
+
+@app.get("/metrics")
+async def metrics() -> Dict[str, Any]:
+    handler = _handler(StudentProfile(topic=""))
+    return {
+        "providers": handler.get_provider_metrics(),
+        "response_cache": handler.response_cache.stats(),
+        "semantic_cache": handler.get_semantic_cache_stats(),
+        "question_bank": handler.get_question_bank_stats(),
+        "quiz_prefetch": handler.get_quiz_prefetch_stats(),
+        "ingestion_jobs": get_ingestion_queue().stats(),
+        "telemetry": handler.get_telemetry(),
+    }
+
+
+@app.get("/metrics/prometheus", response_class=PlainTextResponse)
+async def prometheus_metrics() -> PlainTextResponse:
+    return PlainTextResponse(get_telemetry().prometheus_text(), media_type="text/plain; version=0.0.4")
+
+
+if __name__ == "__main__":
+    import uvicorn
+    
+    settings = get_config().setting("api")
+    uvicorn.run(
+        "api:app",
+        host=settings.get("host", "0.0.0.0"),
+        port=settings.get("port", 8000),
+        workers=settings.get("workers", 1),
+    )
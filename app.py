@@ -2,7 +2,9 @@ import streamlit as st
 from dotenv import load_dotenv
 from agent_handler import StudyAssistantHandler
 from config import ConfigManager
-import os
+from quiz_prefetch import quiz_difficulty
+import json
+import uuid
 
 # Load environment variables
 load_dotenv()
@@ -15,6 +17,39 @@ st.markdown("Personalized learning with AI agents - Analysis, Roadmaps, Quizzes
 # Initialize config manager
 config_manager = ConfigManager()
 
+def show_stream_metrics():
+    """
+    Show latency of the answer that was just streamed.
+    """
+    metrics = st.session_state.handler.last_stream_metrics
+    if metrics.get("cached"):
+        st.caption(f"⚡ Answered from cache in {metrics['total_time']:.2f}s")
+    elif metrics.get("time_to_first_token") is not None:
+        st.caption(f"⚡ First token in {metrics['time_to_first_token']:.2f}s, complete in {metrics['total_time']:.1f}s")
+
+def status_progress(status):
+    """
+    Adapt handler progress events to an st.status container.
+    
+    Args:
+        status: The container returned by st.status()
+        
+    Returns:
+        ProgressCallback: Callback to pass to the handler
+    """
+    running = set()
+    
+    def on_progress(event):
+        # A stage finishing inside a larger operation must not tick the whole status
+        if event.state == "running":
+            running.add(event.stage)
+        else:
+            running.discard(event.stage)
+        status.update(label=event.label, state="running" if running and event.state == "complete" else event.state)
+        if event.message:
+            status.write(event.message)
+    return on_progress
+
 # Sidebar configuration
 with st.sidebar:
     st.header("⚙️ Configuration")
@@ -73,6 +108,9 @@ if "learning_resources" not in st.session_state:
     st.session_state.learning_resources = None
 if "handler" not in st.session_state:
     st.session_state.handler = None
+if "session_id" not in st.session_state:
+    # Scopes uploaded documents to this browser session
+    st.session_state.session_id = uuid.uuid4().hex
 if "uploaded_files_count" not in st.session_state:
     st.session_state.uploaded_files_count = 0
 
@@ -187,22 +225,20 @@ elif st.session_state.step == 3:
             time_available=st.session_state.time_available,
             learning_style=st.session_state.learning_style,
             model_name=selected_model,
-            provider=provider
+            provider=provider,
+            tenant_id=st.session_state.session_id
         )
     
-    # Analyze student
-    if not st.session_state.student_analysis:
-        analysis_results = st.session_state.handler.analyze_student()
-    
-    # Create roadmap
-    if st.session_state.student_analysis and not st.session_state.learning_roadmap:
-        roadmap_results = st.session_state.handler.create_roadmap(
-            st.session_state.student_analysis
-        )
-    
-    # Find resources
-    if st.session_state.learning_roadmap and not st.session_state.learning_resources:
-        resource_results = st.session_state.handler.find_resources()
+    # Analysis -> roadmap runs alongside resource finding
+    if not (st.session_state.student_analysis and 
+            st.session_state.learning_roadmap and 
+            st.session_state.learning_resources):
+        with st.status("Creating your personalized learning plan...", expanded=True) as status:
+            plan = st.session_state.handler.create_learning_plan(progress=status_progress(status))
+            st.session_state.student_analysis = plan["analysis"]
+            st.session_state.learning_roadmap = plan["roadmap"]
+            st.session_state.learning_resources = plan["resources"]
+            st.session_state.plan_timings = plan["timings"]
     
     # Move to dashboard when complete
     if (st.session_state.student_analysis and 
@@ -215,6 +251,12 @@ elif st.session_state.step == 3:
 elif st.session_state.step == 4:
     st.header("🎯 Your Learning Dashboard")
     
+    # Quizzes on the first roadmap modules are generated in the background while the student reads
+    if "prefetched_quiz_modules" not in st.session_state:
+        st.session_state.prefetched_quiz_modules = st.session_state.handler.prefetch_quizzes(
+            st.session_state.learning_roadmap
+        )
+    
     # Create tabs for different features
     tab1, tab2, tab3, tab4, tab5 = st.tabs([
         "📋 Learning Roadmap", 
@@ -232,14 +274,15 @@ elif st.session_state.step == 4:
         with col1:
             st.info(f"**Topic:** {st.session_state.topic} | **Level:** {st.session_state.knowledge_level.title()}")
         with col2:
-            if st.button("🔄 Regenerate Roadmap"):
-                st.session_state.learning_roadmap = None
-                roadmap_results = st.session_state.handler.create_roadmap(
-                    st.session_state.student_analysis
-                )
-                st.rerun()
+            regenerate_roadmap = st.button("🔄 Regenerate Roadmap")
         
-        st.markdown(st.session_state.learning_roadmap)
+        if regenerate_roadmap:
+            st.session_state.learning_roadmap = st.write_stream(
+                st.session_state.handler.stream_roadmap(st.session_state.student_analysis, use_cache=False)
+            )
+            show_stream_metrics()
+        else:
+            st.markdown(st.session_state.learning_roadmap)
         
         with st.expander("📊 View Student Analysis"):
             st.markdown(st.session_state.student_analysis)
@@ -256,8 +299,11 @@ elif st.session_state.step == 4:
         st.subheader("Recommended Learning Resources")
         
         if st.button("🔄 Find New Resources"):
-            st.session_state.learning_resources = None
-            resource_results = st.session_state.handler.find_resources()
+            with st.status("Finding learning resources...", expanded=True) as status:
+                resource_results = st.session_state.handler.find_resources(
+                    use_cache=False, progress=status_progress(status)
+                )
+            st.session_state.learning_resources = resource_results["resources"]
             st.rerun()
         
         st.markdown(st.session_state.learning_resources)
@@ -273,32 +319,64 @@ elif st.session_state.step == 4:
     with tab3:
         st.subheader("Generate Practice Quizzes")
         
+        prefetched_modules = st.session_state.prefetched_quiz_modules
+        if prefetched_modules:
+            st.caption(f"⚡ Quizzes prepared in the background for: {', '.join(prefetched_modules)}")
+        
         col1, col2, col3 = st.columns(3)
         with col1:
+            difficulties = ["beginner", "intermediate", "advanced"]
             difficulty = st.selectbox(
                 "Difficulty Level",
-                ["beginner", "intermediate", "advanced"],
-                index=1
+                difficulties,
+                index=difficulties.index(quiz_difficulty(st.session_state.knowledge_level))
             )
         with col2:
             num_questions = st.slider("Number of Questions", 5, 20, 10)
         with col3:
             focus_areas = st.text_input(
                 "Focus Areas (optional)",
+                value=prefetched_modules[0] if prefetched_modules else "",
                 placeholder="e.g., loops, functions"
             )
         
+        structured = st.checkbox(
+            "Structured questions",
+            # The question bank holds structured questions, so default to them while it is enabled
+            value=st.session_state.handler.get_question_bank_stats() is not None,
+            help="Multiple-choice questions, taken from the question bank when it has ones you have not "
+                 "seen and otherwise generated in parallel batches per focus area; downloadable as JSON"
+        )
+        
+        quiz_streamed = False
         if st.button("🎲 Generate Quiz", type="primary"):
-            with st.spinner("Generating quiz..."):
-                quiz_results = st.session_state.handler.generate_quiz(
-                    difficulty_level=difficulty,
-                    focus_areas=focus_areas if focus_areas else "general",
-                    num_questions=num_questions
-                )
+            if structured:
+                with st.status("Generating quiz...", expanded=False) as status:
+                    quiz_results = st.session_state.handler.generate_structured_quiz(
+                        difficulty_level=difficulty,
+                        focus_areas=focus_areas if focus_areas else "general",
+                        num_questions=num_questions,
+                        progress=status_progress(status)
+                    )
                 st.session_state.current_quiz = quiz_results["quiz"]
+                st.session_state.quiz_questions = quiz_results["questions"]
+                if len(quiz_results["questions"]) < num_questions:
+                    st.warning(f"Only {len(quiz_results['questions'])} of {num_questions} questions could be generated.")
+            else:
+                st.session_state.current_quiz = st.write_stream(
+                    st.session_state.handler.stream_quiz(
+                        difficulty_level=difficulty,
+                        focus_areas=focus_areas if focus_areas else "general",
+                        num_questions=num_questions
+                    )
+                )
+                st.session_state.quiz_questions = None
+                quiz_streamed = True
+                show_stream_metrics()
         
         if "current_quiz" in st.session_state and st.session_state.current_quiz:
-            st.markdown(st.session_state.current_quiz)
+            if not quiz_streamed:
+                st.markdown(st.session_state.current_quiz)
             
             st.download_button(
                 label="📥 Download Quiz",
@@ -306,6 +384,14 @@ elif st.session_state.step == 4:
                 file_name=f"quiz_{st.session_state.topic.replace(' ', '_')}.md",
                 mime="text/markdown"
             )
+            
+            if st.session_state.get("quiz_questions"):
+                st.download_button(
+                    label="📥 Download Questions (JSON)",
+                    data=json.dumps(st.session_state.quiz_questions, indent=2),
+                    file_name=f"quiz_{st.session_state.topic.replace(' ', '_')}.json",
+                    mime="application/json"
+                )
     
     # Tab 4: AI Tutor
     with tab4:
@@ -324,11 +410,12 @@ elif st.session_state.step == 4:
         )
         
         if st.button("💬 Ask Tutor", type="primary", disabled=not question):
-            with st.spinner("Thinking..."):
-                response = st.session_state.handler.get_tutoring(question, context)
-                st.session_state.tutor_response = response
-        
-        if "tutor_response" in st.session_state and st.session_state.tutor_response:
+            st.markdown("### 🤖 Tutor Response:")
+            st.session_state.tutor_response = st.write_stream(
+                st.session_state.handler.stream_tutoring(question, context)
+            )
+            show_stream_metrics()
+        elif "tutor_response" in st.session_state and st.session_state.tutor_response:
             st.markdown("### 🤖 Tutor Response:")
             st.markdown(st.session_state.tutor_response)
     
@@ -350,6 +437,9 @@ elif st.session_state.step == 4:
             if st.session_state.handler:
                 doc_count = st.session_state.handler.get_document_count()
                 st.metric("Documents Loaded", doc_count)
+                quota = st.session_state.handler.get_document_quota()
+                if quota:
+                    st.caption(f"{doc_count} / {quota} chunks used")
                 
                 if doc_count > 0 and st.button("🗑️ Clear All Documents"):
                     st.session_state.handler.clear_documents()
@@ -357,27 +447,45 @@ elif st.session_state.step == 4:
                     st.success("Documents cleared!")
                     st.rerun()
         
-        # Process uploaded files
+        # Queue uploads for background ingestion; on a rerun the same uploads map to the same jobs
         if uploaded_files:
-            for uploaded_file in uploaded_files:
-                # Save file temporarily
-                temp_path = f"./temp_{uploaded_file.name}"
-                with open(temp_path, "wb") as f:
-                    f.write(uploaded_file.getbuffer())
-                
-                # Add to RAG
-                file_type = "pdf" if uploaded_file.name.endswith(".pdf") else "text"
-                success = st.session_state.handler.add_document_to_rag(temp_path, file_type)
-                
-                if success:
-                    st.success(f"✅ Loaded: {uploaded_file.name}")
-                    st.session_state.uploaded_files_count += 1
+            st.session_state.ingest_jobs = st.session_state.handler.submit_documents([
+                (uploaded_file.name, uploaded_file, "pdf" if uploaded_file.name.endswith(".pdf") else "text")
+                for uploaded_file in uploaded_files
+            ])
+        
+        job_ids = st.session_state.get("ingest_jobs", [])
+        jobs_pending = st.session_state.handler is not None and any(
+            not job["finished_at"] for job in st.session_state.handler.get_ingestion_jobs(job_ids)
+        )
+        
+        # Only this panel refreshes while uploads are ingested; the rest of the page stays usable
+        @st.fragment(run_every=1 if jobs_pending else None)
+        def show_ingestion_jobs():
+            jobs = st.session_state.handler.get_ingestion_jobs(job_ids)
+            for job in jobs:
+                if job["status"] in ("queued", "running"):
+                    col_status, col_cancel = st.columns([4, 1])
+                    col_status.info(
+                        f"⏳ {job['source']}: {job['status']} - {job['pages']} pages parsed, "
+                        f"{job['chunks']} chunks embedded, {job['reused']} reused"
+                    )
+                    if col_cancel.button("Cancel", key=f"cancel_{job['job_id']}"):
+                        st.session_state.handler.cancel_ingestion(job["job_id"])
+                elif job["status"] == "done":
+                    st.success(f"✅ Loaded: {job['source']} ({job['chunks']} new chunks, {job['reused']} reused)")
+                elif job["status"] == "cancelled":
+                    st.warning(f"Cancelled: {job['source']}")
                 else:
-                    st.error(f"❌ Failed to load: {uploaded_file.name}")
-                
-                # Clean up temp file
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
+                    st.error(f"❌ Failed to load: {job['source']} ({job['error']})")
+            
+            if jobs_pending and all(job["finished_at"] for job in jobs):
+                st.session_state.uploaded_files_count = sum(job["status"] == "done" for job in jobs)
+                # Refresh the document count and the question section
+                st.rerun()
+        
+        if st.session_state.handler and job_ids:
+            show_ingestion_jobs()
         
         st.divider()
         
@@ -393,11 +501,18 @@ elif st.session_state.step == 4:
             )
             
             if st.button("🔍 Search Documents", type="primary", disabled=not doc_question):
-                with st.spinner("Searching documents..."):
-                    answer = st.session_state.handler.query_documents(doc_question)
-                    st.session_state.rag_answer = answer
-            
-            if "rag_answer" in st.session_state and st.session_state.rag_answer:
+                st.markdown("### 📖 Answer from Your Documents:")
+                st.session_state.rag_answer = st.write_stream(
+                    st.session_state.handler.stream_documents(doc_question)
+                )
+                show_stream_metrics()
+                context_stats = st.session_state.handler.last_context_stats
+                if context_stats:
+                    st.caption(
+                        f"📎 Context: {context_stats['tokens']} tokens from {context_stats['chunks']} passages "
+                        f"({context_stats['tokens_saved']} tokens saved by merging and deduplication)"
+                    )
+            elif "rag_answer" in st.session_state and st.session_state.rag_answer:
                 st.markdown("### 📖 Answer from Your Documents:")
                 st.markdown(st.session_state.rag_answer)
         else:
@@ -0,0 +1,353 @@
+"""
+Batch learning plans for a whole cohort.
+
+Reads student profiles from a CSV or JSONL file and runs analysis -> roadmap
+alongside resource finding for each, with a bounded number of profiles in
+flight. Identical profiles are generated once and their results reused.
+Results are appended to a JSONL file as they finish, one line per input row,
+and that file doubles as the checkpoint: running again with the same output
+skips the rows it already holds and retries the ones that failed.
+
+Usage:
+    python batch.py profiles.csv plans.jsonl [--concurrency 8] [--provider openai] [--model gpt-4o]
+"""
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from dotenv import load_dotenv
+
+from agent_handler import StudyAssistantHandler
+from config import get_config, option_key
+from progress import COMPLETE, ERROR, ProgressCallback, emit
+from providers import known_providers
+
+PROFILE_FIELDS = {
+    "topic": "",
+    "subject_category": "programming",
+    "knowledge_level": "beginner",
+    "learning_goal": "",
+    "time_available": "1-2 hours per week",
+    "learning_style": "visual",
+}
+
+# Fields whose values must be keys of a prompts.yaml section
+OPTION_FIELDS = {
+    "subject_category": "subject_categories",
+    "knowledge_level": "knowledge_levels",
+    "learning_style": "learning_styles",
+}
+
+# Short column names accepted in input files
+FIELD_ALIASES = {
+    "category": "subject_category",
+    "level": "knowledge_level",
+    "goal": "learning_goal",
+    "time": "time_available",
+    "style": "learning_style",
+}
+
+ID_FIELDS = ("student_id", "id", "email")
+
+
+def read_profiles(path: str) -> Iterator[Dict[str, str]]:
+    """
+    Read student profiles from a CSV (with a header row) or JSONL file.
+    
+    Args:
+        path (str): The input file; ".jsonl" and ".json" are read as JSON lines, anything else as CSV
+        
+    Yields:
+        dict: The raw fields of each row
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.lower().endswith((".jsonl", ".json")):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+
+def normalize_profile(row: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Map a raw input row onto the handler's profile fields.
+    
+    Args:
+        row (dict): A row from read_profiles()
+        
+    Returns:
+        dict: The profile, with defaults for missing fields and choices such as
+            "Reading/Writing" mapped to their prompts.yaml keys ("reading_writing")
+    """
+    profile = dict(PROFILE_FIELDS)
+    for name, value in row.items():
+        field = FIELD_ALIASES.get(name.strip().lower(), name.strip().lower())
+        if field in profile and value is not None and str(value).strip():
+            profile[field] = " ".join(str(value).split())
+    config = get_config()
+    for field, section in OPTION_FIELDS.items():
+        # Unknown values are kept as entered for profile_errors() to report
+        profile[field] = option_key(profile[field], list(config.get(section, {}))) or profile[field]
+    return profile
+
+
+def profile_errors(profile: Dict[str, str]) -> List[str]:
+    """
+    Check a normalized profile before generating its plan.
+    
+    Args:
+        profile (dict): A profile from normalize_profile()
+        
+    Returns:
+        List[str]: What is wrong with it (empty if it can be generated)
+    """
+    errors = [] if profile["topic"] else ["missing topic"]
+    config = get_config()
+    for field, section in OPTION_FIELDS.items():
+        if profile[field] not in config.get(section, {}):
+            errors.append(f"unknown {field.replace('_', ' ')} {profile[field]!r}")
+    return errors
+
+
+def profile_key(profile: Dict[str, str], model_name: str, provider: str) -> str:
+    """
+    Build the dedupe key of a profile.
+    
+    Profiles that only differ in case or whitespace get the same plan.
+    
+    Args:
+        profile (dict): A normalized profile
+        model_name (str): The model the plan is generated with
+        provider (str): The provider the plan is generated with
+        
+    Returns:
+        str: A hex key
+    """
+    parts = [provider, model_name] + [profile[field].casefold() for field in PROFILE_FIELDS]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()[:24]
+
+
+class BatchStats:
+    """
+    Counters for one batch run.
+    """
+    
+    def __init__(self):
+        self.rows = 0
+        self.resumed = 0
+        self.generated = 0
+        self.reused = 0
+        self.failed = 0
+        self.elapsed = 0.0
+    
+    @property
+    def completed(self) -> int:
+        return self.generated + self.reused
+    
+    @property
+    def profiles_per_minute(self) -> float:
+        return self.completed * 60 / self.elapsed if self.elapsed else 0.0
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "resumed": self.resumed,
+            "generated": self.generated,
+            "reused": self.reused,
+            "failed": self.failed,
+            "elapsed": self.elapsed,
+            "profiles_per_minute": self.profiles_per_minute,
+        }
+
+
+class CohortRunner:
+    """
+    Generates learning plans for many profiles with bounded concurrency.
+    
+    Every model call still goes through the provider gateways, so their
+    concurrency caps and rate limits apply across all profiles in flight.
+    """
+    
+    def __init__(self, model_name: str = "gpt-4o", provider: str = "openai",
+                 concurrency: Optional[int] = None, use_cache: bool = True):
+        """
+        Initialize the runner.
+        
+        Args:
+            model_name (str): The model to use
+            provider (str): The AI provider ("openai", "groq" or the offline "fake")
+            concurrency (int): Profiles generated at the same time; None reads settings.batch.concurrency
+            use_cache (bool): Whether cached analyses, roadmaps and resources may be returned
+        """
+        self.model_name = model_name
+        self.provider = provider
+        self.concurrency = concurrency or get_config().setting("batch").get("concurrency", 8)
+        self.use_cache = use_cache
+    
+    def _load_checkpoint(self, output_path: str, keys: Dict[int, str]) -> Dict[int, Dict[str, Any]]:
+        """
+        Read the results an earlier run already wrote and drop the rest.
+        
+        Failed rows, and rows whose profile changed in the input since, are
+        removed from the file so that it ends up with one line per row.
+        
+        Args:
+            output_path (str): The JSONL output of the earlier run
+            keys (dict): Dedupe key of every input row, by row number
+            
+        Returns:
+            dict: The kept records by row number
+        """
+        if not os.path.exists(output_path):
+            return {}
+        done = {}
+        with open(output_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A line cut short when the earlier run was killed
+                    continue
+                row = record.get("row")
+                if "error" not in record and keys.get(row) == record.get("profile_key"):
+                    done[row] = record
+        temp_path = output_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for row in sorted(done):
+                f.write(json.dumps(done[row]) + "\n")
+        os.replace(temp_path, output_path)
+        return done
+    
+    async def _generate(self, profile: Dict[str, str], semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        async with semaphore:
+            handler = StudyAssistantHandler(model_name=self.model_name, provider=self.provider, **profile)
+            return await handler.arun_learning_plan(self.use_cache)
+    
+    async def run(self, rows: List[Dict[str, Any]], output_path: str,
+                  progress: Optional[ProgressCallback] = None) -> BatchStats:
+        """
+        Generate plans for all rows, appending each result to the output as it finishes.
+        
+        Lines are written in completion order; each carries its input row number.
+        
+        Args:
+            rows (list): Raw input rows, e.g. from read_profiles()
+            output_path (str): JSONL file to write, and to resume from if it exists
+            progress (ProgressCallback): Optional receiver of one event per finished row
+            
+        Returns:
+            BatchStats: Counters and throughput of this run
+        """
+        stats = BatchStats()
+        stats.rows = len(rows)
+        profiles = {row: normalize_profile(raw) for row, raw in enumerate(rows, start=1)}
+        keys = {row: profile_key(profile, self.model_name, self.provider) for row, profile in profiles.items()}
+        done = self._load_checkpoint(output_path, keys)
+        stats.resumed = len(done)
+        # Results of earlier runs serve duplicates of their profiles too
+        known = {record["profile_key"]: record for record in done.values()}
+        
+        semaphore = asyncio.Semaphore(self.concurrency)
+        plans: Dict[str, asyncio.Future] = {}
+        
+        async def finish(row):
+            raw, profile, key = rows[row - 1], profiles[row], keys[row]
+            record = {"row": row, "profile_key": key, "profile": profile}
+            for field in ID_FIELDS:
+                if raw.get(field):
+                    record["student_id"] = str(raw[field])
+                    break
+            errors = profile_errors(profile)
+            if errors:
+                record["error"] = "; ".join(errors)
+                return record
+            if key in known:
+                record["reused"] = True
+                record.update({name: known[key][name] for name in ("analysis", "roadmap", "resources")})
+                return record
+            # The first row with a profile generates it, later ones wait for its result
+            record["reused"] = key in plans
+            if key not in plans:
+                plans[key] = asyncio.ensure_future(self._generate(profile, semaphore))
+            try:
+                record.update(await asyncio.shield(plans[key]))
+            except Exception as e:
+                record["error"] = str(e) or type(e).__name__
+            return record
+        
+        started = time.perf_counter()
+        with open(output_path, "a", encoding="utf-8") as out:
+            pending = [finish(row) for row in profiles if row not in done]
+            for finished, next_record in enumerate(asyncio.as_completed(pending), start=1):
+                record = await next_record
+                # Flushed per line so a killed run loses at most the plans in flight
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                if "error" in record:
+                    stats.failed += 1
+                elif record["reused"]:
+                    stats.reused += 1
+                else:
+                    stats.generated += 1
+                emit(progress, "batch", f"{finished}/{len(pending)} rows",
+                     ERROR if "error" in record else COMPLETE,
+                     message=f"row {record['row']}: {record.get('error', 'reused' if record.get('reused') else 'ok')}",
+                     elapsed=time.perf_counter() - started)
+        stats.elapsed = time.perf_counter() - started
+        return stats
+
+
+def run_cohort(input_path: str, output_path: str, model_name: str = "gpt-4o", provider: str = "openai",
+               concurrency: Optional[int] = None, use_cache: bool = True,
+               progress: Optional[ProgressCallback] = None) -> BatchStats:
+    """
+    Generate learning plans for every profile in a CSV or JSONL file.
+    
+    Args:
+        input_path (str): The profiles file
+        output_path (str): JSONL file to write, and to resume from if it exists
+        model_name (str): The model to use
+        provider (str): The AI provider ("openai", "groq" or the offline "fake")
+        concurrency (int): Profiles generated at the same time; None reads settings.batch.concurrency
+        use_cache (bool): Whether cached results may be returned
+        progress (ProgressCallback): Optional receiver of one event per finished row
+        
+    Returns:
+        BatchStats: Counters and throughput of the run
+    """
+    runner = CohortRunner(model_name, provider, concurrency, use_cache)
+    return asyncio.run(runner.run(list(read_profiles(input_path)), output_path, progress))
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Generate learning plans for a cohort of students.")
+    parser.add_argument("input", help="CSV or JSONL file of student profiles")
+    parser.add_argument("output", help="JSONL file of results; an existing one is resumed")
+    parser.add_argument("--provider", default="openai", choices=known_providers())
+    parser.add_argument("--model", default="gpt-4o")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="profiles generated at the same time (default: settings.batch.concurrency)")
+    parser.add_argument("--no-cache", action="store_true", help="regenerate instead of reusing cached responses")
+    args = parser.parse_args()
+    
+    def report(event):
+        print(f"[{event.label}] {event.message} ({event.elapsed:.0f}s)", file=sys.stderr)
+    
+    stats = run_cohort(args.input, args.output, args.model, args.provider, args.concurrency,
+                       not args.no_cache, report)
+    print(f"{stats.rows} rows: {stats.resumed} resumed, {stats.generated} generated, "
+          f"{stats.reused} reused, {stats.failed} failed in {stats.elapsed:.1f}s "
+          f"({stats.profiles_per_minute:.1f} profiles/min)")
+    return 1 if stats.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""
+Benchmark: per-request agent setup time with and without the AgentPool.
+
+A fake agent stands in for phi's Agent + Groq/OpenAIChat model. Building it
+costs a simulated connection handshake, which is what the pool amortizes.
+
+Usage:
+    python benchmarks/bench_agent_pool.py [requests] [handshake_ms]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent_pool import AgentPool  # noqa: E402
+
+
+class FakeModel:
+    def __init__(self, handshake_s):
+        time.sleep(handshake_s)  # new HTTP client + TLS handshake
+        self.history = []
+    
+    def run(self, prompt):
+        self.history.append(prompt)
+        return prompt[::-1]
+
+
+def reset(agent):
+    agent.history.clear()
+
+
+def run_requests(requests, handshake_s, pool=None):
+    roles = ("student_analyzer", "roadmap_creator", "tutor")
+    setup = 0.0
+    for i in range(requests):
+        key = (roles[i % len(roles)], "fake", "fake-model", 0.7, "profile")
+        start = time.perf_counter()
+        if pool is None:
+            agent = FakeModel(handshake_s)
+            setup += time.perf_counter() - start
+            agent.run("question")
+        else:
+            with pool.acquire(key, lambda: FakeModel(handshake_s), reset=reset) as agent:
+                setup += time.perf_counter() - start
+                agent.run("question")
+    return setup / requests
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    handshake_s = (float(sys.argv[2]) if len(sys.argv) > 2 else 5.0) / 1000
+    
+    unpooled = run_requests(requests, handshake_s)
+    pool = AgentPool()
+    pooled = run_requests(requests, handshake_s, pool)
+    
+    print(f"requests={requests} simulated handshake={handshake_s * 1000:.1f} ms")
+    print(f"no pool   setup/request={unpooled * 1000:8.3f} ms")
+    print(f"pooled    setup/request={pooled * 1000:8.3f} ms  {pool.stats()}")
+
+
+if __name__ == "__main__":
+    main()
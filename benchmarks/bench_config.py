@@ -0,0 +1,85 @@
+"""
+Micro-benchmark: YAML parses and prompt-building latency per user action.
+
+"Before" replays what one analyze_student() call used to do: the handler,
+StudyAgents.__init__ and the agent factory each parsed prompts.yaml from
+disk. "After" goes through the shared ConfigSnapshot.
+
+Usage:
+    python benchmarks/bench_config.py [iterations]
+"""
+import os
+import sys
+import time
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+
+PROFILE = dict(
+    topic="Python for Data Science",
+    subject_category="programming",
+    knowledge_level="beginner",
+    learning_goal="Build a portfolio project",
+    time_available="3-5 hours per week",
+    learning_style="visual",
+)
+
+_real_safe_load = yaml.safe_load
+parse_calls = 0
+
+
+def counting_safe_load(stream):
+    global parse_calls
+    parse_calls += 1
+    return _real_safe_load(stream)
+
+
+def legacy_request():
+    def load():
+        with open(config.CONFIG_PATH, "r") as file:
+            return yaml.safe_load(file)
+    
+    handler_config = load()
+    personas = load().get("personas", {})
+    style_info = load().get("learning_styles", {}).get(PROFILE["learning_style"], {})
+    system_prompt = personas.get("student_analyzer", {}).get("system_prompt", "")
+    system_prompt += style_info.get("description", "")
+    return handler_config["prompts"]["student_analysis"]["base"].format(**PROFILE)
+
+
+def snapshot_request():
+    snapshot = config.get_config()
+    personas = config.get_config().personas
+    style_block = config.get_config().style_block(PROFILE["learning_style"])
+    system_prompt = personas.get("student_analyzer", {}).get("system_prompt", "")
+    system_prompt += style_block.description
+    return snapshot.prompt("student_analysis").format(**PROFILE)
+
+
+def measure(fn, iterations):
+    global parse_calls
+    parse_calls = 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = time.perf_counter() - start
+    return parse_calls, elapsed / iterations
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    yaml.safe_load = counting_safe_load
+    assert legacy_request() == snapshot_request()
+    
+    for label, fn in (("before (per-call parse)", legacy_request),
+                      ("after (shared snapshot)", snapshot_request)):
+        parses, per_request = measure(fn, iterations)
+        print(f"{label:<26} parses/request={parses / iterations:6.3f} "
+              f"latency/request={per_request * 1e6:10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark: the full study flow for N concurrent simulated users, offline.
+
+Every user runs analyze -> roadmap -> resources -> quiz -> tutor -> document
+Q&A against the in-process "fake" provider (fake_llm.py), so the SDK,
+provider gateway, agents, caches and RAG all run as in production while no
+request leaves the machine. The run uses a temporary copy of prompts.yaml
+with response and semantic caching off, local hashing embeddings and a
+throwaway vector store. Reports p50/p95/p99 latency per step and per flow,
+plus throughput.
+
+Usage:
+    python benchmarks/bench_e2e.py [users] [flows_per_user] [latency_ms] [tokens_per_second]
+"""
+import asyncio
+import io
+import math
+import os
+import sys
+import tempfile
+import time
+
+import yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+STEPS = ("analysis", "roadmap", "resources", "quiz", "tutor", "rag", "flow")
+
+NOTES = (
+    "Eigenvectors of a matrix keep their direction under the linear map; the eigenvalue is the "
+    "factor by which they are scaled. A basis of eigenvectors diagonalizes the matrix. "
+) * 40
+
+
+def write_config(workdir, latency_s, tokens_per_second):
+    """
+    Copy prompts.yaml with settings for an offline, uncached run.
+    """
+    with open(os.path.join(ROOT, "prompts.yaml"), "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+    settings = data.setdefault("settings", {})
+    providers = settings.setdefault("providers", {})
+    providers["fake"] = dict(providers.get("fake") or {}, latency_seconds=latency_s,
+                             tokens_per_second=tokens_per_second, max_concurrency=256)
+    settings["response_cache"] = dict(settings.get("response_cache") or {},
+                                      path=os.path.join(workdir, "responses.sqlite3"), ttl_seconds={})
+    settings["semantic_cache"] = {"enabled": False}
+    settings["rag"] = dict(settings.get("rag") or {}, embedding_backend="hashing", parse_workers=0)
+    settings["tenants"] = dict(settings.get("tenants") or {}, persist_directory=os.path.join(workdir, "chroma"))
+    path = os.path.join(workdir, "prompts.yaml")
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(data, f, allow_unicode=True)
+    return path
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+async def simulate_user(user, flows, timings):
+    from agent_handler import StudyAssistantHandler
+    
+    handler = StudyAssistantHandler(
+        topic=f"Linear algebra {user}", subject_category="mathematics", knowledge_level="beginner",
+        learning_goal="Pass the exam", time_available="3-5 hours per week", learning_style="visual",
+        model_name="fake-model", provider="fake", tenant_id=f"bench-user-{user}",
+    )
+    handler.initialize_rag()
+    await asyncio.to_thread(handler.add_document_streams_to_rag,
+                            [(f"notes-{user}.txt", io.BytesIO(NOTES.encode("utf-8")), "text")])
+    
+    async def timed(step, call):
+        started = time.perf_counter()
+        result = await call
+        timings[step].append(time.perf_counter() - started)
+        return result
+    
+    for flow in range(flows):
+        started = time.perf_counter()
+        analysis = await timed("analysis", handler.arun_analysis(use_cache=False))
+        await timed("roadmap", handler.arun_roadmap(analysis, use_cache=False))
+        await timed("resources", handler.arun_resources(use_cache=False))
+        await timed("quiz", handler.arun_quiz("intermediate", f"round {flow}", 5))
+        await timed("tutor", handler.arun_tutoring(f"What is an eigenvalue? ({flow})"))
+        await timed("rag", handler.aquery_documents(f"How do eigenvectors scale? ({flow})"))
+        timings["flow"].append(time.perf_counter() - started)
+
+
+async def run(users, flows):
+    timings = {step: [] for step in STEPS}
+    started = time.perf_counter()
+    await asyncio.gather(*(simulate_user(user, flows, timings) for user in range(users)))
+    return timings, time.perf_counter() - started
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    flows = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    latency_s = (float(sys.argv[3]) if len(sys.argv) > 3 else 200.0) / 1000
+    tokens_per_second = float(sys.argv[4]) if len(sys.argv) > 4 else 0.0
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        # Must be set before the first import of the app's modules
+        os.environ["STUDY_ASSISTANT_CONFIG"] = write_config(workdir, latency_s, tokens_per_second)
+        from providers import get_provider
+        
+        timings, elapsed = asyncio.run(run(users, flows))
+        
+        print(f"{users} users x {flows} flows, fake model latency {latency_s * 1000:.0f} ms, "
+              f"{tokens_per_second or 'instant'} tokens/s")
+        print(f"{'step':<10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'count':>6}")
+        for step in STEPS:
+            values = timings[step]
+            print(f"{step:<10} {percentile(values, 50) * 1000:9.1f} {percentile(values, 95) * 1000:9.1f} "
+                  f"{percentile(values, 99) * 1000:9.1f} {len(values):6d}")
+        metrics = get_provider("fake").metrics()
+        print(f"throughput {len(timings['flow']) / elapsed:.2f} flows/s, {metrics['requests'] / elapsed:.1f} "
+              f"model calls/s over {elapsed:.1f}s   avg gateway wait {metrics['avg_wait_seconds'] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark: ingest and query latency per embedding backend.
+
+For each available backend, embeds a synthetic corpus in batches (ingest)
+and then runs embed_query + brute-force cosine top-k over the stored
+vectors (query). The hashing backend always runs; sentence_transformers
+runs when the package is installed and openai when OPENAI_API_KEY is set.
+
+Usage:
+    python benchmarks/bench_embeddings.py [chunks] [queries] [backend ...]
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embeddings import EMBEDDING_BACKENDS, get_embeddings  # noqa: E402
+
+WORDS = ("photosynthesis chlorophyll mitochondria enzyme protein derivative integral "
+         "matrix eigenvalue recursion pointer closure inflation supply demand grammar").split()
+
+
+def corpus(count, seed=7):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(120)) for _ in range(count)]
+
+
+def available_backends():
+    backends = ["hashing"]
+    try:
+        import sentence_transformers  # noqa: F401
+        backends.append("sentence_transformers")
+    except ImportError:
+        pass
+    if os.environ.get("OPENAI_API_KEY"):
+        backends.append("openai")
+    return backends
+
+
+def bench(backend, texts, queries, batch_size=64, k=4):
+    embedder = get_embeddings(backend)
+    
+    started = time.perf_counter()
+    vectors = []
+    for i in range(0, len(texts), batch_size):
+        vectors.extend(embedder.embed_documents(texts[i:i + batch_size]))
+    ingest = time.perf_counter() - started
+    
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        q = embedder.embed_query(query)
+        scores = [sum(a * b for a, b in zip(q, v)) for v in vectors]
+        sorted(range(len(scores)), key=scores.__getitem__, reverse=True)[:k]
+        latencies.append(time.perf_counter() - started)
+    return ingest, latencies
+
+
+def main():
+    chunks = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    query_count = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    backends = [b for b in sys.argv[3:] if b in EMBEDDING_BACKENDS] or available_backends()
+    
+    texts = corpus(chunks)
+    queries = [" ".join(random.Random(i).sample(WORDS, 4)) for i in range(query_count)]
+    print(f"chunks={chunks} queries={query_count}")
+    for backend in backends:
+        ingest, latencies = bench(backend, texts, queries)
+        print(f"{backend:<22} ingest {chunks / ingest:8.0f} chunks/sec   "
+              f"query p50 {statistics.median(latencies) * 1000:7.2f} ms  "
+              f"max {max(latencies) * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Benchmark: cold import time of the handler versus Streamlit.
+
+Imports agent_handler in fresh interpreters, so nothing is cached in
+sys.modules, and reports the median wall time next to that of importing
+streamlit alone. Also checks that importing the handler does not pull
+Streamlit in, which API and batch workers rely on.
+
+Usage:
+    python benchmarks/bench_import.py [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = (
+    "import sys, time; started = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - started, 'streamlit' in sys.modules)"
+)
+
+
+def time_import(module, runs):
+    timings = []
+    loads_streamlit = False
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module)],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.split()
+        timings.append(float(output[0]))
+        loads_streamlit = output[1] == "True"
+    return statistics.median(timings), loads_streamlit
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for module in ("agent_handler", "streamlit"):
+        try:
+            seconds, loads_streamlit = time_import(module, runs)
+        except subprocess.CalledProcessError as e:
+            print(f"{module:<14} failed to import: {e.stderr.strip().splitlines()[-1]}")
+            continue
+        print(f"{module:<14} {seconds * 1000:8.1f} ms median of {runs}   streamlit loaded: {loads_streamlit}")
+
+
+if __name__ == "__main__":
+    main()
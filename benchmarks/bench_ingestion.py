@@ -0,0 +1,90 @@
+"""
+Benchmark: chunks/sec of the batched ingestion pipeline.
+
+Runs fully offline. Chunks come from synthetic documents, embeddings come
+from the deterministic HashingEmbeddings (plus a simulated per-request
+latency standing in for a remote embedding API), and batches are written
+to an in-memory sink instead of Chroma.
+
+Usage:
+    python benchmarks/bench_ingestion.py [files] [chunks_per_file] [request_latency_ms]
+"""
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embeddings import HashingEmbeddings  # noqa: E402
+from ingestion import IngestionPipeline, combine_stats  # noqa: E402
+
+WORDS = ("matrix vector gradient entropy theorem proof lemma integral derivative "
+         "function recursion algorithm graph tree hash cache latency throughput").split()
+
+
+class Chunk:
+    def __init__(self, text, metadata):
+        self.page_content = text
+        self.metadata = metadata
+
+
+class LatencyEmbeddings(HashingEmbeddings):
+    def __init__(self, latency_s):
+        super().__init__()
+        self.latency_s = latency_s
+    
+    def embed_documents(self, texts):
+        time.sleep(self.latency_s)
+        return super().embed_documents(texts)
+
+
+class MemorySink:
+    def __init__(self):
+        self.rows = 0
+        self.lock = threading.Lock()
+    
+    def __call__(self, ids, embeddings, documents, metadatas):
+        with self.lock:
+            self.rows += len(ids)
+
+
+def synthetic_chunks(name, count, seed):
+    rng = random.Random(seed)
+    for i in range(count):
+        text = " ".join(rng.choice(WORDS) for _ in range(150))
+        yield Chunk(text, {"source": name, "page": i // 4})
+
+
+def run(files, chunks_per_file, latency_s, batch_size, parallel_files):
+    sink = MemorySink()
+    pipeline = IngestionPipeline(
+        LatencyEmbeddings(latency_s), sink, batch_size=batch_size,
+        max_parallel_files=parallel_files, max_concurrent_embeddings=parallel_files,
+    )
+    jobs = {
+        f"doc{i}.pdf": (lambda i=i: pipeline.ingest(synthetic_chunks(f"doc{i}.pdf", chunks_per_file, i)))
+        for i in range(files)
+    }
+    started = time.perf_counter()
+    results = pipeline.ingest_many(jobs)
+    stats = combine_stats(results.values(), time.perf_counter() - started)
+    assert sink.rows == files * chunks_per_file
+    return stats
+
+
+def main():
+    files = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    chunks_per_file = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    latency_s = (float(sys.argv[3]) if len(sys.argv) > 3 else 20.0) / 1000
+    
+    print(f"files={files} chunks/file={chunks_per_file} embedding request latency={latency_s * 1000:.0f} ms")
+    for batch_size, parallel_files in ((1, 1), (16, 1), (64, 1), (64, 4)):
+        stats = run(files, chunks_per_file, latency_s, batch_size, parallel_files)
+        print(f"batch={batch_size:<3} parallel_files={parallel_files}  "
+              f"{stats.chunks_per_sec:8.0f} chunks/sec  ({stats.batches} batches, {stats.elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: PDF parsing and splitting throughput (pages/sec) vs. worker count.
+
+Generates sample PDFs locally (text-heavy pages, see bench_pdf_memory.py),
+then extracts and splits all of them the way several concurrent uploads
+would: one thread per PDF. The baseline parses in those threads, sharing the
+GIL; the other runs shard pages across a PdfParsePool with 1..N worker
+processes. Every run is checked to produce exactly the baseline's chunks.
+
+Usage:
+    python benchmarks/bench_parse_pool.py [pdfs] [pages_per_pdf] [max_workers]
+"""
+import io
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pdf_memory import write_pdf  # noqa: E402
+from langchain.text_splitter import RecursiveCharacterTextSplitter  # noqa: E402
+from parse_pool import PdfParsePool  # noqa: E402
+from pdf_stream import iter_pdf_pages, open_pdf  # noqa: E402
+
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+
+def parse_in_thread(pdf):
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, length_function=len)
+    with open_pdf(pdf) as stream:
+        return [(chunk, page) for page, text in iter_pdf_pages(stream) for chunk in splitter.split_text(text)]
+
+
+def parse_in_pool(pool, pdf):
+    return [
+        (chunk, metadata["page"])
+        for _, chunks in pool.iter_chunk_batches(pdf, {}, CHUNK_SIZE, CHUNK_OVERLAP)
+        for chunk, metadata in chunks
+    ]
+
+
+def run(label, parse, pdfs, total_pages, expected):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(pdfs)) as executor:
+        results = list(executor.map(parse, pdfs))
+    elapsed = time.perf_counter() - started
+    assert expected is None or results == expected, f"{label}: chunks differ from the in-thread baseline"
+    print(f"{label:<16} {total_pages / elapsed:8.1f} pages/s   {elapsed:6.2f}s")
+    return results
+
+
+def main():
+    pdf_count = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    pages = int(sys.argv[2]) if len(sys.argv) > 2 else 120
+    max_workers = int(sys.argv[3]) if len(sys.argv) > 3 else (os.cpu_count() or 1)
+    
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for i in range(pdf_count):
+            path = os.path.join(directory, f"sample_{i}.pdf")
+            write_pdf(path, pages, 1, seed=i)
+            paths.append(path)
+        # Uploads arrive as in-memory streams, which the pool hands over through shared memory
+        uploads = [io.BytesIO(open(path, "rb").read()) for path in paths]
+        total_pages = pdf_count * pages
+        print(f"{pdf_count} PDFs x {pages} pages, {os.cpu_count()} CPUs")
+        
+        expected = run("in-thread", parse_in_thread, uploads, total_pages, None)
+        workers = 1
+        while workers <= max_workers:
+            pool = PdfParsePool(workers=workers)
+            # Start the workers before timing, as a long-running server would have
+            list(pool.iter_chunk_batches(paths[0], {}, CHUNK_SIZE, CHUNK_OVERLAP))
+            run(f"pool x{workers}", lambda pdf: parse_in_pool(pool, pdf), uploads, total_pages, expected)
+            pool.shutdown()
+            workers *= 2
+
+
+if __name__ == "__main__":
+    main()
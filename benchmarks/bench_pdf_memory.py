@@ -0,0 +1,135 @@
+"""
+Benchmark: peak RSS of eager vs. page-lazy PDF ingestion.
+
+Generates a synthetic PDF whose pages carry text plus an embedded binary
+image (like a scanned textbook), then ingests it in a fresh subprocess per
+mode and reports the child's peak resident set size:
+
+    eager  - the upload is copied into memory (as getbuffer() + temp file did),
+             every page is extracted, then everything is split and embedded
+    lazy   - the file is memory-mapped, pages are read one at a time and
+             chunks are embedded and written in rolling batches
+
+Embeddings come from HashingEmbeddings and batches go to a null writer, so
+only loading and splitting differ between the modes. Requires pypdf.
+
+Usage:
+    python benchmarks/bench_pdf_memory.py [pages] [image_kb_per_page]
+"""
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORDS = ("enzyme membrane gradient theorem integral matrix vector recursion "
+         "equilibrium momentum inflation syntax grammar protein catalyst").split()
+
+
+def write_pdf(path, pages, image_kb, seed=3):
+    """
+    Write a minimal valid PDF with one text block and one image XObject per page.
+    """
+    rng = random.Random(seed)
+    offsets = []
+    with open(path, "wb") as out:
+        def obj(number, body):
+            offsets.append((number, out.tell()))
+            out.write(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+        
+        out.write(b"%PDF-1.4\n")
+        page_ids = [4 + 3 * i for i in range(pages)]
+        obj(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        kids = " ".join(f"{page_id} 0 R" for page_id in page_ids).encode()
+        obj(2, b"<< /Type /Pages /Kids [" + kids + b"] /Count " + str(pages).encode() + b" >>")
+        obj(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+        for page_id in page_ids:
+            lines = [" ".join(rng.choice(WORDS) for _ in range(12)) for _ in range(40)]
+            text = b"BT /F1 10 Tf 50 780 Td 12 TL " + b" ".join(
+                b"(" + line.encode() + b") '" for line in lines
+            ) + b" ET"
+            image = rng.randbytes(image_kb * 1024)
+            obj(page_id, (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {page_id + 1} 0 R "
+                f"/Resources << /Font << /F1 3 0 R >> /XObject << /Im1 {page_id + 2} 0 R >> >> >>"
+            ).encode())
+            obj(page_id + 1, b"<< /Length " + str(len(text)).encode() + b" >>\nstream\n" + text + b"\nendstream")
+            obj(page_id + 2, (
+                f"<< /Type /XObject /Subtype /Image /Width {image_kb * 1024} /Height 1 "
+                f"/ColorSpace /DeviceGray /BitsPerComponent 8 /Length {len(image)} >>\nstream\n"
+            ).encode() + image + b"\nendstream")
+        
+        xref = out.tell()
+        count = max(number for number, _ in offsets) + 1
+        by_number = dict(offsets)
+        out.write(f"xref\n0 {count}\n0000000000 65535 f \n".encode())
+        for number in range(1, count):
+            out.write(f"{by_number[number]:010d} 00000 n \n".encode())
+        out.write(f"trailer\n<< /Size {count} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+
+
+def split(text, size=1000, overlap=200):
+    for start in range(0, max(len(text), 1), size - overlap):
+        yield text[start:start + size]
+
+
+class Chunk:
+    def __init__(self, text, metadata):
+        self.page_content = text
+        self.metadata = metadata
+
+
+def null_writer(ids, embeddings, documents, metadatas):
+    pass
+
+
+def run_mode(mode, path):
+    import io
+    
+    from embeddings import HashingEmbeddings
+    from ingestion import IngestionPipeline
+    from pdf_stream import iter_pdf_pages, open_pdf
+    
+    embedder = HashingEmbeddings()
+    started = time.perf_counter()
+    if mode == "eager":
+        with open(path, "rb") as file:
+            buffer = io.BytesIO(file.read())
+        pages = list(iter_pdf_pages(buffer))
+        chunks = [Chunk(text, {"page": page}) for page, text in pages for text in split(text)]
+        vectors = embedder.embed_documents([chunk.page_content for chunk in chunks])
+        count = len(vectors)
+    else:
+        pipeline = IngestionPipeline(embedder, null_writer, batch_size=64)
+        with open_pdf(path) as stream:
+            chunks = (Chunk(text, {"page": page}) for page, page_text in iter_pdf_pages(stream)
+                      for text in split(page_text))
+            count = pipeline.ingest(chunks).chunks
+    elapsed = time.perf_counter() - started
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    print(f"{mode:<6} peak RSS {peak_mb:8.1f} MB   {count} chunks in {elapsed:.2f}s")
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--mode":
+        run_mode(sys.argv[2], sys.argv[3])
+        return
+    
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    image_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 512
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "textbook.pdf")
+        write_pdf(path, pages, image_kb)
+        print(f"pages={pages} file size={os.path.getsize(path) / (1024 * 1024):.0f} MB")
+        for mode in ("eager", "lazy"):
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--mode", mode, path], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark: a burst of concurrent model calls against a rate-limited provider.
+
+Starts the local fake provider (fake_provider.py), which rejects requests
+over its rate limit with 429 + Retry-After, then fires a burst of concurrent
+async chat calls, once straight at it and once through a ProviderGateway
+with a concurrency cap, a token bucket matching the provider's limit and
+Retry-After aware retries. Reports completed calls, 429s seen, retries,
+the server's peak concurrency and the gateway's peak queue depth.
+
+Usage:
+    python benchmarks/bench_providers.py [calls] [provider_rps] [max_concurrency]
+"""
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_provider import FakeProvider  # noqa: E402
+from providers import ProviderGateway  # noqa: E402
+
+MESSAGES = [{"role": "user", "content": "Explain gradient descent in one line."}]
+
+
+async def burst_unmanaged(base_url, calls):
+    async with httpx.AsyncClient(timeout=30) as client:
+        async def call():
+            try:
+                response = await client.post(f"{base_url}/chat/completions", json={"model": "fake", "messages": MESSAGES})
+            except httpx.TransportError:
+                return False
+            return response.status_code == 200
+        return await asyncio.gather(*(call() for _ in range(calls)))
+
+
+async def burst_gateway(gateway, calls):
+    peak_queue = 0
+    
+    async def call():
+        try:
+            await gateway.achat("fake", MESSAGES)
+            return True
+        except httpx.HTTPStatusError:
+            return False
+    
+    async def watch():
+        nonlocal peak_queue
+        while True:
+            peak_queue = max(peak_queue, gateway.metrics()["queued"])
+            await asyncio.sleep(0.005)
+    
+    watcher = asyncio.ensure_future(watch())
+    results = await asyncio.gather(*(call() for _ in range(calls)))
+    watcher.cancel()
+    return results, peak_queue
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rps = float(sys.argv[2]) if len(sys.argv) > 2 else 50.0
+    max_concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    
+    provider = FakeProvider(latency_s=0.05, requests_per_second=rps).start()
+    started = time.perf_counter()
+    ok = sum(asyncio.run(burst_unmanaged(provider.base_url, calls)))
+    elapsed = time.perf_counter() - started
+    print(f"{'unmanaged':<10} {ok:4d}/{calls} ok   {provider.rejected:4d} x 429   "
+          f"peak server concurrency {provider.max_active:3d}   {elapsed:6.2f}s")
+    provider.stop()
+    
+    provider = FakeProvider(latency_s=0.05, requests_per_second=rps).start()
+    gateway = ProviderGateway("fake", provider.base_url, max_concurrency=max_concurrency,
+                              requests_per_minute=rps * 60, burst=max_concurrency)
+    started = time.perf_counter()
+    results, peak_queue = asyncio.run(burst_gateway(gateway, calls))
+    elapsed = time.perf_counter() - started
+    metrics = gateway.metrics()
+    print(f"{'gateway':<10} {sum(results):4d}/{calls} ok   {provider.rejected:4d} x 429   "
+          f"peak server concurrency {provider.max_active:3d}   {elapsed:6.2f}s   "
+          f"retries {metrics['retries']}   peak queue {peak_queue}   "
+          f"avg wait {metrics['avg_wait_seconds'] * 1000:.0f} ms")
+    provider.stop()
+
+
+if __name__ == "__main__":
+    main()
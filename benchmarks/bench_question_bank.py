@@ -0,0 +1,86 @@
+"""
+Benchmark: quiz latency as the question bank warms up.
+
+Students take quizzes on the same few topics, one after another, against the
+offline "fake" provider. The first quizzes on a topic are generated and fill
+the bank; later students get questions they have not seen from it, and only
+the shortfall is generated. Reports latency and model calls of quizzes
+served fully from the bank, partly, and not at all, plus the bank's hit rate.
+
+Usage:
+    python benchmarks/bench_question_bank.py [students] [topics] [questions] [latency_ms] [tokens_per_second]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def write_config(workdir, latency_s, tokens_per_second):
+    """
+    Copy prompts.yaml with the fake provider's speed, response caching off and
+    a fresh question bank.
+    """
+    with open(os.path.join(ROOT, "prompts.yaml"), "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+    settings = data.setdefault("settings", {})
+    providers = settings.setdefault("providers", {})
+    providers["fake"] = dict(providers.get("fake") or {}, latency_seconds=latency_s,
+                             tokens_per_second=tokens_per_second, max_concurrency=256)
+    settings["response_cache"] = dict(settings.get("response_cache") or {},
+                                      path=os.path.join(workdir, "responses.sqlite3"), ttl_seconds={})
+    settings["question_bank"] = dict(settings.get("question_bank") or {}, enabled=True,
+                                     path=os.path.join(workdir, "questions.sqlite3"), embedding_backend="hashing")
+    path = os.path.join(workdir, "prompts.yaml")
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(data, f, allow_unicode=True)
+    return path
+
+
+def main():
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    topics = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    num_questions = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    latency_s = (float(sys.argv[4]) if len(sys.argv) > 4 else 300.0) / 1000
+    tokens_per_second = float(sys.argv[5]) if len(sys.argv) > 5 else 200.0
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        # Must be set before the first import of the app's modules
+        os.environ["STUDY_ASSISTANT_CONFIG"] = write_config(workdir, latency_s, tokens_per_second)
+        from agent_handler import StudyAssistantHandler
+        
+        timings = {"bank": [], "partial": [], "generated": []}
+        calls = {"bank": 0, "partial": 0, "generated": 0}
+        for student in range(students):
+            handler = StudyAssistantHandler(
+                topic=f"Topic {student % topics}", subject_category="mathematics", knowledge_level="beginner",
+                learning_goal="Pass the exam", time_available="3-5 hours per week", learning_style="visual",
+                model_name="fake-model", provider="fake", tenant_id=f"student-{student}",
+            )
+            started = time.perf_counter()
+            quiz = handler.generate_quiz("intermediate", "definitions, applications", num_questions)
+            elapsed = time.perf_counter() - started
+            kind = ("bank" if quiz["from_bank"] == num_questions
+                    else "partial" if quiz["from_bank"] else "generated")
+            timings[kind].append(elapsed)
+            calls[kind] += quiz["model_calls"]
+        
+        print(f"{students} students, {topics} topics, {num_questions} questions per quiz, "
+              f"fake model latency {latency_s * 1000:.0f} ms, {tokens_per_second or 'instant'} tokens/s")
+        print(f"{'served from':<12} {'quizzes':>8} {'p50 ms':>9} {'max ms':>9} {'model calls':>12}")
+        for kind, values in timings.items():
+            if values:
+                print(f"{kind:<12} {len(values):8d} {statistics.median(values) * 1000:9.1f} "
+                      f"{max(values) * 1000:9.1f} {calls[kind]:12d}")
+        stats = handler.get_question_bank_stats()
+        print(f"bank: {stats['questions']} questions, {stats['hit_rate']:.0%} of requested questions served from it")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark: structured quiz latency by size, sharded versus one model call.
+
+Generates structured quizzes of 5, 10 and 20 questions against the offline
+"fake" provider, whose answers take a fixed latency plus time proportional to
+their length, once split into parallel batches of settings.quiz.shard_size
+questions and once asked of a single call. Reports the median wall time and
+the number of model calls of each.
+
+Usage:
+    python benchmarks/bench_quiz.py [runs] [latency_ms] [tokens_per_second] [focus_areas]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SIZES = (5, 10, 20)
+
+
+def write_config(workdir, latency_s, tokens_per_second):
+    """
+    Copy prompts.yaml with the fake provider's speed, and caching and the question bank off.
+    """
+    with open(os.path.join(ROOT, "prompts.yaml"), "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f)
+    settings = data.setdefault("settings", {})
+    providers = settings.setdefault("providers", {})
+    providers["fake"] = dict(providers.get("fake") or {}, latency_seconds=latency_s,
+                             tokens_per_second=tokens_per_second, max_concurrency=256)
+    settings["response_cache"] = dict(settings.get("response_cache") or {},
+                                      path=os.path.join(workdir, "responses.sqlite3"), ttl_seconds={})
+    settings["question_bank"] = {"enabled": False}
+    path = os.path.join(workdir, "prompts.yaml")
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(data, f, allow_unicode=True)
+    return path
+
+
+async def measure(handler, focus_areas, num_questions, shard_size, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        quiz = await handler.arun_structured_quiz("intermediate", focus_areas, num_questions, shard_size)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), quiz["model_calls"], len(quiz["questions"])
+
+
+async def run(handler, focus_areas, runs):
+    # One event loop for all runs, as the provider's async client is bound to it
+    return [
+        (size, await measure(handler, focus_areas, size, None, runs), await measure(handler, "", size, size, runs))
+        for size in SIZES
+    ]
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    latency_s = (float(sys.argv[2]) if len(sys.argv) > 2 else 300.0) / 1000
+    tokens_per_second = float(sys.argv[3]) if len(sys.argv) > 3 else 200.0
+    focus_areas = sys.argv[4] if len(sys.argv) > 4 else "eigenvalues, determinants"
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        # Must be set before the first import of the app's modules
+        os.environ["STUDY_ASSISTANT_CONFIG"] = write_config(workdir, latency_s, tokens_per_second)
+        from agent_handler import StudyAssistantHandler
+        
+        handler = StudyAssistantHandler(
+            topic="Linear algebra", subject_category="mathematics", knowledge_level="beginner",
+            learning_goal="Pass the exam", time_available="3-5 hours per week", learning_style="visual",
+            model_name="fake-model", provider="fake",
+        )
+        print(f"fake model latency {latency_s * 1000:.0f} ms, {tokens_per_second or 'instant'} tokens/s, "
+              f"focus areas: {focus_areas}, median of {runs}")
+        print(f"{'questions':>9} {'sharded ms':>11} {'calls':>6} {'single ms':>10} {'calls':>6} {'speedup':>8}")
+        for size, (sharded, sharded_calls, got), (single, single_calls, _) in asyncio.run(
+            run(handler, focus_areas, runs)
+        ):
+            print(f"{size:9d} {sharded * 1000:11.0f} {sharded_calls:6d} {single * 1000:10.0f} {single_calls:6d} "
+                  f"{single / sharded:7.1f}x" + ("" if got == size else f"   ({got} questions)"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark: latency and recall@k of vector, lexical (BM25) and hybrid retrieval.
+
+Runs on the bundled sample corpus (benchmarks/data/sample_corpus.json), whose
+queries mix exact terms (formulas, identifiers, chapter numbers) with
+paraphrased questions. Dense retrieval is a brute-force cosine search over
+vectors from the chosen embedding backend; the lexical ranker and the fusion
+are the same BM25Index and reciprocal_rank_fusion RAGHelper uses.
+
+Usage:
+    python benchmarks/bench_retrieval.py [k] [backend]
+"""
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bm25 import BM25Index, reciprocal_rank_fusion  # noqa: E402
+from embeddings import get_embeddings  # noqa: E402
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sample_corpus.json")
+
+
+def load_corpus():
+    with open(CORPUS, encoding="utf-8") as file:
+        data = json.load(file)
+    return data["passages"], data["queries"]
+
+
+class DenseIndex:
+    def __init__(self, embedder, passages):
+        self.embedder = embedder
+        self.ids = [passage["id"] for passage in passages]
+        self.vectors = embedder.embed_documents([passage["text"] for passage in passages])
+    
+    def search(self, query, n):
+        q = self.embedder.embed_query(query)
+        scores = [sum(a * b for a, b in zip(q, v)) for v in self.vectors]
+        order = sorted(range(len(scores)), key=scores.__getitem__, reverse=True)[:n]
+        return [self.ids[i] for i in order]
+
+
+def run(mode, dense, sparse, queries, k, candidates=20):
+    latencies = []
+    hits = 0.0
+    for item in queries:
+        started = time.perf_counter()
+        if mode == "vector":
+            ranked = dense.search(item["query"], k)
+        elif mode == "lexical":
+            ranked = [doc_id for doc_id, _ in sparse.search(item["query"], k)]
+        else:
+            fused = reciprocal_rank_fusion([
+                dense.search(item["query"], candidates),
+                [doc_id for doc_id, _ in sparse.search(item["query"], candidates)],
+            ])
+            ranked = [doc_id for doc_id, _ in fused[:k]]
+        latencies.append(time.perf_counter() - started)
+        relevant = set(item["relevant"])
+        hits += len(relevant.intersection(ranked)) / len(relevant)
+    return hits / len(queries), latencies
+
+
+def main():
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    backend = sys.argv[2] if len(sys.argv) > 2 else "hashing"
+    
+    passages, queries = load_corpus()
+    dense = DenseIndex(get_embeddings(backend), passages)
+    sparse = BM25Index()
+    sparse.add([passage["id"] for passage in passages], [passage["text"] for passage in passages])
+    
+    print(f"passages={len(passages)} queries={len(queries)} k={k} backend={backend}")
+    for mode in ("vector", "lexical", "hybrid"):
+        recall, latencies = run(mode, dense, sparse, queries, k)
+        print(f"{mode:<8} recall@{k} {recall:5.2f}   "
+              f"p50 {statistics.median(latencies) * 1000:7.3f} ms  max {max(latencies) * 1000:7.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Local fake of an OpenAI-compatible chat completions API.
+
+Answers POST .../chat/completions (plain or streamed as server-sent events)
+after a configurable latency, and enforces its own rate limit: requests over
+the limit get a 429 with a Retry-After header, like Groq and OpenAI do. It
+records the highest number of requests it served at the same time.
+
+Point a provider at it by setting its base_url in prompts.yaml, e.g.
+settings.providers.openai.base_url: http://127.0.0.1:8089/v1
+
+Usage:
+    python benchmarks/fake_provider.py [port] [latency_ms] [requests_per_second]
+"""
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class FakeProvider:
+    def __init__(self, latency_s=0.05, requests_per_second=50.0, retry_after_s=0.2, port=0):
+        self.latency_s = latency_s
+        self.requests_per_second = requests_per_second
+        self.retry_after_s = retry_after_s
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.served = 0
+        self.rejected = 0
+        self.window = []
+        self.server = Server(("127.0.0.1", port), self._handler())
+    
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+    
+    def admit(self):
+        with self.lock:
+            now = time.monotonic()
+            self.window = [t for t in self.window if now - t < 1.0]
+            if self.requests_per_second and len(self.window) >= self.requests_per_second:
+                self.rejected += 1
+                return False
+            self.window.append(now)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            return True
+    
+    def done(self):
+        with self.lock:
+            self.active -= 1
+            self.served += 1
+    
+    def _handler(self):
+        provider = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def log_message(self, *args):
+                pass
+            
+            def _send_json(self, status, payload, headers=()):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if not self.path.endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": "not found"}})
+                    return
+                if not provider.admit():
+                    self._send_json(429, {"error": {"message": "rate limit exceeded", "type": "rate_limit"}},
+                                    [("Retry-After", f"{provider.retry_after_s:g}")])
+                    return
+                try:
+                    time.sleep(provider.latency_s)
+                    prompt = request.get("messages", [{}])[-1].get("content", "")
+                    answer = f"echo: {prompt[:200]}"
+                    if request.get("stream"):
+                        self._stream(request, answer)
+                    else:
+                        self._send_json(200, {
+                            "id": "chatcmpl-fake",
+                            "object": "chat.completion",
+                            "created": int(time.time()),
+                            "model": request.get("model", "fake"),
+                            "choices": [{"index": 0, "finish_reason": "stop",
+                                         "message": {"role": "assistant", "content": answer}}],
+                            "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": len(answer.split()),
+                                      "total_tokens": len(prompt.split()) + len(answer.split())},
+                        })
+                finally:
+                    provider.done()
+            
+            def _stream(self, request, answer):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                
+                def send(data):
+                    payload = f"data: {data}\n\n".encode()
+                    self.wfile.write(f"{len(payload):x}\r\n".encode() + payload + b"\r\n")
+                
+                for word in answer.split(" "):
+                    send(json.dumps({
+                        "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                        "model": request.get("model", "fake"),
+                        "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}],
+                    }))
+                send("[DONE]")
+                self.wfile.write(b"0\r\n\r\n")
+        
+        return Handler
+    
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+    
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8089
+    latency_s = (float(sys.argv[2]) if len(sys.argv) > 2 else 50.0) / 1000
+    rate = float(sys.argv[3]) if len(sys.argv) > 3 else 50.0
+    provider = FakeProvider(latency_s, rate, port=port)
+    print(f"Fake provider at {provider.base_url} ({rate:g} requests/s, {latency_s * 1000:.0f} ms latency)")
+    try:
+        provider.server.serve_forever()
+    except KeyboardInterrupt:
+        provider.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# Keeps identifiers (snake_case, x_1), dotted numbers (3.2, 4.1.5) and words together
+_TOKEN = re.compile(r"\w+(?:\.\w+)*", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase search terms.
+    
+    Dotted and underscored tokens are indexed whole and by their parts, so
+    "section 3.2" matches "3.2" and "scipy.optimize" matches "optimize".
+    
+    Args:
+        text (str): The text to tokenize
+        
+    Returns:
+        List[str]: The terms, in order
+    """
+    terms = []
+    for token in _TOKEN.findall(text.lower()):
+        terms.append(token)
+        parts = re.split(r"[._]", token)
+        if len(parts) > 1:
+            terms.extend(part for part in parts if part)
+    return terms
+
+
+class BM25Index:
+    """
+    Incremental in-memory BM25 (Okapi) inverted index.
+    
+    Documents can be added and removed at any time; document frequencies and
+    the average document length are maintained as they change, so nothing is
+    rebuilt on write. Only term counts are kept, not document texts; callers
+    look the texts of hits up in their own store. Thread-safe.
+    """
+    
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize the index.
+        
+        Args:
+            k1 (float): Term frequency saturation
+            b (float): Document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._doc_terms: Dict[str, Tuple[str, ...]] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._lengths)
+    
+    def _remove(self, doc_id: str):
+        length = self._lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for term in self._doc_terms.pop(doc_id):
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+    
+    def add(self, doc_ids: Sequence[str], texts: Sequence[str]):
+        """
+        Index documents, replacing any earlier version with the same id.
+        
+        Args:
+            doc_ids (Sequence[str]): Document ids
+            texts (Sequence[str]): Document texts
+        """
+        with self._lock:
+            for doc_id, text in zip(doc_ids, texts):
+                if doc_id in self._lengths:
+                    self._remove(doc_id)
+                counts = Counter(tokenize(text))
+                for term, count in counts.items():
+                    self._postings.setdefault(term, {})[doc_id] = count
+                length = sum(counts.values())
+                self._lengths[doc_id] = length
+                self._doc_terms[doc_id] = tuple(counts)
+                self._total_length += length
+    
+    def remove(self, doc_ids: Iterable[str]):
+        """
+        Remove documents from the index.
+        
+        Args:
+            doc_ids (Iterable[str]): Document ids; unknown ids are ignored
+        """
+        with self._lock:
+            for doc_id in doc_ids:
+                self._remove(doc_id)
+    
+    def clear(self):
+        with self._lock:
+            self._postings.clear()
+            self._lengths.clear()
+            self._doc_terms.clear()
+            self._total_length = 0
+    
+    def search(self, query: str, k: int = 4) -> List[Tuple[str, float]]:
+        """
+        Rank documents against a query.
+        
+        Args:
+            query (str): The query text
+            k (int): Number of results
+            
+        Returns:
+            List[Tuple[str, float]]: (document id, BM25 score) pairs, best first
+        """
+        with self._lock:
+            count = len(self._lengths)
+            if not count:
+                return []
+            average_length = self._total_length / count
+            scores: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Fuse several rankings with reciprocal rank fusion.
+    
+    Each document scores sum(1 / (k + rank)) over the rankings it appears in,
+    which needs no calibration between the rankers' native scores.
+    
+    Args:
+        rankings (Iterable[Sequence[str]]): Document ids of each ranking, best first
+        k (int): Damping constant; larger values flatten the contribution of top ranks
+        
+    Returns:
+        List[Tuple[str, float]]: (document id, fused score) pairs, best first
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -1,27 +1,272 @@
 import yaml
 import os
-from typing import Dict, Any, Optional, List
+import threading
+import time
+from string import Formatter
+from types import MappingProxyType
+from typing import Dict, Any, Optional, List, Mapping, Tuple
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# STUDY_ASSISTANT_CONFIG points at another file, e.g. an offline config for benchmarks or CI
+CONFIG_PATH = os.getenv("STUDY_ASSISTANT_CONFIG", os.path.join(APP_DIR, "prompts.yaml"))
+
+
+def resolve_path(path: str) -> str:
+    """
+    Resolve a file path from the settings the way CONFIG_PATH is.
+    
+    Args:
+        path (str): An absolute path, or one relative to the application directory
+        
+    Returns:
+        str: The absolute path, the same whatever the working directory
+    """
+    return os.path.join(APP_DIR, os.path.expanduser(path))
+
+
+def _freeze(value: Any) -> Any:
+    """
+    Recursively convert parsed YAML into read-only containers.
+    
+    Args:
+        value (Any): A value produced by yaml.safe_load
+        
+    Returns:
+        Any: The same data with dicts as mapping proxies and lists as tuples
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class PromptTemplate:
+    """
+    A prompt template parsed once into literal text and replacement fields.
+    """
+    __slots__ = ("template", "fields", "_parts")
+    
+    def __init__(self, template: str):
+        """
+        Pre-parse the template so formatting does not rescan the string.
+        
+        Args:
+            template (str): A str.format style template
+        """
+        self.template = template
+        parts = []
+        simple = True
+        for literal, field, spec, conversion in Formatter().parse(template):
+            if field is not None and (not field.isidentifier() or spec or conversion):
+                simple = False
+            parts.append((literal, field))
+        self._parts = tuple(parts) if simple else None
+        self.fields = frozenset(field for _, field in parts if field)
+    
+    def format(self, **kwargs) -> str:
+        """
+        Render the template with variables.
+        
+        Args:
+            **kwargs: Variables to insert into the template
+            
+        Returns:
+            str: The rendered prompt
+        """
+        if self._parts is None:
+            return self.template.format(**kwargs)
+        pieces = []
+        for literal, field in self._parts:
+            pieces.append(literal)
+            if field is not None:
+                pieces.append(format(kwargs[field]))
+        return "".join(pieces)
+    
+    def __str__(self) -> str:
+        return self.template
+
+
+class LearningStyleBlock:
+    """
+    Pre-rendered persona fragments for one learning style.
+    """
+    __slots__ = ("name", "description", "recommendations", "recommendations_block")
+    
+    def __init__(self, name: str, info: Mapping[str, Any]):
+        self.name = name
+        self.description = info.get("description", "")
+        self.recommendations = tuple(info.get("recommendations", ()))
+        self.recommendations_block = "\n".join(f"- {rec}" for rec in self.recommendations)
+
+
+class ConfigSnapshot:
+    """
+    An immutable, pre-compiled view of prompts.yaml shared across the process.
+    """
+    
+    def __init__(self, data: Dict[str, Any], mtime: float):
+        """
+        Build the snapshot from parsed YAML.
+        
+        Args:
+            data (dict): The parsed configuration
+            mtime (float): Modification time of the file that was parsed
+        """
+        self.mtime = mtime
+        self.data = _freeze(data or {})
+        self.personas = self.data.get("personas", MappingProxyType({}))
+        self.learning_styles = self.data.get("learning_styles", MappingProxyType({}))
+        self.subject_categories = self.data.get("subject_categories", MappingProxyType({}))
+        self.knowledge_levels = self.data.get("knowledge_levels", MappingProxyType({}))
+        self.settings = self.data.get("settings", MappingProxyType({}))
+        self.templates: Mapping[Tuple[str, str], PromptTemplate] = MappingProxyType({
+            (prompt_type, prompt_name): PromptTemplate(template)
+            for prompt_type, variants in self.data.get("prompts", {}).items()
+            for prompt_name, template in variants.items()
+        })
+        self.style_blocks: Mapping[str, LearningStyleBlock] = MappingProxyType({
+            name: LearningStyleBlock(name, info) for name, info in self.learning_styles.items()
+        })
+    
+    def __getitem__(self, key: str) -> Any:
+        return self.data[key]
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.data.get(key, default)
+    
+    def persona_prompt(self, persona_type: str) -> str:
+        """
+        Get the system prompt of a persona.
+        
+        Args:
+            persona_type (str): The persona name
+            
+        Returns:
+            str: The system prompt, or an empty string if undefined
+        """
+        return self.personas.get(persona_type, {}).get("system_prompt", "")
+    
+    def prompt(self, prompt_type: str, prompt_name: str = "base") -> Optional[PromptTemplate]:
+        """
+        Get a pre-compiled prompt template.
+        
+        Args:
+            prompt_type (str): The type of prompt
+            prompt_name (str): The name of the prompt within that type
+            
+        Returns:
+            Optional[PromptTemplate]: The template or None if not found
+        """
+        return self.templates.get((prompt_type, prompt_name))
+    
+    def setting(self, section: str) -> Mapping[str, Any]:
+        """
+        Get a section of the runtime settings.
+        
+        Args:
+            section (str): The settings section name
+            
+        Returns:
+            Mapping[str, Any]: The section (empty if not configured)
+        """
+        return self.settings.get(section) or MappingProxyType({})
+    
+    def style_block(self, learning_style: str) -> LearningStyleBlock:
+        """
+        Get the pre-rendered fragments for a learning style.
+        
+        Args:
+            learning_style (str): The learning style name
+            
+        Returns:
+            LearningStyleBlock: The style block (empty if the style is unknown)
+        """
+        block = self.style_blocks.get(learning_style)
+        if block is None:
+            block = LearningStyleBlock(learning_style, {})
+        return block
+
+
+# Snapshots by absolute file path, so configurations loaded from different files do not replace each other
+_snapshots: Dict[str, ConfigSnapshot] = {}
+_snapshot_lock = threading.Lock()
+_parse_count = 0
+
+
+def get_config(path: str = CONFIG_PATH) -> ConfigSnapshot:
+    """
+    Return the shared configuration snapshot, re-parsing only when the file changes.
+    
+    Args:
+        path (str): Path to the YAML configuration file
+        
+    Returns:
+        ConfigSnapshot: The current snapshot of that file
+    """
+    global _parse_count
+    path = os.path.abspath(path)
+    mtime = os.stat(path).st_mtime
+    snapshot = _snapshots.get(path)
+    if snapshot is not None and snapshot.mtime == mtime:
+        return snapshot
+    parse_seconds = None
+    with _snapshot_lock:
+        snapshot = _snapshots.get(path)
+        if snapshot is None or snapshot.mtime != mtime:
+            started = time.perf_counter()
+            with open(path, "r") as file:
+                data = yaml.safe_load(file)
+            _parse_count += 1
+            snapshot = _snapshots[path] = ConfigSnapshot(data, mtime)
+            parse_seconds = time.perf_counter() - started
+    if parse_seconds is not None:
+        # Imported here because telemetry reads its own settings through get_config()
+        from telemetry import get_telemetry
+        get_telemetry().observe("config_load", parse_seconds)
+    return snapshot
+
+
+def get_parse_count() -> int:
+    """
+    Get how many times the configuration file has been parsed in this process.
+    
+    Returns:
+        int: Number of YAML parses
+    """
+    return _parse_count
+
+
+def option_key(value: str, options: List[str]) -> Optional[str]:
+    """
+    Match a free-text choice such as "Reading/Writing" to a configuration key.
+    
+    Args:
+        value (str): The choice as entered
+        options (List[str]): The configuration keys, e.g. from ConfigManager.get_all_learning_styles()
+        
+    Returns:
+        Optional[str]: The matching key ("reading_writing"), or None if there is none
+    """
+    wanted = "_".join((value or "").replace("-", " ").replace("/", " ").casefold().split())
+    return next((option for option in options if option.casefold() == wanted), None)
+
 
 class ConfigManager:
     """
     Handles loading and accessing configuration from the YAML file.
     """
     _instance = None
-    _config = None
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(ConfigManager, cls).__new__(cls)
-            cls._instance._load_config()
         return cls._instance
     
-    def _load_config(self):
-        """
-        Loads the configuration from the YAML file.
-        """
-        config_path = os.path.join(os.path.dirname(__file__), "prompts.yaml")
-        with open(config_path, "r") as file:
-            self._config = yaml.safe_load(file)
+    @property
+    def _config(self) -> ConfigSnapshot:
+        return get_config()
     
     def get_persona(self, persona_type: str) -> Dict[str, Any]:
         """
@@ -33,7 +278,7 @@ class ConfigManager:
         Returns:
             Dict[str, Any]: The persona configuration
         """
-        return self._config.get("personas", {}).get(persona_type, {})
+        return self._config.personas.get(persona_type, {})
     
     def get_prompt(self, prompt_type: str, prompt_name: str = "base") -> Optional[str]:
         """
@@ -46,7 +291,8 @@ class ConfigManager:
         Returns:
             Optional[str]: The prompt template or None if not found
         """
-        return self._config.get("prompts", {}).get(prompt_type, {}).get(prompt_name)
+        template = self._config.prompt(prompt_type, prompt_name)
+        return template.template if template else None
     
     def get_learning_style_info(self, learning_style: str) -> Dict[str, Any]:
         """
@@ -58,7 +304,7 @@ class ConfigManager:
         Returns:
             Dict[str, Any]: The learning style configuration
         """
-        return self._config.get("learning_styles", {}).get(learning_style, {})
+        return self._config.learning_styles.get(learning_style, {})
     
     def get_subject_category_info(self, category: str) -> Dict[str, Any]:
         """
@@ -70,7 +316,7 @@ class ConfigManager:
         Returns:
             Dict[str, Any]: The subject category configuration
         """
-        return self._config.get("subject_categories", {}).get(category, {})
+        return self._config.subject_categories.get(category, {})
     
     def get_knowledge_level_info(self, level: str) -> Dict[str, Any]:
         """
@@ -82,7 +328,7 @@ class ConfigManager:
         Returns:
             Dict[str, Any]: The knowledge level configuration
         """
-        return self._config.get("knowledge_levels", {}).get(level, {})
+        return self._config.knowledge_levels.get(level, {})
     
     def get_all_subject_categories(self) -> List[str]:
         """
@@ -91,7 +337,7 @@ class ConfigManager:
         Returns:
             List[str]: List of subject category names
         """
-        return list(self._config.get("subject_categories", {}).keys())
+        return list(self._config.subject_categories.keys())
     
     def get_all_learning_styles(self) -> List[str]:
         """
@@ -100,7 +346,7 @@ class ConfigManager:
         Returns:
             List[str]: List of learning style names
         """
-        return list(self._config.get("learning_styles", {}).keys())
+        return list(self._config.learning_styles.keys())
     
     def get_all_knowledge_levels(self) -> List[str]:
         """
@@ -109,7 +355,7 @@ class ConfigManager:
         Returns:
             List[str]: List of knowledge level names
         """
-        return list(self._config.get("knowledge_levels", {}).keys())
+        return list(self._config.knowledge_levels.keys())
     
     def format_prompt(self, prompt_type: str, prompt_name: str = "base", **kwargs) -> Optional[str]:
         """
@@ -123,7 +369,7 @@ class ConfigManager:
         Returns:
             Optional[str]: The formatted prompt or None if template not found
         """
-        template = self.get_prompt(prompt_type, prompt_name)
+        template = self._config.prompt(prompt_type, prompt_name)
         if template:
             return template.format(**kwargs)
         return None
@@ -0,0 +1,231 @@
+import math
+import re
+from typing import Any, Dict, List, Sequence
+
+from config import get_config
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_encodings: Dict[str, Any] = {}
+
+
+def _encoding(name: str):
+    """
+    Get a tiktoken encoding, or None when tiktoken (or the encoding) is unavailable.
+    """
+    if name not in _encodings:
+        try:
+            import tiktoken
+            _encodings[name] = tiktoken.get_encoding(name)
+        except Exception:
+            _encodings[name] = None
+    return _encodings[name]
+
+
+def count_tokens(text: str, encoding: str = "cl100k_base") -> int:
+    """
+    Count the tokens of a text.
+    
+    Args:
+        text (str): The text
+        encoding (str): tiktoken encoding name
+        
+    Returns:
+        int: Exact count with tiktoken, otherwise an estimate of one token per four characters
+    """
+    enc = _encoding(encoding)
+    if enc is None:
+        return math.ceil(len(text) / 4)
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, encoding: str = "cl100k_base") -> str:
+    """
+    Cut a text down to at most max_tokens tokens.
+    
+    Args:
+        text (str): The text
+        max_tokens (int): Token limit
+        encoding (str): tiktoken encoding name
+        
+    Returns:
+        str: The leading part of the text that fits
+    """
+    enc = _encoding(encoding)
+    if enc is None:
+        return text[:max_tokens * 4]
+    return enc.decode(enc.encode(text, disallowed_special=())[:max_tokens])
+
+
+def _join_overlapping(first: str, second: str, max_overlap: int) -> str:
+    """
+    Concatenate two consecutive chunks, writing their shared overlap only once.
+    """
+    for size in range(min(len(first), len(second), max_overlap), 0, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+    return f"{first} {second}"
+
+
+def _shingles(text: str, size: int = 3) -> set:
+    words = _WORD.findall(text.lower())
+    if len(words) < size:
+        return {tuple(words)}
+    return {tuple(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+class ContextResult:
+    """
+    A packed context and what packing it saved.
+    """
+    
+    def __init__(self, text: str, tokens: int, raw_tokens: int, chunks: int, merged: int, dropped: int):
+        self.text = text
+        self.tokens = tokens
+        self.raw_tokens = raw_tokens
+        self.chunks = chunks
+        self.merged = merged
+        self.dropped = dropped
+    
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.raw_tokens - self.tokens)
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "tokens": self.tokens,
+            "raw_tokens": self.raw_tokens,
+            "tokens_saved": self.tokens_saved,
+            "chunks": self.chunks,
+            "merged": self.merged,
+            "dropped": self.dropped,
+        }
+
+
+class ContextBuilder:
+    """
+    Assembles retrieved chunks into a prompt context within a token budget.
+    
+    Consecutive chunks of the same source are merged with their overlap written
+    once, near-duplicates of already selected text are dropped, and the rest are
+    packed greedily by relevance until the budget is used up.
+    """
+    
+    def __init__(self, token_budget: int = 1500, near_duplicate_threshold: float = 0.85,
+                 max_overlap: int = 400, encoding: str = "cl100k_base", separator: str = "\n\n"):
+        """
+        Initialize the builder.
+        
+        Args:
+            token_budget (int): Maximum tokens of the assembled context
+            near_duplicate_threshold (float): Word-trigram Jaccard similarity above which a chunk is dropped
+            max_overlap (int): Longest character overlap looked for between consecutive chunks
+            encoding (str): tiktoken encoding used to count tokens
+            separator (str): Text placed between packed chunks
+        """
+        self.token_budget = token_budget
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.max_overlap = max_overlap
+        self.encoding = encoding
+        self.separator = separator
+    
+    def _merge_adjacent(self, chunks: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Merge runs of consecutive chunks from the same source.
+        
+        Args:
+            chunks (Sequence[Dict]): Chunks with text, score and optionally source and chunk_index
+            
+        Returns:
+            List[Dict]: Merged chunks with text, score (best of the run) and parts (chunks in the run)
+        """
+        positioned = sorted(
+            (chunk for chunk in chunks if chunk.get("chunk_index") is not None),
+            key=lambda chunk: (str(chunk.get("source")), chunk["chunk_index"]),
+        )
+        merged: List[Dict[str, Any]] = []
+        previous = None
+        for chunk in positioned:
+            same_source = previous is not None and chunk.get("source") == previous.get("source")
+            if same_source and chunk["chunk_index"] == previous["chunk_index"]:
+                continue
+            if same_source and chunk["chunk_index"] == previous["chunk_index"] + 1:
+                group = merged[-1]
+                group["text"] = _join_overlapping(group["text"], chunk["text"], self.max_overlap)
+                group["score"] = max(group["score"], chunk["score"])
+                group["parts"] += 1
+            else:
+                merged.append({"text": chunk["text"], "score": chunk["score"], "parts": 1})
+            previous = chunk
+        merged.extend(
+            {"text": chunk["text"], "score": chunk["score"], "parts": 1}
+            for chunk in chunks if chunk.get("chunk_index") is None
+        )
+        return merged
+    
+    def build(self, chunks: Sequence[Dict[str, Any]]) -> ContextResult:
+        """
+        Assemble a context from retrieved chunks.
+        
+        Args:
+            chunks (Sequence[Dict]): Retrieved chunks, best first, each with "text" and "score"
+                and, when known, "source" and "chunk_index"
+                
+        Returns:
+            ContextResult: The context text with its token count and savings
+        """
+        raw_tokens = count_tokens(self.separator.join(chunk["text"] for chunk in chunks), self.encoding)
+        groups = sorted(self._merge_adjacent(chunks), key=lambda group: group["score"], reverse=True)
+        merged = sum(group["parts"] - 1 for group in groups)
+        
+        selected: List[str] = []
+        selected_shingles: List[set] = []
+        used = 0
+        dropped = 0
+        separator_tokens = count_tokens(self.separator, self.encoding)
+        for group in groups:
+            text = group["text"]
+            shingles = _shingles(text)
+            if any(text in kept for kept in selected) or any(
+                len(shingles & other) / len(shingles | other) >= self.near_duplicate_threshold
+                for other in selected_shingles
+            ):
+                dropped += 1
+                continue
+            
+            cost = count_tokens(text, self.encoding) + (separator_tokens if selected else 0)
+            if used + cost > self.token_budget:
+                if selected:
+                    dropped += 1
+                    continue
+                # Never return an empty context because the best chunk alone is too long
+                text = truncate_to_tokens(text, self.token_budget, self.encoding)
+                cost = count_tokens(text, self.encoding)
+            selected.append(text)
+            selected_shingles.append(shingles)
+            used += cost
+        
+        context = self.separator.join(selected)
+        return ContextResult(
+            text=context,
+            tokens=count_tokens(context, self.encoding),
+            raw_tokens=raw_tokens,
+            chunks=len(selected),
+            merged=merged,
+            dropped=dropped,
+        )
+
+
+def get_context_builder() -> ContextBuilder:
+    """
+    Build a context builder from settings.rag in prompts.yaml.
+    
+    Returns:
+        ContextBuilder: The configured builder
+    """
+    settings = get_config().setting("rag")
+    return ContextBuilder(
+        token_budget=settings.get("context_token_budget", 1500),
+        near_duplicate_threshold=settings.get("near_duplicate_threshold", 0.85),
+        max_overlap=settings.get("chunk_overlap", 200) * 2,
+        encoding=settings.get("token_encoding", "cl100k_base"),
+    )
@@ -0,0 +1,180 @@
+import math
+import re
+import zlib
+from typing import Any, List, Optional, Protocol
+
+from config import get_config
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+_NAMESPACE_UNSAFE = re.compile(r"[^a-zA-Z0-9]+")
+
+
+class EmbeddingBackend(Protocol):
+    """
+    Interface every embedding backend implements (the LangChain Embeddings interface).
+    
+    Backends may also define a `namespace` string. RAGHelper appends it to the
+    collection name so vectors from backends with different dimensions never
+    share a collection.
+    """
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        ...
+    
+    def embed_query(self, text: str) -> List[float]:
+        ...
+
+
+class HashingEmbeddings:
+    """
+    Deterministic, dependency-free embeddings from hashed word and character n-grams.
+    
+    Implements the LangChain Embeddings interface (embed_documents / embed_query),
+    so it can be passed anywhere OpenAIEmbeddings is used. Nothing is downloaded
+    and no network call is made, which makes it suitable for offline tests.
+    """
+    
+    def __init__(self, dimensions: int = 384, char_ngram: int = 3):
+        """
+        Initialize the embedder.
+        
+        Args:
+            dimensions (int): Size of the output vectors
+            char_ngram (int): Length of the character n-grams hashed in addition to words
+        """
+        self.dimensions = dimensions
+        self.char_ngram = char_ngram
+        self.namespace = f"hashing{dimensions}"
+    
+    def _features(self, text: str) -> List[str]:
+        tokens = _TOKEN.findall(text.lower())
+        features = list(tokens)
+        n = self.char_ngram
+        for token in tokens:
+            padded = f"#{token}#"
+            features.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+        return features
+    
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for feature in self._features(text):
+            digest = zlib.crc32(feature.encode("utf-8"))
+            sign = 1.0 if digest & 0x80000000 else -1.0
+            vector[digest % self.dimensions] += sign
+        norm = math.sqrt(sum(value * value for value in vector))
+        if norm:
+            vector = [value / norm for value in vector]
+        return vector
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed a batch of documents.
+        
+        Args:
+            texts (List[str]): The texts to embed
+            
+        Returns:
+            List[List[float]]: One unit-length vector per text
+        """
+        return [self._embed(text) for text in texts]
+    
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a query.
+        
+        Args:
+            text (str): The query text
+            
+        Returns:
+            List[float]: A unit-length vector
+        """
+        return self._embed(text)
+
+
+class SentenceTransformerEmbeddings:
+    """
+    Local CPU embeddings from a small sentence-transformers model.
+    
+    Requires the optional sentence-transformers package. The model is loaded once
+    per process and runs without any network call once it is cached locally.
+    """
+    
+    _models = {}
+    
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", device: str = "cpu", batch_size: int = 32):
+        """
+        Initialize the embedder.
+        
+        Args:
+            model_name (str): Name or local path of the sentence-transformers model
+            device (str): Torch device to run on
+            batch_size (int): Encoding batch size
+        """
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "The sentence_transformers embedding backend requires `pip install sentence-transformers`"
+            ) from e
+        
+        key = (model_name, device)
+        if key not in self._models:
+            self._models[key] = SentenceTransformer(model_name, device=device)
+        self.model = self._models[key]
+        self.batch_size = batch_size
+        self.namespace = "st_" + _NAMESPACE_UNSAFE.sub("_", model_name.split("/")[-1]).strip("_")
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed a batch of documents.
+        
+        Args:
+            texts (List[str]): The texts to embed
+            
+        Returns:
+            List[List[float]]: One unit-length vector per text
+        """
+        vectors = self.model.encode(texts, batch_size=self.batch_size, normalize_embeddings=True)
+        return vectors.tolist()
+    
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a query.
+        
+        Args:
+            text (str): The query text
+            
+        Returns:
+            List[float]: A unit-length vector
+        """
+        return self.embed_documents([text])[0]
+
+
+EMBEDDING_BACKENDS = ("openai", "hashing", "sentence_transformers")
+
+
+def get_embeddings(backend: Optional[str] = None, **options: Any) -> EmbeddingBackend:
+    """
+    Build an embedding backend.
+    
+    Args:
+        backend (str): "openai", "hashing" or "sentence_transformers"; defaults to
+            settings.rag.embedding_backend in prompts.yaml
+        **options: Overrides for the backend's configured options
+        
+    Returns:
+        EmbeddingBackend: The embedding backend
+    """
+    settings = get_config().setting("rag")
+    backend = backend or settings.get("embedding_backend", "openai")
+    
+    if backend == "openai":
+        from langchain_community.embeddings import OpenAIEmbeddings
+        return OpenAIEmbeddings(**options)
+    if backend == "hashing":
+        options.setdefault("dimensions", settings.get("hashing_dimensions", 384))
+        return HashingEmbeddings(**options)
+    if backend == "sentence_transformers":
+        options.setdefault("model_name", settings.get("sentence_transformer_model", "all-MiniLM-L6-v2"))
+        return SentenceTransformerEmbeddings(**options)
+    raise ValueError(f"Unknown embedding backend {backend!r}; expected one of {', '.join(EMBEDDING_BACKENDS)}")
@@ -0,0 +1,191 @@
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+
+import httpx
+
+# Templates picked by the first key found in the last user message (case-insensitive).
+# "{prompt}" is the message's first line and "{filler}" deterministic text sized to
+# completion_tokens. "{questions}" is a JSON array of as many quiz questions as the
+# prompt's "NUMBER OF QUESTIONS:" line asks for, each with a fifth of that filler.
+DEFAULT_RESPONSES = {
+    "json array of quiz questions": "{questions}",
+    "learning needs": "## Student Profile\n\n{prompt}\n\n### Knowledge gaps\n{filler}",
+    "roadmap": "## Learning Roadmap\n\n### Phase 1: Foundations\n{filler}\n\n### Phase 2: Practice\n- Exercises",
+    "quiz": "## Quiz\n\n1. {filler}?\n   - A) True\n   - B) False\n\n**Answer:** A",
+    "learning resources": "## Recommended Resources\n\n- Course: {filler}\n- Book: Introduction",
+    "document context": "According to your documents: {filler}",
+}
+
+WORDS = (
+    "concept practice example review principle method model theory exercise problem "
+    "solution pattern structure analysis foundation skill step goal project summary "
+    "definition proof intuition application variable function system process result"
+).split()
+
+
+def _words(text: str) -> int:
+    return len(text.split())
+
+
+class FakeLLM(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """
+    In-process stand-in for an OpenAI-compatible chat completions API.
+    
+    Answers without any network access, after a fixed latency plus the time
+    the completion would take at the given token rate, streamed or not. The
+    same request always gets the same answer. Used as the inner transport of
+    the "fake" provider gateway, so the SDK, gateway limits and agents all run
+    as they would against a real provider.
+    """
+    
+    def __init__(self, latency: float = 0.2, tokens_per_second: float = 0.0, completion_tokens: int = 150,
+                 responses: Optional[Mapping[str, str]] = None, seed: int = 0):
+        """
+        Initialize the fake.
+        
+        Args:
+            latency (float): Seconds before the first token
+            tokens_per_second (float): Generation speed after the first token (0 for instant)
+            completion_tokens (int): Words of filler text per answer
+            responses (Mapping[str, str]): Templates by prompt keyword, replacing DEFAULT_RESPONSES
+            seed (int): Changes every generated answer
+        """
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.responses = dict(responses) if responses else dict(DEFAULT_RESPONSES)
+        self.seed = seed
+    
+    def answer(self, messages: List[Dict[str, Any]]) -> str:
+        """
+        Build the deterministic answer to a conversation.
+        
+        Args:
+            messages (List[Dict[str, Any]]): Chat messages with role and content
+            
+        Returns:
+            str: The answer text
+        """
+        prompt = next((str(m.get("content") or "") for m in reversed(messages) if m.get("role") == "user"), "")
+        digest = hashlib.sha256(f"{self.seed}\x1f{prompt}".encode("utf-8")).digest()
+        rng = random.Random(digest)
+        filler = " ".join(rng.choice(WORDS) for _ in range(self.completion_tokens))
+        lowered = prompt.lower()
+        template = next((text for key, text in self.responses.items() if key.lower() in lowered), "{filler}")
+        first_line = prompt.strip().splitlines()[0][:120] if prompt.strip() else ""
+        if "{questions}" in template:
+            template = template.replace("{questions}", self._questions(prompt, rng))
+        return template.replace("{prompt}", first_line).replace("{filler}", filler)
+    
+    def _questions(self, prompt: str, rng: random.Random) -> str:
+        count = re.search(r"NUMBER OF QUESTIONS:\s*(\d+)", prompt)
+        area = re.search(r"FOCUS AREA:\s*(.+)", prompt)
+        words = max(1, self.completion_tokens // 5)
+        questions = [
+            {
+                "stem": " ".join(rng.choice(WORDS) for _ in range(8)).capitalize() + "?",
+                "options": [" ".join(rng.choice(WORDS) for _ in range(3)) for _ in range(4)],
+                "answer": rng.choice("ABCD"),
+                "explanation": " ".join(rng.choice(WORDS) for _ in range(words)),
+                "focus_area": area.group(1).strip() if area else "general",
+            }
+            for _ in range(int(count.group(1)) if count else 5)
+        ]
+        return json.dumps(questions)
+    
+    def _prepare(self, request: httpx.Request) -> Tuple[int, Dict[str, Any], Optional[List[bytes]], float]:
+        """
+        Decode a request and build its response.
+        
+        Returns:
+            tuple: (status, JSON payload, server-sent event chunks when streaming, seconds per chunk)
+        """
+        if not request.url.path.endswith("/chat/completions"):
+            return 404, {"error": {"message": f"{request.url.path} is not served by the fake provider"}}, None, 0.0
+        body = json.loads(request.content or b"{}")
+        messages = body.get("messages", [])
+        content = self.answer(messages)
+        model = body.get("model", "fake")
+        created = int(time.time())
+        usage = {
+            "prompt_tokens": sum(_words(str(m.get("content") or "")) for m in messages),
+            "completion_tokens": _words(content),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        if not body.get("stream"):
+            return 200, {
+                "id": "chatcmpl-fake", "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": usage,
+            }, None, 0.0
+        
+        def event(choices: List[Dict[str, Any]], **extra) -> bytes:
+            chunk = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": created, "model": model,
+                     "choices": choices, **extra}
+            return f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+        
+        def delta(fields: Dict[str, Any], finish_reason: Optional[str] = None) -> bytes:
+            return event([{"index": 0, "delta": fields, "finish_reason": finish_reason}])
+        
+        words = content.split(" ")
+        chunks = [delta({"role": "assistant", "content": ""})]
+        chunks += [delta({"content": word if i == 0 else " " + word}) for i, word in enumerate(words)]
+        chunks.append(delta({}, "stop"))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            chunks.append(event([], usage=usage))
+        chunks.append(b"data: [DONE]\n\n")
+        per_chunk = 1.0 / self.tokens_per_second if self.tokens_per_second else 0.0
+        return 200, {}, chunks, per_chunk
+    
+    def _generation_time(self, payload: Dict[str, Any]) -> float:
+        if not self.tokens_per_second or "usage" not in payload:
+            return 0.0
+        return payload["usage"]["completion_tokens"] / self.tokens_per_second
+    
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        status, payload, chunks, per_chunk = self._prepare(request)
+        time.sleep(self.latency)
+        if chunks is None:
+            time.sleep(self._generation_time(payload))
+            return httpx.Response(status, json=payload, request=request)
+        return httpx.Response(status, headers={"Content-Type": "text/event-stream"},
+                              stream=_PacedStream(chunks, per_chunk), request=request)
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        status, payload, chunks, per_chunk = self._prepare(request)
+        await asyncio.sleep(self.latency)
+        if chunks is None:
+            await asyncio.sleep(self._generation_time(payload))
+            return httpx.Response(status, json=payload, request=request)
+        return httpx.Response(status, headers={"Content-Type": "text/event-stream"},
+                              stream=_PacedStream(chunks, per_chunk), request=request)
+
+
+class _PacedStream(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """
+    Response body that yields server-sent events at the fake's token rate.
+    """
+    
+    def __init__(self, chunks: List[bytes], per_chunk: float):
+        self.chunks = chunks
+        self.per_chunk = per_chunk
+    
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self.chunks:
+            if self.per_chunk:
+                time.sleep(self.per_chunk)
+            yield chunk
+    
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            if self.per_chunk:
+                await asyncio.sleep(self.per_chunk)
+            yield chunk
@@ -0,0 +1,222 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from config import get_config
+from ingestion import IngestionCancelled, IngestionProgress, IngestionStats
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+def make_job_id(collection: str, source: str, file_hash: str) -> str:
+    """
+    Build the id of an ingestion job.
+    
+    The id only depends on where the content goes and what it is, so submitting
+    the same upload again (e.g. on a Streamlit rerun) maps to the same job.
+    
+    Args:
+        collection (str): The target collection
+        source (str): The document's source identifier
+        file_hash (str): Hash of the document's content
+        
+    Returns:
+        str: A hex job id
+    """
+    return hashlib.sha256(f"{collection}\x1f{source}\x1f{file_hash}".encode("utf-8")).hexdigest()[:24]
+
+
+class IngestionJob:
+    """
+    State of one background ingestion.
+    """
+    
+    def __init__(self, job_id: str, collection: str, source: str):
+        self.job_id = job_id
+        self.collection = collection
+        self.source = source
+        self.status = QUEUED
+        self.progress = IngestionProgress()
+        self.stats: Optional[IngestionStats] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "source": self.source,
+            "status": self.status,
+            "pages": self.progress.pages,
+            "chunks": self.progress.chunks,
+            "reused": self.progress.reused,
+            "skipped": bool(self.stats and self.stats.skipped_files),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class IngestionJobQueue:
+    """
+    Runs document ingestion on background worker threads.
+    
+    Jobs are identified by caller-chosen ids (see make_job_id). Submitting an id
+    that is queued, running or done returns the existing job instead of ingesting
+    again; a failed or cancelled job is retried. Finished jobs are kept for status
+    queries up to a bounded number.
+    """
+    
+    def __init__(self, max_workers: int = 2, max_finished: int = 256):
+        """
+        Initialize the queue.
+        
+        Args:
+            max_workers (int): Number of jobs ingested at the same time
+            max_finished (int): Number of finished jobs kept for status queries
+        """
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest-job")
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def submit(self, job_id: str, collection: str, source: str,
+               work: Callable[[IngestionProgress], IngestionStats]) -> IngestionJob:
+        """
+        Queue an ingestion unless the same job is already queued, running or done.
+        
+        Args:
+            job_id (str): Idempotency key of the job
+            collection (str): The target collection
+            source (str): The document's source identifier, for display
+            work (Callable): Ingests the document, updating and honouring the given progress
+            
+        Returns:
+            IngestionJob: The new or existing job
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.status not in (FAILED, CANCELLED):
+                return job
+            job = IngestionJob(job_id, collection, source)
+            self._jobs[job_id] = job
+            self._jobs.move_to_end(job_id)
+            self._trim()
+        self._executor.submit(self._run, job, work)
+        return job
+    
+    def _run(self, job: IngestionJob, work: Callable[[IngestionProgress], IngestionStats]):
+        with self._lock:
+            if job.progress.cancelled:
+                job.status = CANCELLED
+                job.finished_at = time.time()
+                return
+            job.status = RUNNING
+            job.started_at = time.time()
+        try:
+            job.stats = work(job.progress)
+            status = DONE
+        except IngestionCancelled:
+            status = CANCELLED
+        except Exception as e:
+            print(f"Error ingesting {job.source}: {e}")
+            job.error = str(e)
+            status = FAILED
+        with self._lock:
+            job.status = status
+            job.finished_at = time.time()
+    
+    def _trim(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+    
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a queued or running job. A running job stops before its next batch
+        and its partial writes are rolled back.
+        
+        Args:
+            job_id (str): The job id
+            
+        Returns:
+            bool: True if the job was still queued or running
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return False
+            job.progress.cancel()
+            return True
+    
+    def forget(self, collection: str) -> int:
+        """
+        Cancel and drop every job of a collection, e.g. after it was cleared, so the
+        same documents can be ingested into it again.
+        
+        Args:
+            collection (str): The collection
+            
+        Returns:
+            int: Number of jobs dropped
+        """
+        with self._lock:
+            job_ids = [job_id for job_id, job in self._jobs.items() if job.collection == collection]
+            for job_id in job_ids:
+                self._jobs.pop(job_id).progress.cancel()
+            return len(job_ids)
+    
+    def stats(self) -> Dict[str, int]:
+        """
+        Count jobs by status.
+        
+        Returns:
+            Dict[str, int]: Number of known jobs per status
+        """
+        with self._lock:
+            counts = {status: 0 for status in (QUEUED, RUNNING) + FINISHED}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return counts
+
+
+_ingestion_queue: Optional[IngestionJobQueue] = None
+_ingestion_queue_lock = threading.Lock()
+
+
+def get_ingestion_queue() -> IngestionJobQueue:
+    """
+    Get the process-wide ingestion job queue, configured from the settings in prompts.yaml.
+    
+    Returns:
+        IngestionJobQueue: The shared queue
+    """
+    global _ingestion_queue
+    if _ingestion_queue is None:
+        with _ingestion_queue_lock:
+            if _ingestion_queue is None:
+                settings = get_config().setting("ingestion_jobs")
+                _ingestion_queue = IngestionJobQueue(
+                    max_workers=settings.get("workers", 2),
+                    max_finished=settings.get("max_finished_jobs", 256),
+                )
+    return _ingestion_queue
@@ -0,0 +1,199 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from telemetry import get_telemetry
+
+
+class IngestionStats:
+    """
+    Counters for one ingestion run.
+    """
+    
+    def __init__(self, files: int = 0, chunks: int = 0, batches: int = 0, elapsed: float = 0.0,
+                 reused: int = 0, skipped_files: int = 0):
+        self.files = files
+        self.chunks = chunks
+        self.batches = batches
+        self.elapsed = elapsed
+        self.reused = reused
+        self.skipped_files = skipped_files
+    
+    @property
+    def chunks_per_sec(self) -> float:
+        return self.chunks / self.elapsed if self.elapsed else 0.0
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "files": self.files,
+            "chunks": self.chunks,
+            "batches": self.batches,
+            "elapsed": self.elapsed,
+            "chunks_per_sec": self.chunks_per_sec,
+            "reused": self.reused,
+            "skipped_files": self.skipped_files,
+        }
+
+
+class IngestionCancelled(Exception):
+    """
+    Raised inside an ingestion run that was cancelled through its IngestionProgress.
+    """
+
+
+class IngestionProgress:
+    """
+    Live counters of one ingestion run, plus a cancellation flag it checks.
+    
+    Counters are written by the ingesting thread and may be read from any other.
+    """
+    
+    def __init__(self):
+        self.pages = 0
+        self.chunks = 0
+        self.reused = 0
+        self._cancelled = threading.Event()
+    
+    def cancel(self):
+        self._cancelled.set()
+    
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+    
+    def check(self):
+        """
+        Raise IngestionCancelled if the run was cancelled.
+        """
+        if self._cancelled.is_set():
+            raise IngestionCancelled()
+
+
+class IngestionPipeline:
+    """
+    Streams document chunks through batched embedding into a vector store.
+    
+    Chunks are pulled lazily from the source iterator, so at most one batch per
+    file is held in memory. Embedding calls are bounded across all files by a
+    shared semaphore, and several files can be ingested in parallel.
+    """
+    
+    def __init__(self, embeddings, writer: Callable[..., None], batch_size: int = 64,
+                 max_parallel_files: int = 4, max_concurrent_embeddings: int = 4):
+        """
+        Initialize the pipeline.
+        
+        Args:
+            embeddings: An object with an embed_documents(texts) method
+            writer (Callable): Called as writer(ids=, embeddings=, documents=, metadatas=) for each batch
+            batch_size (int): Number of chunks embedded and written per batch
+            max_parallel_files (int): Maximum number of files ingested at the same time
+            max_concurrent_embeddings (int): Maximum embedding calls in flight across all files
+        """
+        self.embeddings = embeddings
+        self.writer = writer
+        self.batch_size = batch_size
+        self.max_parallel_files = max_parallel_files
+        self._embed_slots = threading.BoundedSemaphore(max_concurrent_embeddings)
+    
+    def _batches(self, chunks: Iterable[Any]) -> Iterator[List[Any]]:
+        batch = []
+        for chunk in chunks:
+            batch.append(chunk)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
+    def ingest(self, chunks: Iterable[Any], progress: Optional[IngestionProgress] = None) -> IngestionStats:
+        """
+        Embed and store a stream of chunks.
+        
+        Args:
+            chunks (Iterable): Documents with page_content and metadata attributes; a
+                document's id attribute is used as its vector store id when set
+            progress (IngestionProgress): Optional counters to update after every batch;
+                checked for cancellation before every batch
+                
+        Returns:
+            IngestionStats: Counters for this run
+            
+        Raises:
+            IngestionCancelled: If progress was cancelled
+        """
+        stats = IngestionStats(files=1)
+        telemetry = get_telemetry()
+        started = time.perf_counter()
+        for batch in self._batches(chunks):
+            if progress is not None:
+                progress.check()
+            texts = [chunk.page_content for chunk in batch]
+            metadatas = []
+            for chunk in batch:
+                metadata = dict(chunk.metadata or {})
+                metadata.setdefault("chunk_index", stats.chunks + len(metadatas))
+                metadatas.append(metadata)
+            
+            with self._embed_slots, telemetry.span("embedding_batch"):
+                vectors = self.embeddings.embed_documents(texts)
+            with telemetry.span("vector_write"):
+                self.writer(
+                    ids=[getattr(chunk, "id", None) or str(uuid.uuid4()) for chunk in batch],
+                    embeddings=vectors,
+                    documents=texts,
+                    metadatas=metadatas,
+                )
+            stats.chunks += len(batch)
+            stats.batches += 1
+            if progress is not None:
+                progress.chunks += len(batch)
+        stats.elapsed = time.perf_counter() - started
+        return stats
+    
+    def ingest_many(self, jobs: Dict[str, Callable[[], IngestionStats]]) -> Dict[str, Optional[IngestionStats]]:
+        """
+        Run per-source ingestion jobs with bounded parallelism.
+        
+        Args:
+            jobs (Dict[str, Callable]): Maps a source name to a function that ingests it
+                (typically by calling ingest()) and returns its stats
+                
+        Returns:
+            Dict[str, Optional[IngestionStats]]: Stats per source, or None where ingestion failed
+        """
+        def run(name, job):
+            try:
+                return job()
+            except Exception as e:
+                print(f"Error ingesting {name}: {e}")
+                return None
+        
+        with ThreadPoolExecutor(max_workers=self.max_parallel_files, thread_name_prefix="ingest") as executor:
+            futures = {name: executor.submit(run, name, job) for name, job in jobs.items()}
+            return {name: future.result() for name, future in futures.items()}
+
+
+def combine_stats(results: Iterable[Optional[IngestionStats]], elapsed: float) -> IngestionStats:
+    """
+    Sum the stats of several ingestion runs.
+    
+    Args:
+        results (Iterable[Optional[IngestionStats]]): Per-source stats (None entries are skipped)
+        elapsed (float): Wall-clock time of the whole run
+        
+    Returns:
+        IngestionStats: The combined stats
+    """
+    total = IngestionStats(elapsed=elapsed)
+    for stats in results:
+        if stats is None:
+            continue
+        total.files += stats.files
+        total.chunks += stats.chunks
+        total.batches += stats.batches
+        total.reused += stats.reused
+        total.skipped_files += stats.skipped_files
+    return total
@@ -0,0 +1,240 @@
+import io
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pypdf import PdfReader
+
+from config import get_config
+from pdf_stream import PdfSource, open_pdf
+
+# (page_content, metadata) pairs; plain tuples so they pickle cheaply between processes
+ChunkBatch = List[Tuple[str, Dict[str, Any]]]
+
+_splitters: Dict[Tuple[int, int], Any] = {}
+
+
+class _SharedBufferReader(io.RawIOBase):
+    """
+    Read-only raw stream over a memoryview, so pypdf can parse a shared memory
+    block without copying it.
+    """
+    
+    def __init__(self, view: memoryview):
+        self._view = view
+        self._position = 0
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def readinto(self, buffer) -> int:
+        data = self._view[self._position:self._position + len(buffer)]
+        buffer[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+    
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: len(self._view)}[whence]
+        self._position = max(0, base + offset)
+        return self._position
+    
+    def tell(self) -> int:
+        return self._position
+
+
+@contextmanager
+def _open_location(location: Tuple) -> Iterator:
+    """
+    Open a PDF handed to a worker, either by path or by shared memory block name.
+    """
+    if location[0] == "path":
+        with open_pdf(location[1]) as stream:
+            yield stream
+        return
+    
+    _, name, size = location
+    block = shared_memory.SharedMemory(name=name)
+    view = block.buf[:size]
+    try:
+        yield io.BufferedReader(_SharedBufferReader(view))
+    finally:
+        view.release()
+        block.close()
+
+
+def _splitter(chunk_size: int, chunk_overlap: int):
+    key = (chunk_size, chunk_overlap)
+    if key not in _splitters:
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+        _splitters[key] = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap, length_function=len
+        )
+    return _splitters[key]
+
+
+def _parse_shard(location: Tuple, first: int, last: int, metadata: Dict[str, Any],
+                 chunk_size: int, chunk_overlap: int) -> ChunkBatch:
+    """
+    Extract and split pages [first, last) of a PDF. Runs in a worker process.
+    
+    Pages are split one at a time, exactly as RAGHelper does in-thread, so the
+    chunks do not depend on how the pages were sharded.
+    """
+    splitter = _splitter(chunk_size, chunk_overlap)
+    chunks: ChunkBatch = []
+    with _open_location(location) as stream:
+        reader = PdfReader(stream)
+        for page in range(first, last):
+            text = reader.pages[page].extract_text() or ""
+            for chunk in splitter.split_text(text):
+                chunks.append((chunk, dict(metadata, page=page)))
+    return chunks
+
+
+class PdfParsePool:
+    """
+    Parses and splits PDFs on a pool of worker processes.
+    
+    A PDF is sharded into runs of consecutive pages that are extracted and split
+    on different cores, outside the GIL of the serving process. Shard results
+    come back in page order, and only a bounded number of shards is in flight
+    per PDF, so chunks stream into the ingestion pipeline as they are ready.
+    Path inputs are opened by the workers themselves; in-memory uploads are
+    copied once into a shared memory block the workers read from.
+    """
+    
+    def __init__(self, workers: int = 4, pages_per_shard: int = 8, start_method: str = "spawn"):
+        """
+        Initialize the pool. Worker processes are started on first use.
+        
+        Args:
+            workers (int): Number of worker processes
+            pages_per_shard (int): Consecutive pages parsed by one task
+            start_method (str): multiprocessing start method; spawn is safe in a threaded server
+        """
+        self.workers = workers
+        self.pages_per_shard = pages_per_shard
+        self.start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context(self.start_method)
+                )
+            return self._executor
+    
+    @contextmanager
+    def _share(self, pdf: PdfSource) -> Iterator[Tuple]:
+        """
+        Make a PDF readable from worker processes.
+        
+        Yields:
+            Tuple: ("path", path) or ("shm", block name, size)
+        """
+        if isinstance(pdf, str):
+            yield ("path", pdf)
+            return
+        
+        with open_pdf(pdf) as stream:
+            stream.seek(0, io.SEEK_END)
+            size = stream.tell()
+            block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+            try:
+                stream.seek(0)
+                position = 0
+                while position < size:
+                    data = stream.read(min(1 << 20, size - position))
+                    block.buf[position:position + len(data)] = data
+                    position += len(data)
+                stream.seek(0)
+                yield ("shm", block.name, size)
+            finally:
+                block.close()
+                block.unlink()
+    
+    def iter_chunk_batches(self, pdf: PdfSource, metadata: Dict[str, Any], chunk_size: int,
+                           chunk_overlap: int) -> Iterator[Tuple[int, ChunkBatch]]:
+        """
+        Parse and split a PDF in parallel, yielding one chunk batch per shard in page order.
+        
+        Args:
+            pdf (PdfSource): Path, binary file-like object or mmap
+            metadata (Dict): Metadata copied into every chunk (a "page" key is added)
+            chunk_size (int): Splitter chunk size
+            chunk_overlap (int): Splitter chunk overlap
+            
+        Yields:
+            Tuple[int, ChunkBatch]: (pages in the shard, the shard's chunks)
+        """
+        with open_pdf(pdf) as stream:
+            page_count = len(PdfReader(stream).pages)
+        if not page_count:
+            return
+        
+        executor = self._get_executor()
+        shards = deque((first, min(first + self.pages_per_shard, page_count))
+                       for first in range(0, page_count, self.pages_per_shard))
+        pending = deque()
+        with self._share(pdf) as location:
+            try:
+                while shards or pending:
+                    # Keep every worker busy without queueing the whole document
+                    while shards and len(pending) < self.workers * 2:
+                        first, last = shards.popleft()
+                        pending.append((last - first, executor.submit(
+                            _parse_shard, location, first, last, metadata, chunk_size, chunk_overlap
+                        )))
+                    pages, future = pending.popleft()
+                    yield pages, future.result()
+            finally:
+                # Stopped early (cancelled or failed): don't parse the rest
+                for _, future in pending:
+                    future.cancel()
+                for _, future in pending:
+                    if not future.cancelled():
+                        future.exception()
+    
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+
+_parse_pool: Optional[PdfParsePool] = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool() -> Optional[PdfParsePool]:
+    """
+    Get the process-wide PDF parse pool, configured from the settings in prompts.yaml.
+    
+    Returns:
+        Optional[PdfParsePool]: The shared pool, or None if PDFs are parsed in the calling thread
+    """
+    global _parse_pool
+    settings = get_config().setting("rag")
+    workers = settings.get("parse_workers", 0)
+    if workers is None or workers < 0:
+        workers = os.cpu_count() or 1
+    if not workers:
+        return None
+    if _parse_pool is None:
+        with _parse_pool_lock:
+            if _parse_pool is None:
+                _parse_pool = PdfParsePool(
+                    workers=workers,
+                    pages_per_shard=settings.get("parse_pages_per_shard", 8),
+                )
+    return _parse_pool
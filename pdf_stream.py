@@ -0,0 +1,80 @@
+import hashlib
+import mmap
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Tuple, Union
+
+from pypdf import PdfReader
+
+PdfSource = Union[str, BinaryIO, mmap.mmap]
+
+
+@contextmanager
+def open_pdf(source: PdfSource) -> Iterator[BinaryIO]:
+    """
+    Open a PDF for lazy reading.
+    
+    Paths are memory-mapped, so pages are paged in by the OS as they are parsed
+    instead of the whole file being read up front. File-like objects (including
+    Streamlit uploads) and mmap objects are used as they are.
+    
+    Args:
+        source (PdfSource): Path, binary file-like object or memory-mapped buffer
+        
+    Yields:
+        BinaryIO: A seekable binary stream positioned at the start
+    """
+    if isinstance(source, str):
+        with open(source, "rb") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+    else:
+        source.seek(0)
+        yield source
+
+
+def stream_sha256(stream: BinaryIO, block_size: int = 1 << 20) -> str:
+    """
+    Hash a binary stream.
+    
+    In-memory streams (BytesIO, uploads) and mmap objects are hashed through their
+    buffer without touching the stream position, so they can be hashed while another
+    thread reads them. Other streams are read in blocks and rewound.
+    
+    Args:
+        stream (BinaryIO): The stream
+        block_size (int): Bytes read per block
+        
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    if isinstance(stream, mmap.mmap):
+        return hashlib.sha256(stream).hexdigest()
+    if hasattr(stream, "getbuffer"):
+        with stream.getbuffer() as view:
+            return hashlib.sha256(view).hexdigest()
+    
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for block in iter(lambda: stream.read(block_size), b""):
+        digest.update(block)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def iter_pdf_pages(stream: BinaryIO) -> Iterator[Tuple[int, str]]:
+    """
+    Extract the text of a PDF one page at a time.
+    
+    pypdf only parses the cross-reference table when the reader is created;
+    each page's content stream is decoded when the page is reached, so the
+    text of only one page is held at a time.
+    
+    Args:
+        stream (BinaryIO): Seekable binary stream of the PDF
+        
+    Yields:
+        Tuple[int, str]: (zero-based page number, page text)
+    """
+    reader = PdfReader(stream)
+    for number in range(len(reader.pages)):
+        yield number, reader.pages[number].extract_text() or ""
@@ -0,0 +1,56 @@
+from typing import Callable, Optional
+
+RUNNING = "running"
+COMPLETE = "complete"
+ERROR = "error"
+
+
+class ProgressEvent:
+    """
+    A progress update of one stage of a handler operation.
+    
+    The states match st.status, so a UI can show an event as it is; other
+    consumers (API workers, batch jobs) can log it or ignore it.
+    """
+    
+    def __init__(self, stage: str, label: str, state: str = RUNNING, message: Optional[str] = None,
+                 elapsed: Optional[float] = None):
+        """
+        Initialize the event.
+        
+        Args:
+            stage (str): The stage the event belongs to (e.g. "analysis", "roadmap")
+            label (str): Short human-readable description of what is happening
+            state (str): "running", "complete" or "error"
+            message (str): Optional detail line
+            elapsed (float): Seconds the stage took, on completion
+        """
+        self.stage = stage
+        self.label = label
+        self.state = state
+        self.message = message
+        self.elapsed = elapsed
+    
+    def __repr__(self) -> str:
+        return f"ProgressEvent({self.stage!r}, {self.label!r}, state={self.state!r})"
+
+
+# Receives progress events; always called on the thread that called the handler
+ProgressCallback = Callable[[ProgressEvent], None]
+
+
+def emit(callback: Optional[ProgressCallback], stage: str, label: str, state: str = RUNNING,
+         message: Optional[str] = None, elapsed: Optional[float] = None):
+    """
+    Send a progress event if a callback was given.
+    
+    Args:
+        callback (ProgressCallback): The receiver, or None
+        stage (str): The stage the event belongs to
+        label (str): Short human-readable description
+        state (str): "running", "complete" or "error"
+        message (str): Optional detail line
+        elapsed (float): Seconds the stage took, on completion
+    """
+    if callback is not None:
+        callback(ProgressEvent(stage, label, state, message, elapsed))
@@ -0,0 +1,576 @@
+import asyncio
+import email.utils
+import os
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from config import get_config
+from fake_llm import FakeLLM
+
+# Responses worth retrying: rate limited, or the provider is briefly unavailable
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+PROVIDER_DEFAULTS = {
+    "openai": {"base_url": "https://api.openai.com/v1", "api_key_env": "OPENAI_API_KEY"},
+    "groq": {"base_url": "https://api.groq.com/openai/v1", "api_key_env": "GROQ_API_KEY"},
+    # Answered in-process by fake_llm.FakeLLM; the URL is never resolved
+    "fake": {"base_url": "http://fake-llm.invalid/v1", "api_key_env": "FAKE_LLM_API_KEY"},
+}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header.
+    
+    Args:
+        value (str): Header value, either delay seconds or an HTTP date
+        
+    Returns:
+        Optional[float]: Seconds to wait, or None if absent or unparseable
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket that hands out reservations instead of blocking.
+    
+    reserve() takes a token (the balance may go negative) and returns how long
+    the caller must wait before using it, so the same bucket paces threads
+    (time.sleep) and coroutines (asyncio.sleep) on any event loop. A rate
+    limit response can pause the whole bucket.
+    """
+    
+    def __init__(self, rate_per_second: float, capacity: float):
+        """
+        Initialize a full bucket.
+        
+        Args:
+            rate_per_second (float): Tokens added per second (0 disables rate limiting)
+            capacity (float): Maximum tokens, i.e. the allowed burst
+        """
+        self.rate = rate_per_second
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+    
+    def reserve(self) -> float:
+        """
+        Take one token.
+        
+        Returns:
+            float: Seconds to wait before sending
+        """
+        with self._lock:
+            now = time.monotonic()
+            pause = max(0.0, self._paused_until - now)
+            if self.rate <= 0:
+                return pause
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(pause, -self._tokens / self.rate)
+    
+    def pause(self, seconds: float):
+        """
+        Hold back every reservation for the given time (e.g. after a 429 with Retry-After).
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class _Waiter:
+    __slots__ = ("signal", "granted")
+    
+    def __init__(self, signal):
+        self.signal = signal
+        self.granted = False
+
+
+class ConcurrencyLimiter:
+    """
+    FIFO semaphore that threads and coroutines (on any event loop) can share.
+    
+    Callers that cannot get a slot immediately are queued; the queue length is
+    the provider's queue depth.
+    """
+    
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._active = 0
+        self._waiters: deque = deque()
+        self._lock = threading.Lock()
+    
+    @property
+    def in_flight(self) -> int:
+        return self._active
+    
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+    
+    def acquire(self):
+        with self._lock:
+            if self._active < self.limit and not self._waiters:
+                self._active += 1
+                return
+            waiter = _Waiter(threading.Event())
+            self._waiters.append(waiter)
+        waiter.signal.wait()
+    
+    async def acquire_async(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._active < self.limit and not self._waiters:
+                self._active += 1
+                return
+            waiter = _Waiter((loop, loop.create_future()))
+            self._waiters.append(waiter)
+        try:
+            await waiter.signal[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                if not waiter.granted:
+                    self._waiters.remove(waiter)
+                    raise
+            # The slot was handed over while we were being cancelled: pass it on
+            self.release()
+            raise
+    
+    def release(self):
+        with self._lock:
+            if not self._waiters:
+                self._active -= 1
+                return
+            # Hand the slot straight to the next waiter
+            waiter = self._waiters.popleft()
+            waiter.granted = True
+        if isinstance(waiter.signal, threading.Event):
+            waiter.signal.set()
+        else:
+            loop, future = waiter.signal
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+
+class ProviderStats:
+    """
+    Counters of one provider, updated by its transports.
+    """
+    
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failures = 0
+        self.wait_seconds = 0.0
+        self._lock = threading.Lock()
+    
+    def add(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+
+def _retry_delay(provider: "ProviderGateway", attempt: int, response: Optional[httpx.Response]) -> Optional[float]:
+    """
+    Decide whether and how long to wait before retrying a request.
+    
+    Args:
+        provider (ProviderGateway): The provider called
+        attempt (int): Number of attempts made so far
+        response (httpx.Response): The failed response, or None after a connection error
+        
+    Returns:
+        Optional[float]: Seconds to wait, or None to give up
+    """
+    retry_after = None
+    if response is not None:
+        retry_after = parse_retry_after(response.headers.get("retry-after"))
+        if response.status_code == 429:
+            provider.stats.add(rate_limited=1)
+            # The limit is shared by every caller, so hold them all back
+            if retry_after is not None:
+                provider.bucket.pause(min(retry_after, provider.max_retry_after))
+    if attempt > provider.max_retries or (retry_after or 0) > provider.max_retry_after:
+        return None
+    
+    provider.stats.add(retries=1)
+    if retry_after is not None:
+        return retry_after + random.uniform(0, provider.backoff_base)
+    # Exponential backoff with full jitter
+    return random.uniform(0, min(provider.backoff_max, provider.backoff_base * 2 ** (attempt - 1)))
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """
+    Response body that gives its concurrency slot back once it is read to the end,
+    closed, or abandoned part way (its iterator closed, e.g. when a streaming client
+    disconnects), whichever comes first. release must be safe to call twice (see _once()).
+    """
+    
+    def __init__(self, stream: httpx.SyncByteStream, release):
+        self._stream = stream
+        self._release = release
+    
+    def __iter__(self):
+        try:
+            yield from self._stream
+        finally:
+            self._release()
+    
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            self._release()
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    """
+    Async counterpart of _ReleasingStream.
+    """
+    
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self._stream = stream
+        self._release = release
+    
+    async def __aiter__(self):
+        try:
+            async for part in self._stream:
+                yield part
+        finally:
+            self._release()
+    
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+def _once(release):
+    # A response's slot is given back by whichever of reading, closing or abandoning it ends first
+    done = threading.Lock()
+    
+    def call():
+        if done.acquire(blocking=False):
+            release()
+    return call
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """
+    Sync httpx transport that paces, caps and retries requests to one provider.
+    
+    A concurrency slot is held until the response body is closed, so streamed
+    completions count as in flight while they stream.
+    """
+    
+    def __init__(self, provider: "ProviderGateway", transport: Optional[httpx.BaseTransport] = None):
+        self.provider = provider
+        self.transport = transport or httpx.HTTPTransport(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+        )
+    
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        provider = self.provider
+        attempt = 0
+        while True:
+            attempt += 1
+            started = time.monotonic()
+            time.sleep(provider.bucket.reserve())
+            provider.limiter.acquire()
+            provider.stats.add(requests=1, wait_seconds=time.monotonic() - started)
+            release = _once(provider.limiter.release)
+            try:
+                response = self.transport.handle_request(request)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                release()
+                delay = _retry_delay(provider, attempt, None)
+                if delay is None:
+                    provider.stats.add(failures=1)
+                    raise
+                time.sleep(delay)
+                continue
+            except BaseException:
+                release()
+                provider.stats.add(failures=1)
+                raise
+            
+            if response.status_code in RETRY_STATUSES:
+                delay = _retry_delay(provider, attempt, response)
+                if delay is not None:
+                    response.close()
+                    release()
+                    time.sleep(delay)
+                    continue
+                provider.stats.add(failures=1)
+            return httpx.Response(
+                status_code=response.status_code,
+                headers=response.headers,
+                stream=_ReleasingStream(response.stream, release),
+                extensions=response.extensions,
+                request=request,
+            )
+    
+    def close(self):
+        self.transport.close()
+
+
+class AsyncRateLimitedTransport(httpx.AsyncBaseTransport):
+    """
+    Async counterpart of RateLimitedTransport, sharing the provider's limits.
+    
+    Connection pools are bound to an event loop, so one inner transport is kept
+    per loop; the same client can then be used from several loops (e.g. one per
+    worker thread).
+    """
+    
+    def __init__(self, provider: "ProviderGateway", transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.provider = provider
+        # A given transport must not be bound to an event loop
+        self.transport = transport
+        self._transports: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncBaseTransport]" = (
+            weakref.WeakKeyDictionary()
+        )
+    
+    def _transport(self) -> httpx.AsyncBaseTransport:
+        if self.transport is not None:
+            return self.transport
+        loop = asyncio.get_running_loop()
+        transport = self._transports.get(loop)
+        if transport is None:
+            transport = self._transports[loop] = httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+            )
+        return transport
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        provider = self.provider
+        attempt = 0
+        while True:
+            attempt += 1
+            started = time.monotonic()
+            await asyncio.sleep(provider.bucket.reserve())
+            await provider.limiter.acquire_async()
+            provider.stats.add(requests=1, wait_seconds=time.monotonic() - started)
+            release = _once(provider.limiter.release)
+            try:
+                response = await self._transport().handle_async_request(request)
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                release()
+                delay = _retry_delay(provider, attempt, None)
+                if delay is None:
+                    provider.stats.add(failures=1)
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                release()
+                provider.stats.add(failures=1)
+                raise
+            
+            if response.status_code in RETRY_STATUSES:
+                delay = _retry_delay(provider, attempt, response)
+                if delay is not None:
+                    await response.aclose()
+                    release()
+                    await asyncio.sleep(delay)
+                    continue
+                provider.stats.add(failures=1)
+            return httpx.Response(
+                status_code=response.status_code,
+                headers=response.headers,
+                stream=_AsyncReleasingStream(response.stream, release),
+                extensions=response.extensions,
+                request=request,
+            )
+    
+    async def aclose(self):
+        for transport in list(self._transports.values()):
+            await transport.aclose()
+        if self.transport is not None:
+            await self.transport.aclose()
+
+
+class ProviderGateway:
+    """
+    Shared entry point for all calls to one model provider.
+    
+    Every request, sync or async, streamed or not, passes the provider's token
+    bucket and concurrency cap, and 429/5xx responses are retried with
+    exponential backoff and jitter, waiting at least as long as Retry-After
+    asks. Models get the gateway's httpx clients, so phi agents are limited
+    without changes; achat() is a direct async call for callers that don't
+    need an agent.
+    """
+    
+    def __init__(self, name: str, base_url: str, api_key: Optional[str] = None, max_concurrency: int = 8,
+                 requests_per_minute: float = 0, burst: int = 10, max_retries: int = 5,
+                 backoff_base: float = 0.5, backoff_max: float = 30.0, max_retry_after: float = 60.0,
+                 timeout: float = 120.0, transport: Optional[httpx.BaseTransport] = None,
+                 async_transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Initialize the gateway.
+        
+        Args:
+            name (str): Provider name, for metrics
+            base_url (str): Base URL of the OpenAI-compatible API (e.g. a local fake server)
+            api_key (str): API key sent by achat()
+            max_concurrency (int): Maximum requests in flight
+            requests_per_minute (float): Sustained request rate (0 for no rate limit)
+            burst (int): Requests allowed back to back before pacing starts
+            max_retries (int): Retries per request after the first attempt
+            backoff_base (float): First backoff ceiling in seconds, doubled per retry
+            backoff_max (float): Largest backoff ceiling in seconds
+            max_retry_after (float): Longest Retry-After honoured; longer ones fail the request
+            timeout (float): Request timeout in seconds
+            transport (httpx.BaseTransport): Sends sync requests instead of HTTP (e.g. a FakeLLM)
+            async_transport (httpx.AsyncBaseTransport): Sends async requests instead of HTTP
+        """
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_retry_after = max_retry_after
+        self.bucket = TokenBucket(requests_per_minute / 60.0, burst)
+        self.limiter = ConcurrencyLimiter(max_concurrency)
+        self.stats = ProviderStats()
+        client_timeout = httpx.Timeout(timeout, connect=10.0)
+        self.http_client = httpx.Client(transport=RateLimitedTransport(self, transport), timeout=client_timeout)
+        self.async_http_client = httpx.AsyncClient(
+            transport=AsyncRateLimitedTransport(self, async_transport), timeout=client_timeout
+        )
+    
+    async def achat(self, model: str, messages: List[Dict[str, str]], **params) -> Dict[str, Any]:
+        """
+        Call the chat completions endpoint.
+        
+        Args:
+            model (str): Model id
+            messages (List[Dict[str, str]]): Chat messages with role and content
+            **params: Extra request fields (temperature, max_tokens, ...)
+            
+        Returns:
+            Dict[str, Any]: The decoded response
+            
+        Raises:
+            httpx.HTTPStatusError: If the request still failed after retries
+        """
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        response = await self.async_http_client.post(
+            f"{self.base_url}/chat/completions",
+            json={"model": model, "messages": messages, **params},
+            headers=headers,
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Get queue depth and counters.
+        
+        Returns:
+            Dict[str, Any]: In-flight and queued requests plus request/retry/failure counters
+        """
+        stats = self.stats
+        return {
+            "in_flight": self.limiter.in_flight,
+            "queued": self.limiter.queued,
+            "max_concurrency": self.limiter.limit,
+            "requests": stats.requests,
+            "retries": stats.retries,
+            "rate_limited": stats.rate_limited,
+            "failures": stats.failures,
+            "avg_wait_seconds": stats.wait_seconds / stats.requests if stats.requests else 0.0,
+        }
+
+
+_providers: Dict[str, ProviderGateway] = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider(name: str) -> ProviderGateway:
+    """
+    Get the process-wide gateway of a provider, configured from settings.providers in prompts.yaml.
+    
+    Args:
+        name (str): Provider name ("openai", "groq" or "fake")
+        
+    Returns:
+        ProviderGateway: The shared gateway
+    """
+    if name not in _providers:
+        with _providers_lock:
+            if name not in _providers:
+                settings = get_config().setting("providers")
+                options = dict(PROVIDER_DEFAULTS.get(name, PROVIDER_DEFAULTS["openai"]))
+                for section in (settings.get("defaults"), settings.get(name)):
+                    options.update({key: value for key, value in (section or {}).items() if value is not None})
+                fake = None
+                if name == "fake":
+                    fake = FakeLLM(
+                        latency=options.get("latency_seconds", 0.2),
+                        tokens_per_second=options.get("tokens_per_second", 0.0),
+                        completion_tokens=options.get("completion_tokens", 150),
+                        responses=options.get("responses"),
+                        seed=options.get("seed", 0),
+                    )
+                _providers[name] = ProviderGateway(
+                    name=name,
+                    base_url=options["base_url"],
+                    api_key=os.getenv(options["api_key_env"]) or ("fake" if fake else None),
+                    max_concurrency=options.get("max_concurrency", 8),
+                    requests_per_minute=options.get("requests_per_minute", 0),
+                    burst=options.get("burst", 10),
+                    max_retries=options.get("max_retries", 5),
+                    backoff_base=options.get("backoff_base_seconds", 0.5),
+                    backoff_max=options.get("backoff_max_seconds", 30.0),
+                    max_retry_after=options.get("max_retry_after_seconds", 60.0),
+                    timeout=options.get("timeout_seconds", 120.0),
+                    transport=fake,
+                    async_transport=fake,
+                )
+    return _providers[name]
+
+
+def known_providers() -> List[str]:
+    """
+    Get the names of the providers a handler can use.
+    
+    Returns:
+        List[str]: The built-in providers and any configured under settings.providers
+    """
+    configured = [name for name in get_config().setting("providers") if name != "defaults"]
+    return list(dict.fromkeys(list(PROVIDER_DEFAULTS) + configured))
+
+
+def provider_metrics() -> Dict[str, Dict[str, Any]]:
+    """
+    Get the metrics of every provider used so far.
+    
+    Returns:
+        Dict[str, Dict[str, Any]]: Metrics per provider name
+    """
+    with _providers_lock:
+        providers = dict(_providers)
+    return {name: provider.metrics() for name, provider in providers.items()}
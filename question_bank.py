@@ -0,0 +1,348 @@
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config import get_config, resolve_path
+from embeddings import EmbeddingBackend, get_embeddings
+from quiz import QuizQuestion
+from response_cache import LRUCache, normalize_prompt
+from telemetry import get_telemetry
+
+
+def _pack(vector: Sequence[float]) -> bytes:
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return array("f", (value / norm for value in vector)).tobytes()
+
+
+def _unpack(blob: bytes) -> array:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector
+
+
+def _cosine(first: Sequence[float], second: Sequence[float]) -> float:
+    # Both are stored as unit vectors
+    return sum(a * b for a, b in zip(first, second))
+
+
+class QuestionBank:
+    """
+    Persistent store of generated quiz questions for reuse across students.
+    
+    Questions are kept in SQLite, indexed by topic, difficulty and focus area
+    (topics and focus areas compared case- and whitespace-insensitively). Each
+    focus area also has an embedding, so a request for "for loops" can draw on
+    questions stored under "loops". Questions served to a learner are recorded
+    and not served to them again, and questions older than max_age_seconds
+    are not served at all.
+    """
+    
+    def __init__(self, path: str, embeddings: Optional[EmbeddingBackend] = None,
+                 max_age_seconds: float = 30 * 86400, focus_similarity: float = 0.7,
+                 duplicate_similarity: float = 0.92):
+        """
+        Initialize the bank.
+        
+        Args:
+            path (str): Path of the SQLite database file
+            embeddings (EmbeddingBackend): Embeds focus areas and question stems; None uses
+                settings.question_bank.embedding_backend
+            max_age_seconds (float): Age after which a question is no longer served
+            focus_similarity (float): Minimum cosine similarity of another focus area of the same
+                topic for its questions to be served too
+            duplicate_similarity (float): Cosine similarity to a stored question of the same topic,
+                difficulty and focus area at which a new question is not stored
+        """
+        self.path = path
+        self._embeddings = embeddings
+        self.max_age_seconds = max_age_seconds
+        self.focus_similarity = focus_similarity
+        self.duplicate_similarity = duplicate_similarity
+        self._focus_vectors = LRUCache(1024)
+        self._lock = threading.Lock()
+        self.served = 0
+        self.shortfall = 0
+        self.stored = 0
+        self.duplicates = 0
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(
+                "CREATE TABLE IF NOT EXISTS questions ("
+                " id INTEGER PRIMARY KEY,"
+                " topic_key TEXT NOT NULL,"
+                " difficulty TEXT NOT NULL,"
+                " focus_key TEXT NOT NULL,"
+                " stem_key TEXT NOT NULL,"
+                " question TEXT NOT NULL,"
+                " embedding BLOB NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " times_served INTEGER NOT NULL DEFAULT 0,"
+                " UNIQUE (topic_key, difficulty, stem_key));"
+                "CREATE INDEX IF NOT EXISTS questions_lookup ON questions (topic_key, difficulty, focus_key, created_at);"
+                "CREATE TABLE IF NOT EXISTS focus_areas ("
+                " topic_key TEXT NOT NULL,"
+                " focus_key TEXT NOT NULL,"
+                " embedding BLOB NOT NULL,"
+                " PRIMARY KEY (topic_key, focus_key));"
+                "CREATE TABLE IF NOT EXISTS served ("
+                " learner TEXT NOT NULL,"
+                " question_id INTEGER NOT NULL,"
+                " served_at REAL NOT NULL,"
+                " PRIMARY KEY (learner, question_id));"
+            )
+            self._conn.commit()
+    
+    @property
+    def embeddings(self) -> EmbeddingBackend:
+        if self._embeddings is None:
+            settings = get_config().setting("question_bank")
+            self._embeddings = get_embeddings(settings.get("embedding_backend", "hashing"))
+        return self._embeddings
+    
+    def _focus_vector(self, focus_area: str) -> array:
+        key = normalize_prompt(focus_area)
+        vector = self._focus_vectors.get(key)
+        if vector is None:
+            vector = _unpack(_pack(self.embeddings.embed_query(key)))
+            self._focus_vectors.put(key, vector)
+        return vector
+    
+    def _focus_keys(self, topic_key: str, focus_area: str) -> List[str]:
+        """
+        Find the stored focus areas of a topic that can serve a requested one.
+        
+        Returns:
+            List[str]: The requested focus key first, then similar ones, most similar first
+        """
+        focus_key = normalize_prompt(focus_area)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT focus_key, embedding FROM focus_areas WHERE topic_key = ? AND focus_key != ?",
+                (topic_key, focus_key),
+            ).fetchall()
+        if not rows:
+            return [focus_key]
+        vector = self._focus_vector(focus_area)
+        similar = sorted(
+            ((_cosine(vector, _unpack(blob)), key) for key, blob in rows), reverse=True
+        )
+        return [focus_key] + [key for similarity, key in similar if similarity >= self.focus_similarity]
+    
+    def draw(self, topic: str, difficulty: str, focus_area: str, count: int,
+             learner: Optional[str] = None) -> List[Tuple[int, QuizQuestion]]:
+        """
+        Find questions for a quiz in the bank.
+        
+        Questions of the requested focus area come first, then those of similar
+        ones; within each, the least served first. They keep being stored; pass
+        the ids of those the quiz ends up using to mark_served().
+        
+        Args:
+            topic (str): The quiz topic
+            difficulty (str): The difficulty level
+            focus_area (str): The focus area
+            count (int): Questions wanted
+            learner (str): Id of the student, whose earlier questions are skipped
+            
+        Returns:
+            List[Tuple[int, QuizQuestion]]: Up to count (question id, question) pairs, the
+                questions labelled with the requested focus area
+        """
+        if count <= 0:
+            return []
+        topic_key = normalize_prompt(topic)
+        focus_keys = self._focus_keys(topic_key, focus_area)
+        now = time.time()
+        rows = []
+        with self._lock:
+            for focus_key in focus_keys:
+                rows += self._conn.execute(
+                    "SELECT id, question FROM questions"
+                    " WHERE topic_key = ? AND difficulty = ? AND focus_key = ? AND created_at >= ?"
+                    " AND id NOT IN (SELECT question_id FROM served WHERE learner = ?)"
+                    " ORDER BY times_served, RANDOM() LIMIT ?",
+                    (topic_key, difficulty.casefold(), focus_key, now - self.max_age_seconds,
+                     learner or "", count - len(rows)),
+                ).fetchall()
+                if len(rows) >= count:
+                    break
+            self.shortfall += count - len(rows)
+        telemetry = get_telemetry()
+        telemetry.count("question_bank_questions_total", len(rows), result="hit")
+        telemetry.count("question_bank_questions_total", count - len(rows), result="miss")
+        
+        questions = []
+        for row_id, question in rows:
+            question = QuizQuestion.from_dict(json.loads(question))
+            question.focus_area = focus_area
+            questions.append((row_id, question))
+        return questions
+    
+    def mark_served(self, question_ids: Sequence[int], learner: Optional[str] = None):
+        """
+        Record that drawn questions were served in a quiz.
+        
+        Args:
+            question_ids (Sequence[int]): Ids from draw() of the questions the quiz used
+            learner (str): Id of the student, who will not get them again
+        """
+        if not question_ids:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany("UPDATE questions SET times_served = times_served + 1 WHERE id = ?",
+                                   [(row_id,) for row_id in question_ids])
+            if learner:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO served (learner, question_id, served_at) VALUES (?, ?, ?)",
+                    [(learner, row_id, now) for row_id in question_ids],
+                )
+            self._conn.commit()
+            self.served += len(question_ids)
+    
+    def add(self, topic: str, difficulty: str, questions: Sequence[QuizQuestion],
+            learner: Optional[str] = None) -> int:
+        """
+        Store newly generated questions.
+        
+        Questions repeating a stored one of the same topic and difficulty
+        (same stem, or a very similar one in the same focus area) are skipped.
+        
+        Args:
+            topic (str): The quiz topic
+            difficulty (str): The difficulty level the questions were generated for
+            questions (Sequence[QuizQuestion]): The questions, with their focus areas
+            learner (str): Id of the student they were served to, who will not get them again
+            
+        Returns:
+            int: Number of questions stored
+        """
+        if not questions:
+            return 0
+        topic_key = normalize_prompt(topic)
+        difficulty = difficulty.casefold()
+        vectors = [_pack(vector) for vector in self.embeddings.embed_documents([q.stem for q in questions])]
+        focus_areas = {normalize_prompt(q.focus_area): q.focus_area for q in questions}
+        focus_vectors = {key: _pack(self._focus_vector(area)) for key, area in focus_areas.items()}
+        now = time.time()
+        stored = 0
+        with self._lock:
+            existing: Dict[str, List[array]] = {}
+            for focus_key in focus_areas:
+                existing[focus_key] = [
+                    _unpack(blob) for (blob,) in self._conn.execute(
+                        "SELECT embedding FROM questions WHERE topic_key = ? AND difficulty = ? AND focus_key = ?",
+                        (topic_key, difficulty, focus_key),
+                    )
+                ]
+            for question, blob in zip(questions, vectors):
+                focus_key = normalize_prompt(question.focus_area)
+                vector = _unpack(blob)
+                if any(_cosine(vector, other) >= self.duplicate_similarity for other in existing[focus_key]):
+                    self.duplicates += 1
+                    continue
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO questions"
+                    " (topic_key, difficulty, focus_key, stem_key, question, embedding, created_at, times_served)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (topic_key, difficulty, focus_key, normalize_prompt(question.stem),
+                     json.dumps(question.as_dict()), blob, now, 1 if learner else 0),
+                )
+                if not cursor.rowcount:
+                    self.duplicates += 1
+                    continue
+                existing[focus_key].append(vector)
+                stored += 1
+                if learner:
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO served (learner, question_id, served_at) VALUES (?, ?, ?)",
+                        (learner, cursor.lastrowid, now),
+                    )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO focus_areas (topic_key, focus_key, embedding) VALUES (?, ?, ?)",
+                [(topic_key, key, blob) for key, blob in focus_vectors.items()],
+            )
+            self._conn.commit()
+            self.stored += stored
+        return stored
+    
+    def purge_expired(self) -> int:
+        """
+        Delete questions too old to be served, and their served records.
+        
+        Returns:
+            int: Number of questions deleted
+        """
+        with self._lock:
+            cutoff = time.time() - self.max_age_seconds
+            self._conn.execute(
+                "DELETE FROM served WHERE question_id IN (SELECT id FROM questions WHERE created_at < ?)", (cutoff,)
+            )
+            cursor = self._conn.execute("DELETE FROM questions WHERE created_at < ?", (cutoff,))
+            self._conn.commit()
+            return cursor.rowcount
+    
+    def clear(self):
+        """
+        Remove every question.
+        """
+        with self._lock:
+            self._conn.executescript("DELETE FROM served; DELETE FROM questions; DELETE FROM focus_areas;")
+            self._conn.commit()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get counters of questions served from and added to the bank.
+        
+        Returns:
+            Dict[str, Any]: Questions served, shortfall (requested but not in the bank), stored,
+                duplicates skipped, questions held and the share of requested questions served
+        """
+        with self._lock:
+            (questions,) = self._conn.execute("SELECT COUNT(*) FROM questions").fetchone()
+            requested = self.served + self.shortfall
+            return {
+                "served": self.served,
+                "shortfall": self.shortfall,
+                "stored": self.stored,
+                "duplicates": self.duplicates,
+                "questions": questions,
+                "hit_rate": self.served / requested if requested else 0.0,
+            }
+
+
+_question_bank: Optional[QuestionBank] = None
+_question_bank_lock = threading.Lock()
+
+
+def get_question_bank() -> Optional[QuestionBank]:
+    """
+    Get the process-wide question bank, configured from settings.question_bank in prompts.yaml.
+    
+    Returns:
+        Optional[QuestionBank]: The shared bank, or None if it is disabled
+    """
+    global _question_bank
+    settings = get_config().setting("question_bank")
+    if not settings.get("enabled", True):
+        return None
+    if _question_bank is None:
+        with _question_bank_lock:
+            if _question_bank is None:
+                _question_bank = QuestionBank(
+                    path=resolve_path(settings.get("path", ".cache/questions.sqlite3")),
+                    max_age_seconds=settings.get("max_age_days", 30) * 86400,
+                    focus_similarity=settings.get("focus_similarity", 0.7),
+                    duplicate_similarity=settings.get("duplicate_similarity", 0.92),
+                )
+    return _question_bank
@@ -0,0 +1,235 @@
+import json
+import re
+import string
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+LETTERS = string.ascii_uppercase
+
+# Focus area used when none is given
+GENERAL = "general"
+
+_FENCE = re.compile(r"^```[a-zA-Z]*\s*|\s*```$")
+_WORD = re.compile(r"\w+")
+
+
+def _stem_words(stem: str) -> frozenset:
+    return frozenset(_WORD.findall(stem.casefold()))
+
+
+class QuizQuestion:
+    """
+    One multiple-choice (or true/false) quiz question.
+    """
+    
+    def __init__(self, stem: str, options: Sequence[str], answer: str, explanation: str = "",
+                 difficulty: str = "", focus_area: str = GENERAL):
+        """
+        Initialize the question.
+        
+        Args:
+            stem (str): The question text
+            options (Sequence[str]): The answer options, labelled A, B, C, ... in order
+            answer (str): Letter of the correct option
+            explanation (str): Why the answer is correct
+            difficulty (str): The difficulty level
+            focus_area (str): The focus area the question tests
+        """
+        self.stem = stem
+        self.options = list(options)
+        self.answer = answer
+        self.explanation = explanation
+        self.difficulty = difficulty
+        self.focus_area = focus_area
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], difficulty: str = "",
+                  focus_area: str = GENERAL) -> Optional["QuizQuestion"]:
+        """
+        Build a question from a model's JSON object.
+        
+        The answer may be given as a letter, a 0-based index or the text of an option;
+        a one-letter answer beyond the options (e.g. "y" of ["x", "y"]) is read as option text.
+        
+        Args:
+            data (dict): The JSON object
+            difficulty (str): Difficulty used when the object has none
+            focus_area (str): Focus area used when the object has none
+            
+        Returns:
+            Optional[QuizQuestion]: The question, or None if the object is not a usable question
+        """
+        if not isinstance(data, dict):
+            return None
+        stem = " ".join(str(data.get("stem") or data.get("question") or "").split())
+        options = data.get("options")
+        if not stem or not isinstance(options, list) or not 2 <= len(options) <= len(LETTERS):
+            return None
+        options = [re.sub(r"^[A-Za-z][).:]\s+", "", " ".join(str(option).split())) for option in options]
+        
+        answer = data.get("answer")
+        if isinstance(answer, int) and not isinstance(answer, bool):
+            index = answer
+        else:
+            answer = str(answer or "").strip()
+            letter = answer.rstrip(").:").upper()
+            if len(letter) == 1 and letter in LETTERS[:len(options)]:
+                index = LETTERS.index(letter)
+            else:
+                lowered = [option.casefold() for option in options]
+                index = lowered.index(answer.casefold()) if answer.casefold() in lowered else -1
+        if not 0 <= index < len(options):
+            return None
+        
+        return cls(
+            stem=stem,
+            options=options,
+            answer=LETTERS[index],
+            explanation=str(data.get("explanation") or "").strip(),
+            difficulty=str(data.get("difficulty") or difficulty).strip(),
+            focus_area=str(data.get("focus_area") or focus_area).strip(),
+        )
+    
+    def is_correct(self, choice: str) -> bool:
+        """
+        Grade a student's choice.
+        
+        Args:
+            choice (str): The letter of the chosen option
+            
+        Returns:
+            bool: Whether it is the correct answer
+        """
+        return choice.strip().rstrip(").:").upper() == self.answer
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "stem": self.stem,
+            "options": self.options,
+            "answer": self.answer,
+            "explanation": self.explanation,
+            "difficulty": self.difficulty,
+            "focus_area": self.focus_area,
+        }
+
+
+def split_focus_areas(focus_areas: str) -> List[str]:
+    """
+    Split a free-text list of focus areas.
+    
+    Args:
+        focus_areas (str): Areas separated by commas, semicolons or new lines
+        
+    Returns:
+        List[str]: The distinct areas in order, or ["general"] if there are none
+    """
+    areas = []
+    seen = set()
+    for area in re.split(r"[,;\n]", focus_areas or ""):
+        area = " ".join(area.split())
+        if area and area.casefold() not in seen:
+            seen.add(area.casefold())
+            areas.append(area)
+    return areas or [GENERAL]
+
+
+def plan_shards(num_questions: int, focus_areas: Sequence[str], shard_size: int) -> List[Tuple[str, int]]:
+    """
+    Split a quiz into batches of questions that can be generated in parallel.
+    
+    Questions are spread evenly over the focus areas (earlier areas get the
+    remainder), and each area's share is cut into batches of at most
+    shard_size questions of similar size.
+    
+    Args:
+        num_questions (int): Questions in the quiz
+        focus_areas (Sequence[str]): The focus areas, e.g. from split_focus_areas()
+        shard_size (int): Most questions asked of one model call
+        
+    Returns:
+        List[Tuple[str, int]]: (focus area, number of questions) per batch
+    """
+    areas = list(focus_areas)[:num_questions] or [GENERAL]
+    shard_size = max(1, shard_size)
+    shards = []
+    for i, area in enumerate(areas):
+        share = num_questions // len(areas) + (1 if i < num_questions % len(areas) else 0)
+        parts = -(-share // shard_size)
+        shards += [(area, share // parts + (1 if j < share % parts else 0)) for j in range(parts)]
+    return shards
+
+
+def parse_questions(text: str, difficulty: str = "", focus_area: str = GENERAL) -> List[QuizQuestion]:
+    """
+    Parse the questions out of a model response.
+    
+    Accepts a JSON array of question objects or an object with a "questions"
+    array, optionally inside a code fence or after some prose. Objects that are
+    not usable questions are skipped.
+    
+    Args:
+        text (str): The response content
+        difficulty (str): Difficulty used for questions that have none
+        focus_area (str): Focus area used for questions that have none
+        
+    Returns:
+        List[QuizQuestion]: The parsed questions (empty if the response holds no JSON)
+    """
+    text = _FENCE.sub("", text.strip())
+    starts = [i for i in (text.find("["), text.find("{")) if i >= 0]
+    if not starts:
+        return []
+    try:
+        data, _ = json.JSONDecoder().raw_decode(text, min(starts))
+    except json.JSONDecodeError as e:
+        print(f"Could not parse quiz questions: {e}")
+        return []
+    if isinstance(data, dict):
+        data = data.get("questions", [data])
+    if not isinstance(data, list):
+        return []
+    questions = (QuizQuestion.from_dict(item, difficulty, focus_area) for item in data)
+    return [question for question in questions if question is not None]
+
+
+def dedupe_questions(questions: Sequence[QuizQuestion], threshold: float = 0.8) -> List[QuizQuestion]:
+    """
+    Drop questions that repeat an earlier one.
+    
+    Args:
+        questions (Sequence[QuizQuestion]): The questions, in order of preference
+        threshold (float): Word Jaccard similarity of two stems at or above which the later one is dropped
+        
+    Returns:
+        List[QuizQuestion]: The remaining questions in order
+    """
+    kept = []
+    kept_words: List[frozenset] = []
+    for question in questions:
+        words = _stem_words(question.stem)
+        if any(words == other or (words | other and len(words & other) / len(words | other) >= threshold)
+               for other in kept_words):
+            continue
+        kept.append(question)
+        kept_words.append(words)
+    return kept
+
+
+def quiz_markdown(questions: Sequence[QuizQuestion]) -> str:
+    """
+    Render questions as a markdown quiz with answers and explanations.
+    
+    Args:
+        questions (Sequence[QuizQuestion]): The questions
+        
+    Returns:
+        str: The quiz
+    """
+    blocks = []
+    for number, question in enumerate(questions, start=1):
+        lines = [f"**Question {number}:** {question.stem}", ""]
+        lines += [f"{LETTERS[i]}) {option}  " for i, option in enumerate(question.options)]
+        lines += ["", f"*Focus: {question.focus_area} · Difficulty: {question.difficulty}*", ""]
+        explanation = f" - {question.explanation}" if question.explanation else ""
+        lines.append(f"<details><summary>Answer</summary>\n\n**{question.answer}**{explanation}\n\n</details>")
+        blocks.append("\n".join(lines))
+    return "\n\n---\n\n".join(blocks)
@@ -0,0 +1,235 @@
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from config import get_config
+from response_cache import LRUCache
+from telemetry import get_telemetry
+
+# Quiz difficulty prefetched for each knowledge level
+LEVEL_DIFFICULTY = {
+    "beginner": "beginner",
+    "intermediate": "intermediate",
+    "advanced": "advanced",
+    "expert": "advanced",
+}
+
+# "### Phase 1: Foundations", "**Module 2 - Practice (Weeks 3-4)**", "1. Week 1: Basics", ...
+_MODULE = re.compile(
+    r"^\s*(?:#{1,6}\s*|[-*]\s+|\d+[.)]\s*)*\**\s*(?:phase|module|stage|unit|part|week)\s+\d+\s*\**\s*[:.)\-–—]\s*"
+    r"(?P<title>.+?)\s*$",
+    re.IGNORECASE,
+)
+_TIMING = re.compile(r"\s*[(\[][^()\[\]]*[)\]]\s*$")
+
+
+def quiz_difficulty(knowledge_level: str) -> str:
+    """
+    Get the quiz difficulty that suits a knowledge level.
+    
+    Args:
+        knowledge_level (str): The student's knowledge level
+        
+    Returns:
+        str: "beginner", "intermediate" or "advanced"
+    """
+    return LEVEL_DIFFICULTY.get((knowledge_level or "").strip().lower(), "intermediate")
+
+
+def roadmap_modules(roadmap: str, limit: int) -> List[str]:
+    """
+    Find the names of the first modules of a roadmap.
+    
+    Looks for headings, bold lines and list items like "Phase 1: Foundations",
+    "Module 2 - Practice" or "Week 1: Basics".
+    
+    Args:
+        roadmap (str): The roadmap markdown
+        limit (int): Most modules returned
+        
+    Returns:
+        List[str]: Distinct module names in roadmap order
+    """
+    modules = []
+    seen = set()
+    for line in (roadmap or "").splitlines():
+        match = _MODULE.match(line)
+        if not match:
+            continue
+        title = match.group("title").replace("**", "").replace("__", "").strip(" *_#:")
+        title = _TIMING.sub("", title).strip()
+        if title and title.casefold() not in seen:
+            seen.add(title.casefold())
+            modules.append(title)
+            if len(modules) >= limit:
+                break
+    return modules
+
+
+class QuizPrefetcher:
+    """
+    Generates quizzes a student is likely to ask for next, in the background.
+    
+    Quizzes run on a small thread pool of their own, so prefetching never
+    holds up foreground requests beyond the provider gateway they share, and
+    no more than max_pending are waiting or running at once; beyond that,
+    prefetches are skipped. Results are kept as futures, so a request for a
+    quiz that is still being prefetched waits for it instead of starting
+    over. A quiz is handed out once and dropped unused after ttl_seconds.
+    """
+    
+    def __init__(self, workers: int = 2, max_pending: int = 16, ttl_seconds: float = 3600,
+                 capacity: int = 256):
+        """
+        Initialize the prefetcher.
+        
+        Args:
+            workers (int): Quizzes generated at the same time
+            max_pending (int): Most quizzes waiting or being generated
+            ttl_seconds (float): How long an unused quiz is kept
+            capacity (int): Most quizzes kept, least recently prefetched dropped first
+        """
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._quizzes = LRUCache(capacity)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.scheduled = 0
+        self.skipped = 0
+        self.completed = 0
+        self.failed = 0
+        self.used = 0
+        self.misses = 0
+    
+    def _count(self, outcome: str):
+        get_telemetry().count("quiz_prefetch_total", outcome=outcome)
+    
+    def submit(self, key: Hashable, num_questions: int, generate: Callable[[], Any]) -> bool:
+        """
+        Start generating a quiz in the background.
+        
+        Args:
+            key (Hashable): Identifies the quiz request the result will serve
+            num_questions (int): Questions the quiz will have; requests for more are not served by it
+            generate (Callable): Generates the quiz
+            
+        Returns:
+            bool: Whether it was scheduled (False if it already is, or the budget is used up)
+        """
+        with self._lock:
+            if self._quizzes.get(key) is not None:
+                return False
+            if self._pending >= self.max_pending:
+                self.skipped += 1
+                outcome = "skipped"
+            else:
+                self._pending += 1
+                self.scheduled += 1
+                outcome = "scheduled"
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                        thread_name_prefix="quiz-prefetch")
+                future = self._executor.submit(self._run, generate)
+                self._quizzes.put(key, (future, num_questions), expires_at=time.time() + self.ttl_seconds)
+        self._count(outcome)
+        return outcome == "scheduled"
+    
+    def _run(self, generate: Callable[[], Any]) -> Any:
+        try:
+            quiz = generate()
+        except Exception as e:
+            print(f"Quiz prefetch failed: {e}")
+            with self._lock:
+                self.failed += 1
+            self._count("failed")
+            raise
+        finally:
+            with self._lock:
+                self._pending -= 1
+        with self._lock:
+            self.completed += 1
+        self._count("completed")
+        return quiz
+    
+    def take(self, key: Hashable, num_questions: int) -> "Optional[Future]":
+        """
+        Hand out a prefetched quiz, finished or still being generated.
+        
+        Args:
+            key (Hashable): The key it was submitted under
+            num_questions (int): Questions wanted
+            
+        Returns:
+            Optional[Future]: The quiz's future, or None if there is no prefetched quiz big enough
+        """
+        entry = self._quizzes.get(key)
+        if entry is not None and entry[1] >= num_questions:
+            entry = self._quizzes.pop(key)
+        else:
+            entry = None
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            self._count("missed")
+            return None
+        future = entry[0]
+        
+        def used(done: Future):
+            if done.exception() is None:
+                with self._lock:
+                    self.used += 1
+                self._count("used")
+        
+        future.add_done_callback(used)
+        return future
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get counters of prefetched quizzes.
+        
+        Returns:
+            Dict[str, Any]: Quizzes scheduled, skipped over budget, pending, completed, failed and used,
+                quiz requests nothing was prefetched for, and the share of completed quizzes used
+        """
+        with self._lock:
+            return {
+                "scheduled": self.scheduled,
+                "skipped": self.skipped,
+                "pending": self._pending,
+                "completed": self.completed,
+                "failed": self.failed,
+                "used": self.used,
+                "misses": self.misses,
+                "usage_rate": self.used / self.completed if self.completed else 0.0,
+            }
+
+
+_quiz_prefetcher: Optional[QuizPrefetcher] = None
+_quiz_prefetcher_lock = threading.Lock()
+
+
+def get_quiz_prefetcher() -> Optional[QuizPrefetcher]:
+    """
+    Get the process-wide quiz prefetcher, configured from settings.quiz_prefetch in prompts.yaml.
+    
+    Returns:
+        Optional[QuizPrefetcher]: The shared prefetcher, or None if prefetching is disabled
+    """
+    global _quiz_prefetcher
+    settings = get_config().setting("quiz_prefetch")
+    if not settings.get("enabled", True):
+        return None
+    if _quiz_prefetcher is None:
+        with _quiz_prefetcher_lock:
+            if _quiz_prefetcher is None:
+                _quiz_prefetcher = QuizPrefetcher(
+                    workers=settings.get("workers", 2),
+                    max_pending=settings.get("max_pending", 16),
+                    ttl_seconds=settings.get("ttl_seconds", 3600),
+                    capacity=settings.get("capacity", 256),
+                )
+    return _quiz_prefetcher
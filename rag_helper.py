@@ -1,12 +1,82 @@
 import os
-from typing import List, Optional
+import hashlib
+import itertools
+import threading
+import time
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from phi.knowledge.pdf import PDFUrlKnowledgeBase, PDFKnowledgeBase
 from phi.vectordb.chroma import ChromaDb
-from langchain_community.document_loaders import PyPDFLoader, TextLoader
+from langchain_community.document_loaders import TextLoader
+from langchain.schema import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_chroma import Chroma
-from langchain_community.embeddings import OpenAIEmbeddings
 import chromadb
+from bm25 import BM25Index, reciprocal_rank_fusion
+from config import get_config, resolve_path
+from embeddings import get_embeddings
+from ingestion import IngestionPipeline, IngestionProgress, IngestionStats, combine_stats
+from parse_pool import get_parse_pool
+from pdf_stream import PdfSource, iter_pdf_pages, open_pdf, stream_sha256
+from response_cache import LRUCache, normalize_prompt
+from telemetry import get_telemetry
+
+# Version of each (persist_directory, collection) in this process; replaced on every
+# write so query caches of all RAGHelper instances on that collection go stale together.
+# Versions come from one process-wide counter and are never reused, so a collection that
+# is deleted (and its entries pruned) and created again cannot repeat a version that an
+# instance still has query results cached under.
+_collection_versions: Dict[Tuple[str, str], int] = {}
+_collection_versions_lock = threading.Lock()
+_version_counter = itertools.count(1)
+
+# BM25 index of each (persist_directory, collection), shared by all RAGHelper instances on
+# it, with the collection version it reflects. Every write and delete reaches it under the
+# collection's lock, which is also held while it is built from the stored chunks.
+_lexical_indexes: Dict[Tuple[str, str], Tuple[int, BM25Index]] = {}
+_lexical_locks: Dict[Tuple[str, str], threading.Lock] = {}
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def file_sha256(file_path: str) -> str:
+    """
+    Hash a file's contents without reading it into memory at once.
+    
+    Args:
+        file_path (str): Path to the file
+        
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def normalize_question(question: str) -> str:
+    """
+    Normalize a question for cache lookups.
+    
+    Args:
+        question (str): The question text
+        
+    Returns:
+        str: The question with whitespace collapsed, case folded and trailing punctuation removed
+    """
+    return normalize_prompt(question).rstrip("?!. ")
+
+
+RETRIEVAL_MODES = ("vector", "hybrid", "lexical")
+
+
+class ChunkQuotaExceeded(Exception):
+    """
+    Raised when an ingest would take a collection past its chunk quota.
+    """
 
 class RAGHelper:
     """
@@ -14,22 +84,53 @@ class RAGHelper:
     Manages document loading, embedding, and retrieval.
     """
     
-    def __init__(self, collection_name: str = "study_materials", persist_directory: str = "./chroma_db"):
+    def __init__(self, collection_name: str = "study_materials", persist_directory: str = "./chroma_db",
+                 embeddings=None, max_chunks: Optional[int] = None):
         """
         Initialize the RAG helper.
         
         Args:
             collection_name (str): Name of the ChromaDB collection
-            persist_directory (str): Directory to persist the vector database
+            persist_directory (str): Directory to persist the vector database; relative paths are
+                resolved against the application directory
+            embeddings: Embedding backend to use (defaults to settings.rag.embedding_backend)
+            max_chunks (int): Maximum number of chunks the collection may hold (None for no limit)
         """
-        self.collection_name = collection_name
-        self.persist_directory = persist_directory
-        self.embeddings = OpenAIEmbeddings()
+        settings = get_config().setting("rag")
+        self.embeddings = embeddings or get_embeddings()
+        # Backends with different vector sizes must not share a collection
+        namespace = getattr(self.embeddings, "namespace", None)
+        self.collection_name = f"{collection_name}_{namespace}" if namespace else collection_name
+        self.persist_directory = resolve_path(persist_directory)
+        self._collection_key = (self.persist_directory, self.collection_name)
+        self.chunk_size = settings.get("chunk_size", 1000)
+        self.chunk_overlap = settings.get("chunk_overlap", 200)
         self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
             length_function=len,
         )
+        # PDFs are parsed and split on worker processes when a pool is configured
+        self.parse_pool = get_parse_pool()
+        self.pipeline = IngestionPipeline(
+            self.embeddings,
+            self._write_batch,
+            batch_size=settings.get("embedding_batch_size", 64),
+            max_parallel_files=settings.get("max_parallel_files", 4),
+            max_concurrent_embeddings=settings.get("max_concurrent_embeddings", 4),
+        )
+        self.last_ingest_stats: Optional[IngestionStats] = None
+        cache_size = settings.get("query_cache_size", 1024)
+        self._query_embeddings = LRUCache(cache_size)
+        self._retrievals = LRUCache(cache_size)
+        self.query_cache_stats = {"embedding_hits": 0, "embedding_misses": 0,
+                                  "retrieval_hits": 0, "retrieval_misses": 0}
+        self.retrieval_mode = settings.get("retrieval_mode", "hybrid")
+        self.hybrid_candidates = settings.get("hybrid_candidates", 20)
+        self.rrf_k = settings.get("rrf_k", 60)
+        self.max_chunks = max_chunks
+        self._chunk_total = 0
+        self._quota_lock = threading.Lock()
         self.vectorstore = None
         self._initialize_vectorstore()
     
@@ -47,10 +148,434 @@ class RAGHelper:
                 embedding_function=self.embeddings,
                 persist_directory=self.persist_directory
             )
+            self._chunk_total = self.vectorstore._collection.count()
+            if self.retrieval_mode != "vector":
+                self._lexical_index()
         except Exception as e:
             print(f"Error initializing vector store: {e}")
             self.vectorstore = None
     
+    @property
+    def collection_version(self) -> int:
+        """
+        Version of the collection, replaced by every ingest or clear.
+        
+        Returns:
+            int: The current version, unique within the process
+        """
+        version = _collection_versions.get(self._collection_key)
+        if version is None:
+            with _collection_versions_lock:
+                version = _collection_versions.get(self._collection_key)
+                if version is None:
+                    version = _collection_versions[self._collection_key] = next(_version_counter)
+        return version
+    
+    def _lexical_lock(self) -> threading.Lock:
+        with _collection_versions_lock:
+            return _lexical_locks.setdefault(self._collection_key, threading.Lock())
+    
+    def _bump_collection_version(self):
+        """
+        Mark the collection changed, making cached query results of every instance on it stale.
+        """
+        key = self._collection_key
+        with self._lexical_lock():
+            version = self.collection_version
+            with _collection_versions_lock:
+                new_version = _collection_versions[key] = next(_version_counter)
+            entry = _lexical_indexes.get(key)
+            if entry is not None and entry[0] == version:
+                # Writes reached the index as they happened, so it is current as it stands
+                _lexical_indexes[key] = (new_version, entry[1])
+    
+    def _forget_collection(self):
+        """
+        Drop the process-wide state of the deleted collection: its version, BM25 index and lock.
+        
+        Cached query results of other instances go stale because the version the
+        collection gets next is new.
+        """
+        key = self._collection_key
+        # Writes racing the delete have no collection left to keep in step with, so the
+        # lock can go too; the next writer on a recreated collection gets a fresh one
+        with self._lexical_lock():
+            with _collection_versions_lock:
+                _collection_versions.pop(key, None)
+                _lexical_indexes.pop(key, None)
+                _lexical_locks.pop(key, None)
+    
+    def embed_query(self, question: str) -> List[float]:
+        """
+        Embed a question, reusing the embedding of an identical earlier question.
+        
+        Args:
+            question (str): The question text
+            
+        Returns:
+            List[float]: The query embedding
+        """
+        key = normalize_question(question)
+        embedding = self._query_embeddings.get(key)
+        telemetry = get_telemetry()
+        if embedding is None:
+            self.query_cache_stats["embedding_misses"] += 1
+            telemetry.count("cache_lookups_total", cache="query_embedding", result="miss")
+            with telemetry.span("embedding_query"):
+                embedding = self.embeddings.embed_query(question)
+            self._query_embeddings.put(key, embedding)
+        else:
+            self.query_cache_stats["embedding_hits"] += 1
+            telemetry.count("cache_lookups_total", cache="query_embedding", result="hit")
+        return embedding
+    
+    def _lexical_index(self) -> BM25Index:
+        """
+        Get the BM25 index of the collection, shared by every instance on it.
+        
+        It is built from the stored chunks on first use, and again if the collection
+        version moved without it, e.g. after the collection was cleared. Once built,
+        it is kept in step with every write and delete.
+        
+        Returns:
+            BM25Index: The index
+        """
+        entry = _lexical_indexes.get(self._collection_key)
+        if entry is not None and entry[0] == self.collection_version:
+            return entry[1]
+        with self._lexical_lock():
+            entry = _lexical_indexes.get(self._collection_key)
+            version = self.collection_version
+            if entry is None or entry[0] != version:
+                index = BM25Index()
+                collection = self.vectorstore._collection
+                page = 1000
+                for offset in range(0, collection.count(), page):
+                    result = collection.get(include=["documents"], limit=page, offset=offset)
+                    index.add(result["ids"], result["documents"])
+                entry = _lexical_indexes[self._collection_key] = (version, index)
+        return entry[1]
+    
+    def _update_lexical_index(self, update: Callable[[BM25Index], None]):
+        # Taking the lock means a change either is stored before a build reads the
+        # collection, or reaches the index once it is built
+        with self._lexical_lock():
+            entry = _lexical_indexes.get(self._collection_key)
+            if entry is not None:
+                update(entry[1])
+    
+    def _delete_chunks(self, ids: List[str]):
+        self.vectorstore._collection.delete(ids=ids)
+        self._update_lexical_index(lambda index: index.remove(ids))
+    
+    def _dense_search(self, question: str, n: int) -> List[Tuple[str, str, float]]:
+        """
+        Run a vector search.
+        
+        Args:
+            question (str): The question text
+            n (int): Number of results
+            
+        Returns:
+            List[Tuple[str, str, float]]: (chunk id, text, distance) triples, best first
+        """
+        embedding = self.embed_query(question)
+        with get_telemetry().span("vector_search"):
+            result = self.vectorstore._collection.query(
+                query_embeddings=[embedding], n_results=n, include=["documents", "distances"]
+            )
+        return list(zip(result["ids"][0], result["documents"][0], result["distances"][0]))
+    
+    def _search(self, question: str, k: int, mode: str) -> List[Tuple[str, str, float]]:
+        """
+        Retrieve chunks with the given strategy.
+        
+        Args:
+            question (str): The question text
+            k (int): Number of chunks to retrieve
+            mode (str): "vector" (similarity only), "lexical" (BM25 only, no embedding call)
+                or "hybrid" (both, fused with reciprocal rank fusion)
+                
+        Returns:
+            List[Tuple[str, str, float]]: (chunk id, text, score) triples, best first; scores are
+                relevance scores, BM25 scores or fused RRF scores depending on the mode
+        """
+        if mode == "vector":
+            relevance = self.vectorstore._select_relevance_score_fn()
+            return [(chunk_id, text, relevance(distance))
+                    for chunk_id, text, distance in self._dense_search(question, k)]
+        
+        index = self._lexical_index()
+        if mode == "lexical":
+            with get_telemetry().span("lexical_search"):
+                sparse = index.search(question, k)
+                texts = self._chunk_texts([chunk_id for chunk_id, _ in sparse])
+            return [(chunk_id, texts[chunk_id], score) for chunk_id, score in sparse if chunk_id in texts]
+        
+        candidates = max(k, self.hybrid_candidates)
+        dense = self._dense_search(question, candidates)
+        with get_telemetry().span("lexical_search"):
+            sparse = index.search(question, candidates)
+        texts = {chunk_id: text for chunk_id, text, _ in dense}
+        fused = reciprocal_rank_fusion(
+            [[chunk_id for chunk_id, _, _ in dense], [chunk_id for chunk_id, _ in sparse]], k=self.rrf_k
+        )[:k]
+        # Only lexical hits the vector search missed need their text fetched
+        texts.update(self._chunk_texts([chunk_id for chunk_id, _ in fused if chunk_id not in texts]))
+        return [(chunk_id, texts[chunk_id], score) for chunk_id, score in fused if chunk_id in texts]
+    
+    def _chunk_texts(self, ids: List[str]) -> Dict[str, str]:
+        """
+        Fetch the texts of chunks from the collection.
+        
+        Args:
+            ids (List[str]): Chunk ids
+            
+        Returns:
+            Dict[str, str]: Chunk id -> text; chunks deleted in the meantime are left out
+        """
+        if not ids:
+            return {}
+        result = self.vectorstore._collection.get(ids=ids, include=["documents"])
+        return dict(zip(result["ids"], result["documents"]))
+    
+    def _cached_search(self, question: str, k: int, mode: Optional[str]) -> List[Tuple[str, str, float]]:
+        """
+        Run a search through the retrieval cache.
+        
+        Args:
+            question (str): The question text
+            k (int): Number of documents to retrieve
+            mode (str): Retrieval mode (see _search); defaults to settings.rag.retrieval_mode
+            
+        Returns:
+            List[Tuple[str, str, float]]: The (possibly cached) (chunk id, text, score) triples
+        """
+        mode = mode or self.retrieval_mode
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode {mode!r}; expected one of {', '.join(RETRIEVAL_MODES)}")
+        key = (mode, normalize_question(question), k, self.collection_version)
+        results = self._retrievals.get(key)
+        telemetry = get_telemetry()
+        if results is None:
+            self.query_cache_stats["retrieval_misses"] += 1
+            telemetry.count("cache_lookups_total", cache="retrieval", result="miss")
+            with telemetry.span("retrieval", mode=mode):
+                results = self._search(question, k, mode)
+            self._retrievals.put(key, results)
+        else:
+            self.query_cache_stats["retrieval_hits"] += 1
+            telemetry.count("cache_lookups_total", cache="retrieval", result="hit")
+        return results
+    
+    def _reserve_chunk(self, replaced: int):
+        """
+        Count one new chunk against the quota.
+        
+        Args:
+            replaced (int): Chunks of the source being ingested that are stored but not yet
+                confirmed as reused; they are deleted once the ingest finishes
+                
+        Raises:
+            ChunkQuotaExceeded: If the collection would go over max_chunks
+        """
+        with self._quota_lock:
+            if self.max_chunks is not None and self._chunk_total - replaced + 1 > self.max_chunks:
+                raise ChunkQuotaExceeded(
+                    f"Collection {self.collection_name} is limited to {self.max_chunks} chunks"
+                )
+            self._chunk_total += 1
+    
+    def _release_chunks(self, count: int):
+        with self._quota_lock:
+            self._chunk_total = max(0, self._chunk_total - count)
+    
+    def _write_batch(self, ids: List[str], embeddings: List[List[float]],
+                     documents: List[str], metadatas: List[dict]):
+        """
+        Write one batch of pre-embedded chunks to the collection.
+        
+        Args:
+            ids (List[str]): Chunk ids
+            embeddings (List[List[float]]): Chunk vectors
+            documents (List[str]): Chunk texts
+            metadatas (List[dict]): Chunk metadata
+        """
+        self.vectorstore._collection.upsert(
+            ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas
+        )
+        self._update_lexical_index(lambda index: index.add(ids, documents))
+    
+    def _split(self, documents: Iterable) -> Iterator:
+        """
+        Split documents into chunks one document at a time.
+        
+        Args:
+            documents (Iterable): Documents (e.g. PDF pages) to split
+            
+        Yields:
+            Document: Chunks in document order
+        """
+        for document in documents:
+            yield from self.text_splitter.split_documents([document])
+    
+    def _pdf_chunks(self, pdf: PdfSource, source: str, progress: Optional[IngestionProgress] = None) -> Iterator:
+        """
+        Read, split and yield a PDF's chunks one page at a time.
+        
+        With a parse pool, pages are extracted and split on worker processes in
+        shards of consecutive pages; the chunks are the same either way.
+        
+        Args:
+            pdf (PdfSource): Path (memory-mapped while reading), binary file-like object or mmap
+            source (str): The source identifier stored with each chunk
+            progress (IngestionProgress): Optional counters; pages are counted as they are parsed
+            
+        Yields:
+            Document: Chunks in document order
+        """
+        if self.parse_pool is not None:
+            batches = self.parse_pool.iter_chunk_batches(pdf, {"source": source}, self.chunk_size, self.chunk_overlap)
+            for pages, chunks in batches:
+                if progress is not None:
+                    progress.pages += pages
+                for text, metadata in chunks:
+                    yield Document(page_content=text, metadata=metadata)
+            return
+        
+        with open_pdf(pdf) as stream:
+            for page, text in iter_pdf_pages(stream):
+                if progress is not None:
+                    progress.pages += 1
+                yield from self._split([Document(page_content=text, metadata={"source": source, "page": page})])
+    
+    def _text_chunks(self, file_path: str) -> Iterator:
+        return self._split(TextLoader(file_path).lazy_load())
+    
+    def _text_stream_chunks(self, stream: BinaryIO, source: str, encoding: str = "utf-8") -> Iterator:
+        stream.seek(0)
+        text = stream.read().decode(encoding)
+        return self._split([Document(page_content=text, metadata={"source": source})])
+    
+    def _existing_chunks(self, source: str) -> Dict[str, Optional[str]]:
+        """
+        Get the chunks already stored for a source.
+        
+        Args:
+            source (str): The source identifier (usually the file path)
+            
+        Returns:
+            Dict[str, Optional[str]]: Chunk id -> file hash the chunk was ingested from
+        """
+        result = self.vectorstore._collection.get(where={"source": source}, include=["metadatas"])
+        return {
+            chunk_id: (metadata or {}).get("file_hash")
+            for chunk_id, metadata in zip(result["ids"], result["metadatas"])
+        }
+    
+    def _ingest_source(self, source: str, file_hash: str, chunk_source: Callable[[], Iterable],
+                       progress: Optional[IngestionProgress] = None) -> IngestionStats:
+        """
+        Incrementally ingest one source using content hashes.
+        
+        Chunk ids are derived from the source and the chunk's content hash, so an
+        unchanged file is skipped without parsing it, and a changed file only
+        embeds chunks whose content is new. Chunks that no longer appear in the
+        file are deleted.
+        
+        Args:
+            source (str): The source identifier (usually the file path)
+            file_hash (str): Hash of the whole source content
+            chunk_source (Callable): Returns the source's chunk stream; only called if the file changed
+            progress (IngestionProgress): Optional live counters, also used to cancel the run
+                (cancelling rolls back this run's writes)
+                
+        Returns:
+            IngestionStats: Counters for this source
+        """
+        started = time.perf_counter()
+        collection = self.vectorstore._collection
+        existing = self._existing_chunks(source)
+        if existing and set(existing.values()) == {file_hash}:
+            if progress is not None:
+                progress.reused = len(existing)
+            get_telemetry().observe("ingest", time.perf_counter() - started, outcome="unchanged")
+            return IngestionStats(files=1, skipped_files=1, reused=len(existing),
+                                  elapsed=time.perf_counter() - started)
+        
+        seen = set()
+        reused_ids: List[str] = []
+        reused_metadatas: List[dict] = []
+        reserved = 0
+        
+        def new_chunks():
+            nonlocal reserved
+            occurrences: Dict[str, int] = {}
+            for index, chunk in enumerate(chunk_source()):
+                chunk_hash = _sha256(chunk.page_content)
+                occurrence = occurrences[chunk_hash] = occurrences.get(chunk_hash, -1) + 1
+                chunk.id = _sha256(f"{source}\x1f{chunk_hash}\x1f{occurrence}")
+                chunk.metadata.update(source=source, file_hash=file_hash,
+                                      chunk_hash=chunk_hash, chunk_index=index)
+                seen.add(chunk.id)
+                if chunk.id in existing:
+                    reused_ids.append(chunk.id)
+                    reused_metadatas.append(chunk.metadata)
+                    if progress is not None:
+                        progress.reused += 1
+                    continue
+                self._reserve_chunk(replaced=len(existing) - len(reused_ids))
+                reserved += 1
+                yield chunk
+        
+        try:
+            stats = self.pipeline.ingest(new_chunks(), progress)
+        except Exception:
+            # Roll back this run's writes so a retry isn't mistaken for an unchanged file
+            partial = [chunk_id for chunk_id in seen if chunk_id not in existing]
+            if partial:
+                self._delete_chunks(partial)
+            self._bump_collection_version()
+            self._release_chunks(reserved)
+            get_telemetry().observe("ingest", time.perf_counter() - started, error=True, outcome="failed")
+            raise
+        
+        # Bumped only once the collection is final, so a query running meanwhile
+        # can't cache chunks about to be deleted under the new version
+        try:
+            # Re-stamp reused chunks with the new file hash; no re-embedding needed
+            batch_size = self.pipeline.batch_size
+            for i in range(0, len(reused_ids), batch_size):
+                collection.update(ids=reused_ids[i:i + batch_size], metadatas=reused_metadatas[i:i + batch_size])
+            stale = [chunk_id for chunk_id in existing if chunk_id not in seen]
+            if stale:
+                self._delete_chunks(stale)
+                self._release_chunks(len(stale))
+        finally:
+            self._bump_collection_version()
+        
+        stats.reused = len(reused_ids)
+        stats.elapsed = time.perf_counter() - started
+        get_telemetry().observe("ingest", stats.elapsed, outcome="updated")
+        return stats
+    
+    def _ingest(self, source: str, file_hash: str, chunk_source: Callable[[], Iterable]) -> bool:
+        """
+        Ingest one source and record its stats.
+        
+        Args:
+            source (str): The source identifier
+            file_hash (str): Hash of the whole source content
+            chunk_source (Callable): Returns the source's chunk stream
+            
+        Returns:
+            bool: True if the vector store was available
+        """
+        if not self.vectorstore:
+            return False
+        self.last_ingest_stats = self._ingest_source(source, file_hash, chunk_source)
+        return True
+    
     def load_pdf(self, file_path: str) -> bool:
         """
         Load a PDF file and add it to the knowledge base.
@@ -62,17 +587,24 @@ class RAGHelper:
             bool: True if successful, False otherwise
         """
         try:
-            loader = PyPDFLoader(file_path)
-            documents = loader.load()
-            
-            # Split documents into chunks
-            chunks = self.text_splitter.split_documents(documents)
-            
-            # Add to vector store
-            if self.vectorstore:
-                self.vectorstore.add_documents(chunks)
-                return True
+            return self._ingest(file_path, file_sha256(file_path), lambda: self._pdf_chunks(file_path, file_path))
+        except Exception as e:
+            print(f"Error loading PDF: {e}")
             return False
+    
+    def load_pdf_stream(self, stream: BinaryIO, source: str) -> bool:
+        """
+        Load a PDF from a file-like object or memory-mapped buffer without writing it to disk.
+        
+        Args:
+            stream (BinaryIO): Seekable binary stream of the PDF (e.g. a Streamlit upload)
+            source (str): Identifier of the document, used for re-ingestion (e.g. the file name)
+            
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            return self._ingest(source, stream_sha256(stream), lambda: self._pdf_chunks(stream, source))
         except Exception as e:
             print(f"Error loading PDF: {e}")
             return False
@@ -88,17 +620,7 @@ class RAGHelper:
             bool: True if successful, False otherwise
         """
         try:
-            loader = TextLoader(file_path)
-            documents = loader.load()
-            
-            # Split documents into chunks
-            chunks = self.text_splitter.split_documents(documents)
-            
-            # Add to vector store
-            if self.vectorstore:
-                self.vectorstore.add_documents(chunks)
-                return True
-            return False
+            return self._ingest(file_path, file_sha256(file_path), lambda: self._text_chunks(file_path))
         except Exception as e:
             print(f"Error loading text file: {e}")
             return False
@@ -109,36 +631,116 @@ class RAGHelper:
         
         Args:
             text (str): The text content to add
-            metadata (dict): Optional metadata for the document
-            
+            metadata (dict): Optional metadata for the document; its "source" key identifies
+                the content for re-ingestion, otherwise the content hash is used
+                
         Returns:
             bool: True if successful, False otherwise
         """
         try:
-            from langchain.schema import Document
+            content_hash = _sha256(text)
+            source = (metadata or {}).get("source") or f"text:{content_hash[:16]}"
             
             # Create document
             doc = Document(page_content=text, metadata=metadata or {})
             
-            # Split into chunks
-            chunks = self.text_splitter.split_documents([doc])
-            
-            # Add to vector store
-            if self.vectorstore:
-                self.vectorstore.add_documents(chunks)
-                return True
-            return False
+            return self._ingest(source, content_hash, lambda: self._split([doc]))
         except Exception as e:
             print(f"Error loading text content: {e}")
             return False
     
-    def query(self, question: str, k: int = 4) -> List[str]:
+    def load_files(self, files: List[Tuple[str, str]]) -> Dict[str, bool]:
+        """
+        Load several files in parallel through the batched ingestion pipeline.
+        
+        Args:
+            files (List[Tuple[str, str]]): (file_path, file_type) pairs, file_type being "pdf" or "text"
+            
+        Returns:
+            Dict[str, bool]: Success status per file path
+        """
+        def ingest_file(file_path, file_type):
+            if file_type == "pdf":
+                chunk_source = lambda: self._pdf_chunks(file_path, file_path)
+            else:
+                chunk_source = lambda: self._text_chunks(file_path)
+            return self._ingest_source(file_path, file_sha256(file_path), chunk_source)
+        
+        return self._load_many({
+            file_path: (lambda path=file_path, kind=file_type: ingest_file(path, kind))
+            for file_path, file_type in files
+        })
+    
+    def ingest_stream(self, source: str, stream: BinaryIO, file_type: str, file_hash: Optional[str] = None,
+                      progress: Optional[IngestionProgress] = None) -> IngestionStats:
+        """
+        Ingest one in-memory or memory-mapped file, raising on failure.
+        
+        Args:
+            source (str): Identifier of the document, used for re-ingestion (e.g. the file name)
+            stream (BinaryIO): Seekable binary stream of the file
+            file_type (str): "pdf" or "text"
+            file_hash (str): Content hash if already known
+            progress (IngestionProgress): Optional live counters, also used to cancel the run
+            
+        Returns:
+            IngestionStats: Counters for this file
+            
+        Raises:
+            IngestionCancelled: If progress was cancelled
+        """
+        if not self.vectorstore:
+            raise RuntimeError("Vector store is not available")
+        if file_type == "pdf":
+            chunk_source = lambda: self._pdf_chunks(stream, source, progress)
+        else:
+            chunk_source = lambda: self._text_stream_chunks(stream, source)
+        stats = self._ingest_source(source, file_hash or stream_sha256(stream), chunk_source, progress)
+        self.last_ingest_stats = stats
+        return stats
+    
+    def load_streams(self, files: List[Tuple[str, BinaryIO, str]]) -> Dict[str, bool]:
+        """
+        Load several in-memory or memory-mapped files in parallel, without temp files.
+        
+        Args:
+            files (List[Tuple[str, BinaryIO, str]]): (source, stream, file_type) triples, file_type
+                being "pdf" or "text"; each stream must be seekable and is used by one worker only
+                
+        Returns:
+            Dict[str, bool]: Success status per source
+        """
+        return self._load_many({
+            source: (lambda source=source, stream=stream, kind=file_type: self.ingest_stream(source, stream, kind))
+            for source, stream, file_type in files
+        })
+    
+    def _load_many(self, jobs: Dict[str, Callable[[], IngestionStats]]) -> Dict[str, bool]:
+        """
+        Run per-source ingestion jobs in parallel and record their combined stats.
+        
+        Args:
+            jobs (Dict[str, Callable]): Maps a source to a function that ingests it
+            
+        Returns:
+            Dict[str, bool]: Success status per source
+        """
+        if not self.vectorstore:
+            return {source: False for source in jobs}
+        
+        started = time.perf_counter()
+        results = self.pipeline.ingest_many(jobs)
+        self.last_ingest_stats = combine_stats(results.values(), time.perf_counter() - started)
+        return {source: stats is not None for source, stats in results.items()}
+    
+    def query(self, question: str, k: int = 4, mode: Optional[str] = None) -> List[str]:
         """
         Query the knowledge base and retrieve relevant documents.
         
         Args:
             question (str): The question to search for
             k (int): Number of documents to retrieve
+            mode (str): "vector", "hybrid" or "lexical"; defaults to settings.rag.retrieval_mode
             
         Returns:
             List[str]: List of relevant document contents
@@ -147,34 +749,62 @@ class RAGHelper:
             if not self.vectorstore:
                 return []
             
-            # Perform similarity search
-            docs = self.vectorstore.similarity_search(question, k=k)
-            
-            # Extract content
-            return [doc.page_content for doc in docs]
+            # Search, reusing cached embeddings and results
+            return [text for _, text, _ in self._cached_search(question, k, mode)]
         except Exception as e:
             print(f"Error querying knowledge base: {e}")
             return []
     
-    def query_with_scores(self, question: str, k: int = 4) -> List[tuple]:
+    def query_with_scores(self, question: str, k: int = 4, mode: Optional[str] = None) -> List[tuple]:
         """
-        Query the knowledge base and retrieve relevant documents with similarity scores.
+        Query the knowledge base and retrieve relevant documents with scores.
         
         Args:
             question (str): The question to search for
             k (int): Number of documents to retrieve
+            mode (str): "vector", "hybrid" or "lexical"; defaults to settings.rag.retrieval_mode
             
         Returns:
-            List[tuple]: List of (document, score) tuples
+            List[tuple]: List of (document, score) tuples; higher scores are better
         """
         try:
             if not self.vectorstore:
                 return []
             
-            # Perform similarity search with scores
-            results = self.vectorstore.similarity_search_with_score(question, k=k)
+            # Search with scores, reusing cached embeddings and results
+            return [(text, score) for _, text, score in self._cached_search(question, k, mode)]
+        except Exception as e:
+            print(f"Error querying knowledge base: {e}")
+            return []
+    
+    def query_chunks(self, question: str, k: int = 4, mode: Optional[str] = None) -> List[Dict]:
+        """
+        Query the knowledge base and retrieve relevant chunks with their position in the source.
+        
+        Args:
+            question (str): The question to search for
+            k (int): Number of chunks to retrieve
+            mode (str): "vector", "hybrid" or "lexical"; defaults to settings.rag.retrieval_mode
             
-            return [(doc.page_content, score) for doc, score in results]
+        Returns:
+            List[Dict]: Chunks, best first, with text, score, source and chunk_index
+        """
+        try:
+            if not self.vectorstore:
+                return []
+            
+            results = self._cached_search(question, k, mode)
+            if not results:
+                return []
+            stored = self.vectorstore._collection.get(ids=[chunk_id for chunk_id, _, _ in results],
+                                                      include=["metadatas"])
+            metadatas = dict(zip(stored["ids"], stored["metadatas"]))
+            chunks = []
+            for chunk_id, text, score in results:
+                metadata = metadatas.get(chunk_id) or {}
+                chunks.append({"text": text, "score": score, "source": metadata.get("source"),
+                               "chunk_index": metadata.get("chunk_index")})
+            return chunks
         except Exception as e:
             print(f"Error querying knowledge base: {e}")
             return []
@@ -189,8 +819,7 @@ class RAGHelper:
         try:
             if self.vectorstore:
                 # Delete the collection and reinitialize
-                client = chromadb.PersistentClient(path=self.persist_directory)
-                client.delete_collection(name=self.collection_name)
+                self._delete_collection()
                 self._initialize_vectorstore()
                 return True
             return False
@@ -198,6 +827,30 @@ class RAGHelper:
             print(f"Error clearing database: {e}")
             return False
     
+    def _delete_collection(self):
+        client = chromadb.PersistentClient(path=self.persist_directory)
+        client.delete_collection(name=self.collection_name)
+        self._forget_collection()
+        self._query_embeddings.clear()
+        self._retrievals.clear()
+    
+    def drop(self) -> bool:
+        """
+        Delete the collection and release the vector store without recreating it.
+        
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            if self.vectorstore:
+                self._delete_collection()
+                self.vectorstore = None
+                self._chunk_total = 0
+            return True
+        except Exception as e:
+            print(f"Error dropping collection: {e}")
+            return False
+    
     def get_document_count(self) -> int:
         """
         Get the number of documents in the knowledge base.
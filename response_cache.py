@@ -0,0 +1,293 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Mapping, Optional
+
+from config import get_config, resolve_path
+from telemetry import get_telemetry
+
+_MISSING = object()
+_WHITESPACE = re.compile(r"\s+")
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU cache with optional per-entry expiry.
+    """
+    
+    def __init__(self, capacity: int = 1024):
+        """
+        Initialize the cache.
+        
+        Args:
+            capacity (int): Maximum number of entries kept
+        """
+        self.capacity = capacity
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get a value and mark it as recently used.
+        
+        Args:
+            key (Hashable): The cache key
+            default (Any): Returned when the key is missing or expired
+            
+        Returns:
+            Any: The cached value or the default
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+    
+    def put(self, key: Hashable, value: Any, expires_at: Optional[float] = None):
+        """
+        Store a value, evicting the least recently used entry when full.
+        
+        Args:
+            key (Hashable): The cache key
+            value (Any): The value to store
+            expires_at (float): Optional absolute expiry as a UNIX timestamp
+        """
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+    
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return default if entry is None else entry[0]
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Normalize a prompt so trivially different renderings share a cache entry.
+    
+    Args:
+        prompt (str): The prompt text
+        
+    Returns:
+        str: The prompt with whitespace collapsed and case folded
+    """
+    return _WHITESPACE.sub(" ", prompt).strip().casefold()
+
+
+class ResponseCache:
+    """
+    Two-tier cache of LLM responses: an in-memory LRU in front of a SQLite store.
+    
+    Entries are keyed on the normalized prompt plus everything else that shapes the
+    completion (prompt type, provider, model, temperature and agent profile), and
+    expire after a TTL configured per prompt type. A TTL of 0 disables caching
+    for that prompt type.
+    """
+    
+    def __init__(self, path: str, ttl_seconds: Mapping[str, int], memory_capacity: int = 512):
+        """
+        Initialize the cache.
+        
+        Args:
+            path (str): Path of the SQLite database file
+            ttl_seconds (Mapping[str, int]): TTL per prompt type; types not listed are not cached
+            memory_capacity (int): Number of entries kept in the in-memory LRU
+        """
+        self.path = path
+        self.ttl_seconds = dict(ttl_seconds)
+        self.memory = LRUCache(memory_capacity)
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.bypasses = 0
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " prompt_type TEXT NOT NULL,"
+                " content TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+    
+    def enabled_for(self, prompt_type: str) -> bool:
+        return self.ttl_seconds.get(prompt_type, 0) > 0
+    
+    @staticmethod
+    def make_key(prompt_type: str, provider: str, model: str, temperature: float,
+                 profile: str, prompt: str) -> str:
+        """
+        Build the cache key for a completion.
+        
+        Args:
+            prompt_type (str): The prompt type (student_analysis, roadmap_creation, ...)
+            provider (str): The AI provider
+            model (str): The model id
+            temperature (float): The sampling temperature
+            profile (str): Digest of the agent's system prompt inputs
+            prompt (str): The user prompt
+            
+        Returns:
+            str: A hex digest
+        """
+        payload = json.dumps(
+            [prompt_type, provider, model, temperature, profile, normalize_prompt(prompt)],
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def get(self, prompt_type: str, key: str) -> Optional[str]:
+        """
+        Look up a cached response.
+        
+        Args:
+            prompt_type (str): The prompt type
+            key (str): Key from make_key()
+            
+        Returns:
+            Optional[str]: The cached content or None on a miss
+        """
+        if not self.enabled_for(prompt_type):
+            return None
+        content = self.memory.get(key, _MISSING)
+        if content is not _MISSING:
+            with self._lock:
+                self.memory_hits += 1
+            get_telemetry().count("cache_lookups_total", cache="response", result="hit")
+            return content
+        
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                self.misses += 1
+                row = None
+            else:
+                self.disk_hits += 1
+        get_telemetry().count("cache_lookups_total", cache="response", result="miss" if row is None else "hit")
+        if row is None:
+            return None
+        self.memory.put(key, row[0], expires_at=row[1])
+        return row[0]
+    
+    def put(self, prompt_type: str, key: str, content: str):
+        """
+        Store a response.
+        
+        Args:
+            prompt_type (str): The prompt type
+            key (str): Key from make_key()
+            content (str): The response content
+        """
+        if not self.enabled_for(prompt_type) or not content:
+            return
+        now = time.time()
+        expires_at = now + self.ttl_seconds[prompt_type]
+        self.memory.put(key, content, expires_at=expires_at)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, prompt_type, content, created_at, expires_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, prompt_type, content, now, expires_at),
+            )
+            self._conn.commit()
+            self.writes += 1
+    
+    def record_bypass(self):
+        with self._lock:
+            self.bypasses += 1
+    
+    def purge_expired(self) -> int:
+        """
+        Delete expired entries from the on-disk store.
+        
+        Returns:
+            int: Number of rows deleted
+        """
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+            self._conn.commit()
+            return cursor.rowcount
+    
+    def clear(self):
+        """
+        Remove every cached response.
+        """
+        self.memory.clear()
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss counters.
+        
+        Returns:
+            Dict[str, Any]: Counters and the overall hit rate
+        """
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "writes": self.writes,
+                "bypasses": self.bypasses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
+
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Get the process-wide response cache, configured from the settings in prompts.yaml.
+    
+    Returns:
+        ResponseCache: The shared cache
+    """
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                settings = get_config().setting("response_cache")
+                _response_cache = ResponseCache(
+                    path=resolve_path(settings.get("path", ".cache/responses.sqlite3")),
+                    ttl_seconds=settings.get("ttl_seconds", {}),
+                    memory_capacity=settings.get("memory_capacity", 512),
+                )
+    return _response_cache
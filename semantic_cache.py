@@ -0,0 +1,155 @@
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from config import get_config
+from telemetry import get_telemetry
+
+
+def _unit(vector: List[float]) -> Tuple[float, ...]:
+    norm = math.sqrt(sum(value * value for value in vector))
+    return tuple(value / norm for value in vector) if norm else tuple(vector)
+
+
+class SemanticCache:
+    """
+    LRU cache of answers looked up by question similarity instead of exact text.
+    
+    Entries live in a scope (for document Q&A: the collection, its version and
+    everything that shapes the answer), and a lookup only considers entries of
+    its own scope. A question matches the most similar cached question of that
+    scope if their cosine similarity reaches the threshold.
+    """
+    
+    def __init__(self, similarity_threshold: float = 0.95, capacity: int = 512):
+        """
+        Initialize the cache.
+        
+        Args:
+            similarity_threshold (float): Minimum cosine similarity for a hit
+            capacity (int): Maximum number of answers kept across all scopes
+        """
+        self.similarity_threshold = similarity_threshold
+        self.capacity = capacity
+        # Entry id -> (scope, unit question vector, answer), least recently used first
+        self._entries: "OrderedDict[int, Tuple[Hashable, Tuple[float, ...], str]]" = OrderedDict()
+        self._scopes: Dict[Hashable, set] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+    
+    def _discard(self, entry_id: int):
+        scope, _, _ = self._entries.pop(entry_id)
+        ids = self._scopes[scope]
+        ids.discard(entry_id)
+        if not ids:
+            del self._scopes[scope]
+    
+    def get(self, scope: Hashable, embedding: List[float]) -> Optional[str]:
+        """
+        Look up the answer to the most similar cached question.
+        
+        Args:
+            scope (Hashable): The scope to search
+            embedding (List[float]): Embedding of the new question
+            
+        Returns:
+            Optional[str]: The cached answer, or None if no question is similar enough
+        """
+        query = _unit(embedding)
+        with self._lock:
+            best_id, best_score = None, self.similarity_threshold
+            for entry_id in self._scopes.get(scope, ()):
+                vector = self._entries[entry_id][1]
+                score = sum(a * b for a, b in zip(query, vector))
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+            if best_id is None:
+                self.misses += 1
+                answer = None
+            else:
+                self.hits += 1
+                self._entries.move_to_end(best_id)
+                answer = self._entries[best_id][2]
+        get_telemetry().count("cache_lookups_total", cache="semantic", result="miss" if answer is None else "hit")
+        return answer
+    
+    def put(self, scope: Hashable, embedding: List[float], answer: str,
+            supersedes: Optional[Callable[[Hashable], bool]] = None):
+        """
+        Store an answer.
+        
+        Args:
+            scope (Hashable): The scope of the answer
+            embedding (List[float]): Embedding of the question
+            answer (str): The answer
+            supersedes (Callable): Optional predicate on other scopes; entries of scopes it
+                returns True for are dropped (e.g. older versions of the same collection)
+        """
+        if not answer:
+            return
+        with self._lock:
+            if supersedes is not None:
+                for stale in [other for other in self._scopes if other != scope and supersedes(other)]:
+                    for entry_id in list(self._scopes[stale]):
+                        self._discard(entry_id)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (scope, _unit(embedding), answer)
+            self._scopes.setdefault(scope, set()).add(entry_id)
+            self.stores += 1
+            while len(self._entries) > self.capacity:
+                self._discard(next(iter(self._entries)))
+                self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._scopes.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss counters.
+        
+        Returns:
+            Dict[str, Any]: Counters, the number of cached answers and the hit rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_semantic_cache: Optional[SemanticCache] = None
+_semantic_cache_lock = threading.Lock()
+
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """
+    Get the process-wide semantic answer cache, configured from the settings in prompts.yaml.
+    
+    Returns:
+        Optional[SemanticCache]: The shared cache, or None if it is disabled
+    """
+    global _semantic_cache
+    settings = get_config().setting("semantic_cache")
+    if not settings.get("enabled", True):
+        return None
+    if _semantic_cache is None:
+        with _semantic_cache_lock:
+            if _semantic_cache is None:
+                _semantic_cache = SemanticCache(
+                    similarity_threshold=settings.get("similarity_threshold", 0.95),
+                    capacity=settings.get("capacity", 512),
+                )
+    return _semantic_cache
@@ -2,8 +2,43 @@ from phi.agent import Agent
 from phi.model.openai import OpenAIChat
 from phi.model.groq import Groq
 from phi.tools.duckduckgo import DuckDuckGo
-import yaml
-import os
+from groq import AsyncGroq
+from openai import AsyncOpenAI
+from agent_pool import AgentPool
+from config import get_config
+from providers import get_provider
+from telemetry import get_telemetry
+import hashlib
+from typing import Dict
+
+# Temperature used by each agent role
+ROLE_TEMPERATURES = {
+    "student_analyzer": 0.6,
+    "roadmap_creator": 0.7,
+    "quiz_generator": 0.5,
+    "tutor": 0.7,
+    "resource_finder": 0.6,
+    "rag_tutor": 0.6,
+}
+
+# phi reports every agent run to its hosted API unless told not to: a new HTTPS client
+# and an outbound request per run, which costs tens of milliseconds and fails offline
+AGENT_OPTIONS = {"telemetry": False}
+
+# Process-wide pool of ready-to-run agents, shared by every StudyAgents instance
+agent_pool = AgentPool()
+
+
+def _reset_agent(agent):
+    """
+    Clear per-run state from a pooled agent before it is reused.
+    
+    Args:
+        agent (Agent): The agent being returned to the pool
+    """
+    agent.memory.clear()
+    agent.run_id = None
+    agent.run_response = None
 
 class StudyAgents:
     def __init__(self, topic, subject_category, knowledge_level, learning_goal, 
@@ -19,7 +54,7 @@ class StudyAgents:
             time_available (str): How much time the student has
             learning_style (str): Student's preferred learning style
             model_name (str): The model to use
-            provider (str): The AI provider ("openai" or "groq")
+            provider (str): The AI provider ("openai", "groq" or the offline "fake")
         """
         self.topic = topic
         self.subject_category = subject_category
@@ -29,44 +64,143 @@ class StudyAgents:
         self.learning_style = learning_style
         self.model_name = model_name
         self.provider = provider
-        self.personas = self._load_personas()
+    
+    @property
+    def personas(self):
+        return self._load_personas()
     
     def _load_personas(self):
         """
-        Load personas from the YAML file.
+        Load personas from the shared configuration snapshot.
         
         Returns:
             dict: A dictionary of personas with system prompts
         """
-        with open("prompts.yaml", "r") as file:
-            config = yaml.safe_load(file)
-            return config.get("personas", {})
+        return get_config().personas
     
     def _get_learning_style_info(self):
         """
-        Load learning style-specific information from the YAML file.
+        Get the pre-rendered learning style block from the shared configuration snapshot.
         
         Returns:
-            dict: Learning style configuration
+            LearningStyleBlock: Learning style description and recommendations
         """
-        with open("prompts.yaml", "r") as file:
-            config = yaml.safe_load(file)
-            return config.get("learning_styles", {}).get(self.learning_style, {})
+        return get_config().style_block(self.learning_style)
     
     def _get_model(self, temperature=0.7):
         """
         Get the appropriate model based on the provider.
         
+        Sync and async calls both go through the provider's gateway, which caps
+        concurrency, paces requests and retries rate-limited ones, so the SDK's
+        own retries are turned off.
+        
         Args:
             temperature (float): The temperature setting for the model
             
         Returns:
             Model: The configured model instance
         """
+        gateway = get_provider(self.provider)
+        params = {
+            "id": self.model_name,
+            "temperature": temperature,
+            "http_client": gateway.http_client,
+            "client_params": {"max_retries": 0},
+        }
         if self.provider == "groq":
-            return Groq(id=self.model_name, temperature=temperature)
+            # The Groq SDK adds the /openai/v1 prefix itself
+            model = Groq(base_url=gateway.base_url.removesuffix("/openai/v1"), **params)
+            model.async_client = AsyncGroq(**model.get_client_params(), http_client=gateway.async_http_client)
         else:
-            return OpenAIChat(id=self.model_name, temperature=temperature)
+            # Also serves the offline "fake" provider, which speaks the OpenAI API
+            model = OpenAIChat(base_url=gateway.base_url, api_key=gateway.api_key, **params)
+            model.async_client = AsyncOpenAI(**model.get_client_params(), http_client=gateway.async_http_client)
+        return model
+    
+    def profile_hash(self):
+        """
+        Hash the student profile and config version that shape the agents' system prompts.
+        
+        Returns:
+            str: A short digest of the profile
+        """
+        profile = "\x1f".join(str(value) for value in (
+            self.topic, self.subject_category, self.knowledge_level, self.learning_goal,
+            self.time_available, self.learning_style, get_config().mtime
+        ))
+        return hashlib.sha1(profile.encode("utf-8")).hexdigest()[:16]
+    
+    def lease(self, role: str):
+        """
+        Check out a pooled agent for a role, building it on first use.
+        
+        Use as a context manager; the agent is returned to the pool afterwards.
+        
+        Args:
+            role (str): One of the keys of ROLE_TEMPERATURES
+            
+        Returns:
+            ContextManager[Agent]: The leased agent
+        """
+        factories = {
+            "student_analyzer": self.student_analyzer_agent,
+            "roadmap_creator": self.roadmap_creator_agent,
+            "quiz_generator": self.quiz_generator_agent,
+            "tutor": self.tutor_agent,
+            "resource_finder": self.resource_finder_agent,
+            "rag_tutor": self.rag_tutor_agent,
+        }
+        key = (role, self.provider, self.model_name, ROLE_TEMPERATURES[role], self.profile_hash())
+        return agent_pool.acquire(key, factories[role], reset=_reset_agent)
+    
+    def model_labels(self, role: str) -> Dict[str, str]:
+        """
+        Telemetry labels of a model call made by a role.
+        
+        Args:
+            role (str): One of the keys of ROLE_TEMPERATURES
+            
+        Returns:
+            Dict[str, str]: provider, model and role labels
+        """
+        return {"provider": self.provider, "model": self.model_name, "role": role}
+    
+    def run(self, role: str, prompt: str) -> str:
+        """
+        Run a pooled agent, timing the model call and counting its tokens.
+        
+        Args:
+            role (str): One of the keys of ROLE_TEMPERATURES
+            prompt (str): The prompt
+            
+        Returns:
+            str: The agent's response content
+        """
+        telemetry = get_telemetry()
+        labels = self.model_labels(role)
+        with self.lease(role) as agent, telemetry.span("model_call", **labels):
+            response = agent.run(prompt, stream=False)
+        telemetry.record_tokens(response.metrics, **labels)
+        return response.content
+    
+    async def arun(self, role: str, prompt: str) -> str:
+        """
+        Run a pooled agent without blocking the event loop.
+        
+        Args:
+            role (str): One of the keys of ROLE_TEMPERATURES
+            prompt (str): The prompt
+            
+        Returns:
+            str: The agent's response content
+        """
+        telemetry = get_telemetry()
+        labels = self.model_labels(role)
+        with self.lease(role) as agent, telemetry.span("model_call", **labels):
+            response = await agent.arun(prompt, stream=False)
+        telemetry.record_tokens(response.metrics, **labels)
+        return response.content
     
     def student_analyzer_agent(self):
         """
@@ -87,12 +221,13 @@ class StudyAgents:
         - Learning Goal: {self.learning_goal}
         - Available Time: {self.time_available}
         - Learning Style: {self.learning_style}
-        - Learning Style Notes: {learning_style_info.get('description', '')}
+        - Learning Style Notes: {learning_style_info.description}
         """
         
         return Agent(
-            model=self._get_model(temperature=0.6),
-            system_prompt=full_prompt
+            model=self._get_model(temperature=ROLE_TEMPERATURES["student_analyzer"]),
+            system_prompt=full_prompt,
+            **AGENT_OPTIONS
         )
     
     def roadmap_creator_agent(self):
@@ -104,7 +239,6 @@ class StudyAgents:
         """
         system_prompt = self.personas.get("roadmap_creator", {}).get("system_prompt", "")
         learning_style_info = self._get_learning_style_info()
-        recommendations = learning_style_info.get('recommendations', [])
         
         full_prompt = f"""{system_prompt}
         
@@ -117,12 +251,13 @@ class StudyAgents:
         - Learning Style: {self.learning_style}
         
         LEARNING STYLE RECOMMENDATIONS:
-        {chr(10).join(f'- {rec}' for rec in recommendations)}
+        {learning_style_info.recommendations_block}
         """
         
         return Agent(
-            model=self._get_model(temperature=0.7),
-            system_prompt=full_prompt
+            model=self._get_model(temperature=ROLE_TEMPERATURES["roadmap_creator"]),
+            system_prompt=full_prompt,
+            **AGENT_OPTIONS
         )
     
     def quiz_generator_agent(self):
@@ -145,8 +280,9 @@ class StudyAgents:
         """
         
         return Agent(
-            model=self._get_model(temperature=0.5),
-            system_prompt=full_prompt
+            model=self._get_model(temperature=ROLE_TEMPERATURES["quiz_generator"]),
+            system_prompt=full_prompt,
+            **AGENT_OPTIONS
         )
     
     def tutor_agent(self):
@@ -165,14 +301,15 @@ class StudyAgents:
         
         STUDENT CONTEXT:
         - Knowledge Level: {self.knowledge_level}
-        - Learning Style: {self.learning_style} - {learning_style_info.get('description', '')}
+        - Learning Style: {self.learning_style} - {learning_style_info.description}
         
         Adapt your explanations to match their learning style and knowledge level.
         """
         
         return Agent(
-            model=self._get_model(temperature=0.7),
-            system_prompt=full_prompt
+            model=self._get_model(temperature=ROLE_TEMPERATURES["tutor"]),
+            system_prompt=full_prompt,
+            **AGENT_OPTIONS
         )
     
     def resource_finder_agent(self):
@@ -198,10 +335,11 @@ class StudyAgents:
         """
         
         return Agent(
-            model=self._get_model(temperature=0.6),
+            model=self._get_model(temperature=ROLE_TEMPERATURES["resource_finder"]),
             tools=[DuckDuckGo()],
             show_tool_calls=True,
-            system_prompt=full_prompt
+            system_prompt=full_prompt,
+            **AGENT_OPTIONS
         )
     
     def rag_tutor_agent(self, knowledge_base=None):
@@ -230,8 +368,9 @@ class StudyAgents:
         """
         
         agent_config = {
-            "model": self._get_model(temperature=0.6),
-            "system_prompt": full_prompt
+            "model": self._get_model(temperature=ROLE_TEMPERATURES["rag_tutor"]),
+            "system_prompt": full_prompt,
+            **AGENT_OPTIONS
         }
         
         # Add knowledge base if provided
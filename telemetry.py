@@ -0,0 +1,311 @@
+import bisect
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
+
+from config import get_config
+
+PREFIX = "study_assistant"
+
+# Upper bounds (seconds) of the span duration histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+COUNTER_HELP = {
+    "tokens_total": "Model tokens used, by kind (prompt or completion)",
+    "cache_lookups_total": "Cache lookups, by cache and result (hit or miss)",
+    "question_bank_questions_total": "Quiz questions requested from the question bank, by result (hit or miss)",
+    "quiz_prefetch_total": "Background quiz prefetches, by outcome (scheduled, skipped, completed, failed, used or missed)",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Mapping[str, Any]) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class _Histogram:
+    __slots__ = ("buckets", "total", "count", "errors")
+    
+    def __init__(self, size: int):
+        self.buckets = [0] * size
+        self.total = 0.0
+        self.count = 0
+        self.errors = 0
+
+
+class Span:
+    """
+    Times a block of work into the span duration histogram.
+    
+    Use as a (sync) context manager; it may wrap awaits. A span whose block
+    raises is also counted as an error.
+    """
+    
+    __slots__ = ("_telemetry", "name", "labels", "_started", "_otel")
+    
+    def __init__(self, telemetry: "Telemetry", name: str, labels: Mapping[str, Any]):
+        self._telemetry = telemetry
+        self.name = name
+        self.labels = labels
+        self._started = 0.0
+        self._otel = None
+    
+    def __enter__(self) -> "Span":
+        tracer = self._telemetry.tracer
+        if tracer is not None:
+            self._otel = tracer.start_as_current_span(
+                self.name, attributes={label: str(value) for label, value in self.labels.items()}
+            )
+            self._otel.__enter__()
+        self._started = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self._telemetry.observe(self.name, time.perf_counter() - self._started, exc_type is not None, **self.labels)
+        if self._otel is not None:
+            self._otel.__exit__(exc_type, exc, tb)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Telemetry:
+    """
+    In-process spans and counters, exported as Prometheus text or to OpenTelemetry.
+    
+    Spans record their duration into one histogram per span name and label set;
+    counters add up values per name and label set. Recording takes a lock and a
+    few dictionary operations, so it is cheap enough to leave on; when disabled,
+    span() returns a shared no-op and count() returns immediately.
+    """
+    
+    def __init__(self, enabled: bool = True, buckets: Sequence[float] = DEFAULT_BUCKETS,
+                 opentelemetry: bool = False):
+        """
+        Initialize the registry.
+        
+        Args:
+            enabled (bool): Whether anything is recorded
+            buckets (Sequence[float]): Upper bounds of the duration histogram buckets, in seconds
+            opentelemetry (bool): Also send spans and counters to the OpenTelemetry API, whose
+                SDK and exporters are configured by the application (requires opentelemetry-api)
+        """
+        self.enabled = enabled
+        self.buckets = tuple(sorted(buckets))
+        self._histograms: Dict[Tuple[str, Labels], _Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._lock = threading.Lock()
+        self.tracer = None
+        self._meter = None
+        self._instruments: Dict[str, Any] = {}
+        if enabled and opentelemetry:
+            try:
+                from opentelemetry import metrics, trace
+            except ImportError:
+                print("OpenTelemetry export is enabled but opentelemetry-api is not installed; "
+                      "recording in-process only")
+            else:
+                self.tracer = trace.get_tracer(PREFIX)
+                self._meter = metrics.get_meter(PREFIX)
+    
+    def span(self, name: str, **labels: Any):
+        """
+        Time a block of work.
+        
+        Args:
+            name (str): The span name, e.g. "model_call" or "vector_search"
+            **labels: Low-cardinality labels, e.g. role="tutor"
+            
+        Returns:
+            ContextManager: The span
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, labels)
+    
+    def observe(self, name: str, seconds: float, error: bool = False, **labels: Any):
+        """
+        Record the duration of a span measured elsewhere.
+        
+        Args:
+            name (str): The span name
+            seconds (float): The duration
+            error (bool): Whether the work failed
+            **labels: Low-cardinality labels
+        """
+        if not self.enabled:
+            return
+        key = (name, _labels(labels))
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(len(self.buckets))
+            if index < len(self.buckets):
+                histogram.buckets[index] += 1
+            histogram.total += seconds
+            histogram.count += 1
+            if error:
+                histogram.errors += 1
+        if self._meter is not None:
+            self._instrument("span_duration_seconds", self._meter.create_histogram, "s").record(
+                seconds, {"span": name, **{label: str(label_value) for label, label_value in labels.items()}}
+            )
+    
+    def count(self, name: str, value: float = 1, **labels: Any):
+        """
+        Add to a counter.
+        
+        Args:
+            name (str): The counter name, ending in "_total"
+            value (float): The amount to add
+            **labels: Low-cardinality labels
+        """
+        if not self.enabled:
+            return
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        if self._meter is not None:
+            self._instrument(name, self._meter.create_counter, "1").add(
+                value, {label: str(label_value) for label, label_value in labels.items()}
+            )
+    
+    def _instrument(self, name: str, create, unit: str):
+        instrument = self._instruments.get(name)
+        if instrument is None:
+            instrument = self._instruments[name] = create(f"{PREFIX}_{name}", unit=unit)
+        return instrument
+    
+    def record_tokens(self, metrics: Optional[Mapping[str, Any]], **labels: Any):
+        """
+        Count the token usage of a model run.
+        
+        Args:
+            metrics (Mapping): A phi RunResponse.metrics dict, whose values are lists with
+                one entry per model response in the run
+            **labels: Labels of the run, e.g. provider, model and role
+        """
+        if not self.enabled or not metrics:
+            return
+        for kind, keys in (("prompt", ("prompt_tokens", "input_tokens")),
+                           ("completion", ("completion_tokens", "output_tokens"))):
+            for key in keys:
+                value = metrics.get(key)
+                if value:
+                    self.count("tokens_total", sum(value) if isinstance(value, list) else value, kind=kind, **labels)
+                    break
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the recorded spans and counters.
+        
+        Returns:
+            dict: "spans" (count, errors, total and average seconds per span and label set)
+                and "counters" (value per counter and label set)
+        """
+        with self._lock:
+            spans = [
+                {"span": name, **dict(labels), "count": histogram.count, "errors": histogram.errors,
+                 "total_seconds": histogram.total, "avg_seconds": histogram.total / histogram.count}
+                for (name, labels), histogram in self._histograms.items()
+            ]
+            counters = [
+                {"counter": name, **dict(labels), "value": value}
+                for (name, labels), value in self._counters.items()
+            ]
+        return {"spans": spans, "counters": counters}
+    
+    def prometheus_text(self) -> str:
+        """
+        Render everything recorded in the Prometheus text exposition format.
+        
+        Returns:
+            str: The metrics page
+        """
+        with self._lock:
+            histograms = [(key, list(h.buckets), h.total, h.count, h.errors) for key, h in self._histograms.items()]
+            counters = list(self._counters.items())
+        
+        lines = []
+        if histograms:
+            name = f"{PREFIX}_span_duration_seconds"
+            lines += [f"# HELP {name} Duration of instrumented work", f"# TYPE {name} histogram"]
+            for (span, labels), buckets, total, count, _ in sorted(histograms):
+                labels = (("span", span),) + labels
+                cumulative = 0
+                for bound, observed in zip(self.buckets, buckets):
+                    cumulative += observed
+                    lines.append(f"{name}_bucket{_format_labels(labels, (('le', f'{bound:g}'),))} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {total:.6f}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+            name = f"{PREFIX}_span_errors_total"
+            lines += [f"# HELP {name} Instrumented work that raised", f"# TYPE {name} counter"]
+            for (span, labels), _, _, _, errors in sorted(histograms):
+                lines.append(f"{name}{_format_labels((('span', span),) + labels)} {errors}")
+        
+        by_name: Dict[str, list] = {}
+        for (counter, labels), value in sorted(counters):
+            by_name.setdefault(counter, []).append((labels, value))
+        for counter, series in by_name.items():
+            name = f"{PREFIX}_{counter}"
+            lines += [f"# HELP {name} {COUNTER_HELP.get(counter, counter)}", f"# TYPE {name} counter"]
+            lines += [f"{name}{_format_labels(labels)} {value:g}" for labels, value in series]
+        return "\n".join(lines) + "\n"
+    
+    def reset(self):
+        """
+        Drop everything recorded so far.
+        """
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+_telemetry: Optional[Telemetry] = None
+_telemetry_lock = threading.Lock()
+
+
+def get_telemetry() -> Telemetry:
+    """
+    Get the process-wide telemetry registry, configured from settings.telemetry in prompts.yaml.
+    
+    Returns:
+        Telemetry: The shared registry
+    """
+    global _telemetry
+    if _telemetry is None:
+        # Read outside the lock: the first config load records its parse time through get_telemetry()
+        settings = get_config().setting("telemetry")
+        with _telemetry_lock:
+            if _telemetry is None:
+                _telemetry = Telemetry(
+                    enabled=settings.get("enabled", True),
+                    buckets=settings.get("latency_buckets") or DEFAULT_BUCKETS,
+                    opentelemetry=settings.get("opentelemetry", False),
+                )
+    return _telemetry
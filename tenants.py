@@ -0,0 +1,214 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import chromadb
+
+from config import get_config, resolve_path
+from ingest_jobs import get_ingestion_queue
+from rag_helper import RAGHelper
+
+
+class TenantCollections:
+    """
+    Per-tenant (per user or session) document collections.
+    
+    Each tenant gets its own Chroma collection, so retrieval only searches that
+    tenant's documents and clearing them never touches anyone else's. Every
+    collection is capped at a chunk quota, and collections of tenants that have
+    been idle too long, or the least recently used ones beyond the capacity,
+    are deleted.
+    """
+    
+    def __init__(self, base_collection: str = "study_materials", persist_directory: str = "./chroma_db",
+                 max_tenants: int = 64, idle_ttl_seconds: float = 7200, max_chunks_per_tenant: Optional[int] = 5000,
+                 embeddings=None):
+        """
+        Initialize the registry.
+        
+        Args:
+            base_collection (str): Prefix of every tenant collection name
+            persist_directory (str): Directory of the vector database; relative paths are resolved
+                against the application directory
+            max_tenants (int): Maximum number of tenant collections kept
+            idle_ttl_seconds (float): Collections unused for this long are deleted (0 to disable)
+            max_chunks_per_tenant (int): Chunk quota of each tenant (None for no limit)
+            embeddings: Embedding backend shared by all tenants (defaults to settings.rag.embedding_backend)
+        """
+        self.base_collection = base_collection
+        self.persist_directory = resolve_path(persist_directory)
+        self.max_tenants = max_tenants
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_chunks_per_tenant = max_chunks_per_tenant
+        self.embeddings = embeddings
+        self.evictions = 0
+        self._helpers: Dict[str, RAGHelper] = {}
+        # Collection name -> last use, least recently used first
+        self._last_used: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._adopt_existing()
+    
+    def _adopt_existing(self):
+        """
+        Track tenant collections left over from earlier runs so they age out like any idle tenant.
+        """
+        try:
+            client = chromadb.PersistentClient(path=self.persist_directory)
+            now = time.time()
+            for collection in client.list_collections():
+                name = getattr(collection, "name", collection)
+                if name.startswith(f"{self.base_collection}_t_"):
+                    self._last_used[name] = now
+        except Exception as e:
+            print(f"Error listing tenant collections: {e}")
+    
+    def collection_name(self, tenant_id: str) -> str:
+        """
+        Get the collection name of a tenant.
+        
+        Args:
+            tenant_id (str): The user or session id
+            
+        Returns:
+            str: A Chroma-safe collection name (the embedding namespace is appended by RAGHelper)
+        """
+        digest = hashlib.sha1(tenant_id.encode("utf-8")).hexdigest()[:16]
+        return f"{self.base_collection}_t_{digest}"
+    
+    def get(self, tenant_id: str) -> RAGHelper:
+        """
+        Get a tenant's RAG helper, creating its collection on first use.
+        
+        Args:
+            tenant_id (str): The user or session id
+            
+        Returns:
+            RAGHelper: The helper bound to the tenant's collection
+        """
+        with self._lock:
+            helper = self._helpers.get(tenant_id)
+            if helper is None:
+                helper = RAGHelper(
+                    collection_name=self.collection_name(tenant_id),
+                    persist_directory=self.persist_directory,
+                    embeddings=self.embeddings,
+                    max_chunks=self.max_chunks_per_tenant,
+                )
+                # Share one embedding backend across tenants
+                self.embeddings = helper.embeddings
+                self._helpers[tenant_id] = helper
+            self._last_used[helper.collection_name] = time.time()
+            self._last_used.move_to_end(helper.collection_name)
+            victims = self._select_victims(keep=helper.collection_name)
+        
+        for name in victims:
+            self._drop(name)
+        return helper
+    
+    def _select_victims(self, keep: str) -> List[str]:
+        """
+        Pick collections to delete: those idle past the TTL, then the least recently used beyond capacity.
+        
+        Must be called with the lock held; the picked collections are no longer tracked on return.
+        """
+        victims = []
+        if self.idle_ttl_seconds:
+            cutoff = time.time() - self.idle_ttl_seconds
+            victims.extend(name for name, used in self._last_used.items() if used < cutoff and name != keep)
+        for name in self._last_used:
+            if len(self._last_used) - len(victims) <= self.max_tenants:
+                break
+            if name != keep and name not in victims:
+                victims.append(name)
+        for name in victims:
+            del self._last_used[name]
+        return victims
+    
+    def _drop(self, name: str):
+        with self._lock:
+            tenant_id = next((t for t, h in self._helpers.items() if h.collection_name == name), None)
+            helper = self._helpers.pop(tenant_id, None) if tenant_id is not None else None
+            self.evictions += 1
+        get_ingestion_queue().forget(name)
+        if helper is not None:
+            helper.drop()
+            return
+        try:
+            chromadb.PersistentClient(path=self.persist_directory).delete_collection(name=name)
+        except Exception as e:
+            print(f"Error deleting tenant collection {name}: {e}")
+    
+    def evict(self, tenant_id: str) -> bool:
+        """
+        Delete a tenant's collection now (e.g. when their session ends).
+        
+        Args:
+            tenant_id (str): The user or session id
+            
+        Returns:
+            bool: True if the tenant had a collection
+        """
+        with self._lock:
+            helper = self._helpers.get(tenant_id)
+            name = helper.collection_name if helper else None
+            if name is None or self._last_used.pop(name, None) is None:
+                return False
+        self._drop(name)
+        return True
+    
+    def evict_idle(self) -> int:
+        """
+        Delete the collections of tenants idle past the TTL.
+        
+        Returns:
+            int: Number of collections deleted
+        """
+        with self._lock:
+            victims = self._select_victims(keep="")
+        for name in victims:
+            self._drop(name)
+        return len(victims)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get registry counters.
+        
+        Returns:
+            Dict[str, Any]: Tracked and loaded tenants, evictions and the configured limits
+        """
+        with self._lock:
+            return {
+                "tenants": len(self._last_used),
+                "loaded": len(self._helpers),
+                "evictions": self.evictions,
+                "max_tenants": self.max_tenants,
+                "max_chunks_per_tenant": self.max_chunks_per_tenant,
+            }
+
+
+_tenant_collections: Optional[TenantCollections] = None
+_tenant_collections_lock = threading.Lock()
+
+
+def get_tenant_collections() -> TenantCollections:
+    """
+    Get the process-wide tenant registry, configured from the settings in prompts.yaml.
+    
+    Returns:
+        TenantCollections: The shared registry
+    """
+    global _tenant_collections
+    if _tenant_collections is None:
+        with _tenant_collections_lock:
+            if _tenant_collections is None:
+                settings = get_config().setting("tenants")
+                _tenant_collections = TenantCollections(
+                    base_collection=settings.get("base_collection", "study_materials"),
+                    persist_directory=settings.get("persist_directory", "./chroma_db"),
+                    max_tenants=settings.get("max_tenants", 64),
+                    idle_ttl_seconds=settings.get("idle_ttl_seconds", 7200),
+                    max_chunks_per_tenant=settings.get("max_chunks_per_tenant", 5000),
+                )
+    return _tenant_collections